@@ -3,21 +3,61 @@
 Analyze code.json file for repository statistics
 """
 
-import json
 import argparse
+import re
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+from src import jsonio
+from src.combine import Combine
 
-def analyze_code_json(file_path, group_by_org=False):
-    """Analyze code.json file and return statistics"""
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    projects = data.get('projects', [])
+
+# Fields most records leave out, derived (and normalized) the way the metadata browser does.
+DERIVED_FIELDS = {
+    'platform': Combine.record_platform,
+}
+
+# Separators between the addresses of a multi-address contact.email ('a@cdc.gov;b@cdc.gov').
+EMAIL_SEPARATORS = re.compile(r'[;,]')
+
+
+def field_values(project, path):
+    """
+    Values of a project at a dotted field path, e.g. 'status' or 'contact.email'.
+    A list (such as languages) gives one value per item, and a ':domain' suffix reduces
+    email addresses to their domain ('contact.email:domain'), one per distinct domain of
+    a ';' or ',' separated list. A missing field is 'unknown'.
+    """
+    path, _, modifier = path.partition(':')
+    if path in DERIVED_FIELDS:
+        return [DERIVED_FIELDS[path](project)]
+    values = [project]
+    for part in path.split('.'):
+        found = []
+        for value in values:
+            if isinstance(value, dict) and value.get(part) is not None:
+                item = value[part]
+                found.extend(item if isinstance(item, list) else [item])
+        values = found
+    if modifier == 'domain':
+        addresses = [address.strip() for value in values if isinstance(value, str) for address in EMAIL_SEPARATORS.split(value)]
+        values = [address.rsplit('@', 1)[1].strip().lower() for address in addresses if '@' in address]
+    values = [value if isinstance(value, str) else jsonio.dumps(value) for value in values]
+    return list(dict.fromkeys(values)) or ['unknown']
+
+
+def analyze_code_json(file_path, group_by_org=False, group_by=()):
+    """
+    Analyze a code.json (or raw repo-*.json) file and return statistics. Projects are
+    streamed one at a time, so memory depends on the number of distinct values counted,
+    not on the size of the file. Each group_by field path is counted on its own and,
+    with several, as a cross-tab of every combination of their values.
+    """
     
     # Initialize counters
+    total_projects = 0
     visibility_count = Counter()
     usage_type_count = Counter()
     exemption_text_count = Counter()
@@ -27,9 +67,15 @@ def analyze_code_json(file_path, group_by_org=False):
         'exemption_text': Counter(),
         'total': 0
     })
+    dimensions = {path: Counter() for path in group_by}
+    crosstab = Counter()
     
     # Analyze each project
-    for project in projects:
+    for project in jsonio.iter_projects(file_path):
+        if not isinstance(project, dict):
+            continue
+        total_projects += 1
+
         # Repository visibility
         visibility = project.get('repositoryVisibility', 'unknown')
         visibility_count[visibility] += 1
@@ -49,16 +95,83 @@ def analyze_code_json(file_path, group_by_org=False):
             org_stats[org]['usage_type'][usage_type] += 1
             org_stats[org]['exemption_text'][exemption_text] += 1
             org_stats[org]['total'] += 1
+
+        # Requested field paths, each on its own and crossed with one another
+        if group_by:
+            combinations = [()]
+            for path in group_by:
+                values = field_values(project, path)
+                dimensions[path].update(values)
+                combinations = [combination + (value,) for combination in combinations for value in values]
+            if len(group_by) > 1:
+                crosstab.update(combinations)
     
     return {
-        'total_projects': len(projects),
+        'total_projects': total_projects,
         'visibility': dict(visibility_count),
         'usage_type': dict(usage_type_count),
         'exemption_text': dict(exemption_text_count),
-        'organizations': dict(org_stats) if group_by_org else {}
+        'organizations': dict(org_stats) if group_by_org else {},
+        'group_by': list(group_by),
+        'dimensions': {path: dict(counts) for path, counts in dimensions.items()},
+        'crosstab': dict(crosstab)
     }
 
 
+def merge_stats(stats_list):
+    """Combine the statistics of several files into one"""
+    merged = {
+        'total_projects': 0,
+        'visibility': Counter(),
+        'usage_type': Counter(),
+        'exemption_text': Counter(),
+        'organizations': {},
+        'group_by': stats_list[0]['group_by'] if stats_list else [],
+        'dimensions': defaultdict(Counter),
+        'crosstab': Counter()
+    }
+    for stats in stats_list:
+        merged['total_projects'] += stats['total_projects']
+        for name in ('visibility', 'usage_type', 'exemption_text', 'crosstab'):
+            merged[name].update(stats[name])
+        for path, counts in stats['dimensions'].items():
+            merged['dimensions'][path].update(counts)
+        for org, org_data in stats['organizations'].items():
+            target = merged['organizations'].setdefault(org, {
+                'visibility': Counter(),
+                'usage_type': Counter(),
+                'exemption_text': Counter(),
+                'total': 0
+            })
+            for name in ('visibility', 'usage_type', 'exemption_text'):
+                target[name].update(org_data[name])
+            target['total'] += org_data['total']
+    for name in ('visibility', 'usage_type', 'exemption_text', 'crosstab'):
+        merged[name] = dict(merged[name])
+    merged['dimensions'] = {path: dict(counts) for path, counts in merged['dimensions'].items()}
+    return merged
+
+
+def analyze_files(file_paths, group_by_org=False, group_by=(), workers=1):
+    """Analyze several catalog files, on a pool of worker processes when workers > 1"""
+    analyze = partial(analyze_code_json, group_by_org=group_by_org, group_by=tuple(group_by))
+    workers = min(workers or 1, len(file_paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return merge_stats(list(executor.map(analyze, file_paths)))
+    return merge_stats([analyze(file_path) for file_path in file_paths])
+
+
+def to_json(stats):
+    """Statistics as plain JSON data; the cross-tab becomes one row per combination"""
+    data = {name: value for name, value in stats.items() if name != 'crosstab'}
+    data['crosstab'] = [
+        dict(zip(stats['group_by'], combination), count=count)
+        for combination, count in sorted(stats['crosstab'].items(), key=lambda x: x[1], reverse=True)
+    ]
+    return data
+
+
 def print_results(stats, group_by_org=False):
     """Print analysis results in a readable format"""
     
@@ -125,20 +238,54 @@ def print_results(stats, group_by_org=False):
                 print(f"      {usage_type}: {count:,} ({percentage:.1f}%)")
 
 
+def print_group_by(stats, limit=20):
+    """Print the counts of the --group-by field paths and their cross-tab"""
+    total = stats['total_projects'] or 1
+    for path, counts in stats['dimensions'].items():
+        print(f"🔎 BY {path.upper()}")
+        print("-" * 30)
+        for value, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)[:limit]:
+            print(f"  {value}: {count:,} ({(count / total) * 100:.1f}%)")
+        if len(counts) > limit:
+            print(f"  ... {len(counts) - limit:,} more")
+        print()
+
+    if stats['crosstab']:
+        print(f"🧮 CROSS-TAB: {' x '.join(stats['group_by'])}")
+        print("-" * 30)
+        rows = sorted(stats['crosstab'].items(), key=lambda x: x[1], reverse=True)
+        for combination, count in rows[:limit]:
+            print(f"  {' | '.join(combination)}: {count:,}")
+        if len(rows) > limit:
+            print(f"  ... {len(rows) - limit:,} more combinations")
+        print()
+
+
 def main():
     parser = argparse.ArgumentParser(description='Analyze code.json file for repository statistics')
-    parser.add_argument('file', help='Path to code.json file')
+    parser.add_argument('file', nargs='+', help='Path to code.json file (or several catalog/raw files, analyzed together)')
     parser.add_argument('--by-org', action='store_true', help='Group results by organization')
+    parser.add_argument('--group-by', action='append', default=[], metavar='FIELD',
+                        help="Count projects by a field path, e.g. platform, status, languages or contact.email:domain; repeat for a cross-tab")
+    parser.add_argument('--json', help='Also write the statistics as JSON to this file')
+    parser.add_argument('--workers', type=int, default=1, help='Analyze several files on this many processes')
     
     args = parser.parse_args()
     
-    if not Path(args.file).exists():
-        print(f"❌ Error: File '{args.file}' not found")
-        return 1
+    for file_path in args.file:
+        if not Path(file_path).exists():
+            print(f"❌ Error: File '{file_path}' not found")
+            return 1
     
     try:
-        stats = analyze_code_json(args.file, group_by_org=args.by_org)
-        print_results(stats, group_by_org=args.by_org)
+        stats = analyze_files(args.file, group_by_org=args.by_org, group_by=args.group_by, workers=args.workers)
+        if not stats['total_projects']:
+            print("No projects found")
+        else:
+            print_results(stats, group_by_org=args.by_org)
+            print_group_by(stats)
+        if args.json:
+            jsonio.dump(to_json(stats), args.json)
     except Exception as e:
         print(f"❌ Error analyzing file: {e}")
         return 1
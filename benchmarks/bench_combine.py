@@ -0,0 +1,104 @@
+"""
+Benchmark: building code.json from the raw repo-*.json files.
+
+Compares the previous combine step (json.load of every raw file into one list, then
+json.dump(indent=2)) with Combine.combine_json_files on one process and with its index
+pass on --workers processes, using whichever JSON backend src/jsonio.py picked (orjson
+if installed). Two catalogs are measured: the published docs/catalog/code.json split
+into per-platform raw files, and a synthetic catalog of --projects projects built from
+its records. The pool is capped at the CPU count, so on one CPU both runs are the same.
+
+  python benchmarks/bench_combine.py [--projects 100000] [--files 20] [--workers 4] [--backend json] [--memory]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import jsonio
+from src.combine import Combine
+
+CATALOG = Path(__file__).resolve().parent.parent / 'docs' / 'catalog' / 'code.json'
+
+def previous_combine(raw_dir, output_dir):
+  combined = []
+  for file_path in Path(raw_dir).glob('*.json'):
+    with open(file_path, 'r') as f:
+      data = json.load(f)
+    combined.extend(data if isinstance(data, list) else [data])
+  data = {"version": "2.0", "agency": "CDC", "measurementType": {"method": "projects"}, "projects": combined}
+  with open(Path(output_dir) / 'code.json', 'w') as f:
+    json.dump(data, f, indent=2)
+
+def write_raw_files(raw_dir, projects, files):
+  raw_dir.mkdir(parents=True, exist_ok=True)
+  size = -(-len(projects) // files)
+  for number in range(files):
+    with open(raw_dir / f"repo-{number:03}.json", 'w') as f:
+      json.dump(projects[number * size:(number + 1) * size], f, indent=2)
+
+def synthetic_projects(template, count):
+  projects = []
+  for number in range(count):
+    project = dict(template[number % len(template)])
+    project['privateID'] = f"synthetic_{number}"
+    project.pop('private_id', None)
+    project['name'] = f"{project.get('name', 'project')}-{number}"
+    projects.append(project)
+  return projects
+
+def timed(label, fn, *args, memory=False):
+  if memory:
+    tracemalloc.start()
+  start = time.perf_counter()
+  # Combine's progress output is silenced so it does not end up in the timings.
+  with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    fn(*args)
+  elapsed = time.perf_counter() - start
+  line = f"  {label:<28} {elapsed:7.2f} s"
+  if memory:
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # tracemalloc only sees this process, so worker memory is not included.
+    line += f"   peak {peak / 2**20:7.1f} MB (main process)"
+  print(line)
+  return elapsed
+
+def run(name, projects, files, workers, memory):
+  with tempfile.TemporaryDirectory() as tmp:
+    raw_dir = Path(tmp) / 'raw'
+    write_raw_files(raw_dir, projects, files)
+    size = sum(path.stat().st_size for path in raw_dir.iterdir())
+    print(f"{name}: {len(projects)} projects in {files} raw files, {size / 2**20:.1f} MB")
+    old = timed("previous (load all, dump)", previous_combine, raw_dir, tmp, memory=memory)
+    new = timed("Combine", lambda: Combine().combine_json_files(raw_dir, tmp), memory=memory)
+    processes = Combine.index_processes(workers, files)
+    pooled = timed(f"Combine, {processes} index procs", lambda: Combine().combine_json_files(raw_dir, tmp, workers=workers), memory=memory)
+    print(f"  speed-up: {old / new:.1f}x, {old / pooled:.1f}x with the pool")
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark the combine step')
+  parser.add_argument('--projects', type=int, default=100_000, help='Projects in the synthetic catalog')
+  parser.add_argument('--files', type=int, default=20, help='Raw files the synthetic catalog is split into')
+  parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes for the index pass of the pooled run (default: CPU count)')
+  parser.add_argument('--backend', choices=['auto', 'json'], default='auto', help='json: force the stdlib backend even if orjson is installed')
+  parser.add_argument('--memory', action='store_true', help='Also report peak memory of the main process (slows every run down)')
+  args = parser.parse_args()
+
+  if args.backend == 'json':
+    jsonio.orjson = None
+    jsonio.BACKEND = 'json'
+  print(f"JSON backend: {jsonio.BACKEND}, {os.cpu_count()} CPUs")
+  template = jsonio.load(CATALOG)['projects']
+  run('published catalog', template, 8, args.workers, args.memory)
+  run('synthetic catalog', synthetic_projects(template, args.projects), args.files, args.workers, args.memory)
+
+if __name__ == "__main__":
+  main()
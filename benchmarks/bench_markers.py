@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: README marker extraction per repository.
+
+Compares the previous approach (one freshly compiled regex search over the README for
+each of the six markers the sanitizers read) with a single parse_markers() scan. The
+corpus is synthetic: large READMEs of prose and code blocks with the markers near the
+end, which is the worst case for a per-key search. Pass --readme-dir to use real files.
+
+  python benchmarks/bench_markers.py [--repos 200] [--kb 200] [--readme-dir DIR]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.markers import MARKER_KEYS, parse_markers
+
+WORDS = "data surveillance pipeline public health analysis model report cohort county".split()
+
+def synthetic_readme(size_kb, rng):
+  lines = ["# Project", ""]
+  while sum(len(line) + 1 for line in lines) < size_kb * 1024:
+    if rng.random() < 0.1:
+      lines += ["```python", "def run(): return 1", "```"]
+    else:
+      lines.append(" ".join(rng.choice(WORDS) for _ in range(12)))
+  lines += ["", "Organization: OCIO", "Contact email: team@cdc.gov", "Status: Production",
+            "Version: 1.4.0", "Exemption: exemptByAgencySystem", "Exemption justification: internal"]
+  return "\n".join(lines)
+
+def per_key(content):
+  values = {}
+  for key in MARKER_KEYS:
+    match = re.compile(r'(?i)^\s*(?:{}):\s*(.*)$'.format(key), re.MULTILINE).search(content)
+    values[key] = match.group(1).strip() if match else None
+  return values
+
+def single_pass(content):
+  markers = parse_markers(content)
+  return {key: markers.get(key) for key in MARKER_KEYS}
+
+def timed(fn, corpus):
+  start = time.perf_counter()
+  for content in corpus:
+    fn(content)
+  return (time.perf_counter() - start) / len(corpus)
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark README marker extraction')
+  parser.add_argument('--repos', type=int, default=200, help='Number of synthetic READMEs')
+  parser.add_argument('--kb', type=int, default=200, help='Size of each synthetic README in KB')
+  parser.add_argument('--readme-dir', help='Directory of README files to use instead of a synthetic corpus')
+  args = parser.parse_args()
+
+  if args.readme_dir:
+    corpus = [path.read_text(errors='ignore') for path in Path(args.readme_dir).rglob('*') if path.is_file()]
+  else:
+    rng = random.Random(0)
+    corpus = [synthetic_readme(args.kb, rng) for _ in range(args.repos)]
+  # Distinct string objects so no run is served from parse_markers' cache.
+  corpus = [content + "\n" for content in corpus]
+
+  for content in corpus:
+    assert per_key(content) == single_pass(content)
+  parse_markers.cache_clear()
+  corpus = [content + " " for content in corpus]
+
+  old = timed(per_key, corpus)
+  new = timed(single_pass, corpus)
+  print(f"READMEs: {len(corpus)}, average size: {sum(map(len, corpus)) / len(corpus) / 1024:.0f} KB")
+  print(f"per-key searches: {old * 1000:.3f} ms/repo")
+  print(f"single pass:      {new * 1000:.3f} ms/repo")
+  print(f"saved:            {(old - new) * 1000:.3f} ms/repo ({old / new:.1f}x)")
+
+if __name__ == "__main__":
+  main()
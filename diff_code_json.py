@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Compare two code.json releases: added, removed and modified projects
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from src import jsonio
+from src.combine import Combine
+from src.content_hash import content_hash
+
+# Fields that change on every run without the project changing.
+VOLATILE_FIELDS = {'date.metadataLastUpdated', 'contentHash'}
+
+
+def project_key(project):
+    """privateID/private_id, else repositoryURL, else the name within its organization"""
+    return Combine.record_key(project) or f"{project.get('organization', '')}/{project.get('name', '')}"
+
+
+def summarize(key, project):
+    return {'key': key, 'name': project.get('name', ''), 'repositoryURL': project.get('repositoryURL', '')}
+
+
+def flatten(value, prefix=''):
+    """Nested dicts as {dotted.path: value}; lists and scalars are leaves"""
+    if isinstance(value, dict) and value:
+        fields = {}
+        for name, item in value.items():
+            fields.update(flatten(item, f"{prefix}.{name}" if prefix else name))
+        return fields
+    return {prefix: value}
+
+
+def field_changes(old, new):
+    """Field-level deltas between two versions of a project, volatile fields excluded"""
+    old_fields = flatten(old)
+    new_fields = flatten(new)
+    changes = []
+    for field in sorted(old_fields.keys() | new_fields.keys()):
+        if field in VOLATILE_FIELDS:
+            continue
+        before = old_fields.get(field)
+        after = new_fields.get(field)
+        if before == after:
+            continue
+        change = {'field': field, 'old': before, 'new': after}
+        if isinstance(before, list) and isinstance(after, list):
+            change['added'] = [item for item in after if item not in before]
+            change['removed'] = [item for item in before if item not in after]
+        changes.append(change)
+    return changes
+
+
+def index_catalog(file_path):
+    """
+    {key: (content hash, name, repositoryURL)} of a catalog, in one streaming pass, with
+    the number of projects read and the keys seen more than once. The first project with
+    a key is the one indexed, as in every other step of the diff.
+    """
+    index = {}
+    total = 0
+    duplicates = set()
+    for project in jsonio.iter_projects(file_path):
+        if not isinstance(project, dict):
+            continue
+        total += 1
+        key = project_key(project)
+        if key in index:
+            duplicates.add(key)
+            continue
+        index[key] = (content_hash(project), project.get('name', ''), project.get('repositoryURL', ''))
+    return index, total, duplicates
+
+
+def diff_code_json(old_path, new_path):
+    """
+    Diff two catalogs. The old catalog is indexed by key and content hash in one
+    streaming pass, the new one is streamed against that index, and only the new
+    versions of modified projects are held until the old catalog is read again for
+    their field-level deltas, so memory scales with the index and the changes.
+
+    A key that appears more than once in a catalog is compared by its first project and
+    reported under duplicates, so that on each side the unique projects add up:
+    new_total - new_duplicates = added + modified + unchanged, and
+    old_total - old_duplicates = removed + modified + unchanged.
+    """
+    old_index, old_total, old_duplicates = index_catalog(old_path)
+
+    added = []
+    modified = {}
+    seen = set()
+    new_duplicates = set()
+    new_total = 0
+    for project in jsonio.iter_projects(new_path):
+        if not isinstance(project, dict):
+            continue
+        new_total += 1
+        key = project_key(project)
+        if key in seen:
+            new_duplicates.add(key)
+            continue
+        seen.add(key)
+        if key not in old_index:
+            added.append(summarize(key, project))
+        elif old_index[key][0] != content_hash(project):
+            modified[key] = project
+
+    removed = [
+        {'key': key, 'name': name, 'repositoryURL': url}
+        for key, (_, name, url) in old_index.items() if key not in seen
+    ]
+
+    changes = []
+    if modified:
+        for project in jsonio.iter_projects(old_path):
+            if not isinstance(project, dict):
+                continue
+            key = project_key(project)
+            if key in modified:
+                new_project = modified.pop(key)
+                changes.append(dict(summarize(key, new_project), changes=field_changes(project, new_project)))
+
+    added.sort(key=lambda item: item['key'])
+    removed.sort(key=lambda item: item['key'])
+    changes.sort(key=lambda item: item['key'])
+    return {
+        'old': str(old_path),
+        'new': str(new_path),
+        'summary': {
+            'old_total': old_total,
+            'new_total': new_total,
+            'old_duplicates': old_total - len(old_index),
+            'new_duplicates': new_total - len(seen),
+            'added': len(added),
+            'removed': len(removed),
+            'modified': len(changes),
+            'unchanged': len(seen) - len(added) - len(changes),
+        },
+        'added': added,
+        'removed': removed,
+        'modified': changes,
+        'duplicates': {'old': sorted(old_duplicates), 'new': sorted(new_duplicates)},
+    }
+
+
+def _cell(value, limit=80):
+    text = '' if value is None else jsonio.dumps(value) if isinstance(value, (list, dict)) else str(value)
+    text = text.replace('|', '\\|').replace('\n', ' ')
+    return text[:limit] + '...' if len(text) > limit else text
+
+
+def to_markdown(diff):
+    """Markdown report of a diff, for reviewers of a release"""
+    summary = diff['summary']
+    lines = [
+        '# code.json changes',
+        '',
+        f"Comparing `{diff['old']}` ({summary['old_total']:,} projects) with `{diff['new']}` ({summary['new_total']:,} projects).",
+        '',
+        '| Added | Removed | Modified | Unchanged |',
+        '| ---: | ---: | ---: | ---: |',
+        f"| {summary['added']:,} | {summary['removed']:,} | {summary['modified']:,} | {summary['unchanged']:,} |",
+    ]
+    for title, projects in (('Added', diff['added']), ('Removed', diff['removed'])):
+        if projects:
+            lines += ['', f"## {title} ({len(projects):,})", '', '| Key | Name | Repository URL |', '| --- | --- | --- |']
+            lines += [f"| {_cell(item['key'])} | {_cell(item['name'])} | {_cell(item['repositoryURL'])} |" for item in projects]
+    duplicates = [(side, key) for side in ('old', 'new') for key in diff['duplicates'][side]]
+    if duplicates:
+        lines += ['', f"## Duplicate keys ({len(duplicates):,})", '',
+                  'Only the first project with each of these keys is compared.', '',
+                  '| Catalog | Key |', '| --- | --- |']
+        lines += [f"| {side} | {_cell(key)} |" for side, key in duplicates]
+    if diff['modified']:
+        lines += ['', f"## Modified ({len(diff['modified']):,})"]
+        for item in diff['modified']:
+            lines += ['', f"### {_cell(item['name'])} (`{item['key']}`)", '', '| Field | Old | New |', '| --- | --- | --- |']
+            lines += [f"| {change['field']} | {_cell(change['old'])} | {_cell(change['new'])} |" for change in item['changes']]
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two code.json releases')
+    parser.add_argument('old', help='Path to the previous code.json')
+    parser.add_argument('new', help='Path to the new code.json')
+    parser.add_argument('--json', help='Write the diff as JSON to this file')
+    parser.add_argument('--markdown', help='Write the Markdown report to this file instead of printing it')
+
+    args = parser.parse_args()
+
+    for file_path in (args.old, args.new):
+        if not Path(file_path).exists():
+            print(f"❌ Error: File '{file_path}' not found", file=sys.stderr)
+            return 1
+
+    try:
+        diff = diff_code_json(args.old, args.new)
+    except Exception as e:
+        print(f"❌ Error comparing files: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        jsonio.dump(diff, args.json)
+    report = to_markdown(diff)
+    if args.markdown:
+        Path(args.markdown).write_text(report, encoding='utf-8')
+    else:
+        print(report, end='')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
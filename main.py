@@ -1,6 +1,20 @@
 from src.config import Config
 from src.repository import Repository
 from src.sanitize import Sanitizer
+from src.graphql import GraphqlFetcher
+from src.http_cache import HttpCache
+from src.transport import ApiAdapter
+from src.incremental import PreviousScan
+from src.ratelimit import RateLimitScheduler
+from src.checkpoint import Checkpoint
+from src.window import SubmissionWindow
+from src.version import VersionResolver
+from src.snapshot import SnapshotStore
+from src.offline import rebuild_from_snapshot
+from src.combine import Combine
+from src.catalog import CatalogStore, sync_catalog
+from src.mapping import PrivateIdMapping
+from src.browser import BrowserArtifacts
 
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -8,44 +22,14 @@ import itertools
 from pathlib import Path
 import sys
 import os
-import json
 import argparse
 
-###############################################################
-## The intention is to provide a simple interface to update
-## us with existing repositories in a Github organization, and
-## then sanitize the data to a common format such as code.json
-## to provide the user with all of the known repositories.
-###############################################################
-def main():
-  parser = argparse.ArgumentParser(description='Process GitHub organization')
-  parser.add_argument('--output', help='Output directory path')
-  parser.add_argument('--org', help='The GitHub organization to scan (overrides GH_ORG in .env)')
-  parser.add_argument('--limit', type=int, help='Limit the number of repositories to process for testing')
-  parser.add_argument('--workers', type=int, default=10, help='Number of parallel workers to process repositories')
-  args = parser.parse_args()
-
-  now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-  print(f"Process starting: {now}", flush=True)
-
-  config = Config()
-  # Determine the target organization from the --org flag or the .env file
-  org_name = args.org or os.environ.get('GH_ORG')
-  if not org_name:
-    print("Exiting: No GitHub organization specified. Use the --org flag or set GH_ORG in your .env file.", flush=True)
-    sys.exit(1)
-
-  credentials, errors = config.get_and_verify_credentials(org_name)
-  if errors:
-    print(f"Exiting due to configuration errors for organization '{org_name}':\n- " + "\n- ".join(errors), flush=True)
-    sys.exit(1)
-
-  print(f'Targeting GitHub organization: https://github.com/{org_name}', flush=True)
-  if args.output:
-    credentials['raw_data_dir'] = args.output
-  elif credentials.get('raw_data_dir') == 'data/raw':
-    credentials['raw_data_dir'] = str(Path(__file__).parent.absolute() / 'data/raw')
-  print(f'Raw data directory: {credentials["raw_data_dir"]}', flush=True)
+def process_with_rest(credentials, args, previous, checkpoint, version_resolver, recorder):
+  """
+  Sanitizes every repository with per-repository REST calls on a thread pool.
+  Repositories that previous reports as unchanged are carried forward without any calls,
+  and repositories already in the checkpoint are skipped.
+  """
   # get_repos() now returns a PaginatedList iterator, not a full list.
   repos_iterator = Repository().get_repos(credentials)
 
@@ -59,36 +43,314 @@ def main():
     total_repos_to_process = min(args.limit, total_repos_to_process)
     print(f"Limiting processing to the first {total_repos_to_process} repositories.", flush=True)
 
-  sanitizer = Sanitizer()
-  sanitized_data = []
+  sanitizer = Sanitizer(version_resolver=version_resolver, snapshot_recorder=recorder)
+  skipped = {'reused': 0, 'resumed': 0}
+
+  def repos_needing_processing():
+    # Pulled lazily by the submission window, so listing pages load as work completes.
+    for repo in repos_to_process:
+      if repo.id in checkpoint:
+        skipped['resumed'] += 1
+      elif previous_record := previous.match_github(repo):
+        checkpoint.append(repo.id, previous_record)
+        if recorder:
+          recorder.carry_forward(repo.id)
+        skipped['reused'] += 1
+      else:
+        yield repo
 
   print(f"Processing {total_repos_to_process} repositories with up to {args.workers} workers...", flush=True)
+  total_repos = total_repos_to_process
+  processed_count = 0
   with ThreadPoolExecutor(max_workers=args.workers) as executor:
-    future_to_repo = {executor.submit(sanitizer.get_repository_metadata, repo): repo for repo in repos_to_process}
-
-    processed_count = 0
-    total_repos = total_repos_to_process
-    for future in as_completed(future_to_repo):
-      repo = future_to_repo[future]
+    window = SubmissionWindow(executor, max_pending=2 * args.workers)
+    for repo, future in window.map(sanitizer.get_repository_metadata, repos_needing_processing()):
       processed_count += 1
+      progress = processed_count + skipped['reused'] + skipped['resumed']
       try:
         data = future.result()
         if data:
-          sanitized_data.append(data)
-        print(f"[{processed_count}/{total_repos}] Successfully processed: {repo.full_name}")
+          checkpoint.append(repo.id, data)
+        print(f"[{progress}/{total_repos}] Successfully processed: {repo.full_name}")
       except Exception as exc:
-        print(f"[{processed_count}/{total_repos}] Error processing {repo.full_name}: {exc}")
+        print(f"[{progress}/{total_repos}] Error processing {repo.full_name}: {exc}")
+  if skipped['reused']:
+    print(f"Carried forward {skipped['reused']} unchanged repositories from the previous scan.", flush=True)
+
+def process_with_async(credentials, org_name, args, previous, checkpoint, version_resolver, recorder):
+  """
+  Sanitizes every repository with the asyncio engine: each repository's fetches run
+  concurrently and up to --max-in-flight requests share one connection pool.
+  """
+  # Imported here so the threaded engine does not require aiohttp.
+  from src.async_engine import AsyncScanner
+
+  if args.limit:
+    print(f"Limiting processing to the first {args.limit} repositories.", flush=True)
+  print(f"Processing repositories with up to {args.max_in_flight} requests in flight...", flush=True)
+  scheduler = Repository().scheduler(credentials, max_concurrency=args.max_in_flight)
+  scanner = AsyncScanner(Repository().get_access_token(credentials), max_in_flight=args.max_in_flight, scheduler=scheduler,
+                         version_resolver=version_resolver)
+  scanner.sanitizer.snapshot_recorder = recorder
+  scanner.run(org_name, limit=args.limit, previous=previous, checkpoint=checkpoint)
+
+def process_with_graphql(credentials, org_name, args, previous, checkpoint, version_resolver, recorder):
+  """
+  Sanitizes every repository from GraphQL batches. Each query returns the README,
+  CODEOWNERS, languages, topics, license and newest tags for a whole page of
+  repositories, so the rules run locally; only a repository whose version needs
+  a full tag scan costs further queries.
+  """
+  fetcher = GraphqlFetcher(Repository().authenticate(credentials), batch_size=min(args.graphql_batch_size, 100),
+                           version_resolver=version_resolver)
+  snapshots = fetcher.iter_snapshots(org_name)
+  if args.limit:
+    snapshots = itertools.islice(snapshots, args.limit)
+    print(f"Limiting processing to the first {args.limit} repositories.", flush=True)
+
+  sanitizer = Sanitizer(snapshot_recorder=recorder)
+  print(f"Processing repositories in GraphQL batches of {fetcher.batch_size}...", flush=True)
+  for processed_count, snapshot in enumerate(snapshots, start=1):
+    total_repos = min(args.limit, fetcher.total_count) if args.limit else fetcher.total_count
+    if snapshot.id in checkpoint:
+      continue
+    data = previous.match_github(snapshot)
+    if data and recorder:
+      recorder.carry_forward(snapshot.id)
+    data = data or sanitizer.get_snapshot_metadata(snapshot)
+    if data:
+      checkpoint.append(snapshot.id, data)
+    print(f"[{processed_count}/{total_repos}] Successfully processed: {snapshot.full_name}")
+
+def parse_orgs(args):
+  """Organizations to scan: --orgs, else --org, else GH_ORGS (comma-separated), else GH_ORG."""
+  value = args.orgs or args.org or os.environ.get('GH_ORGS') or os.environ.get('GH_ORG') or ''
+  orgs = []
+  for org in value.split(','):
+    if org.strip() and org.strip() not in orgs:
+      orgs.append(org.strip())
+  return orgs
+
+def prepare_org(config, args, org_name):
+  """Resolves one organization's credentials and output file, exiting on configuration errors."""
+  credentials, errors = config.get_and_verify_credentials(org_name)
+  # Rebuilding from the snapshot store needs no API credentials.
+  if errors and not args.from_snapshot:
+    print(f"Exiting due to configuration errors for organization '{org_name}':\n- " + "\n- ".join(errors), flush=True)
+    sys.exit(1)
+
+  print(f'Targeting GitHub organization: https://github.com/{org_name}', flush=True)
+  if args.output:
+    credentials['raw_data_dir'] = args.output
+  elif credentials.get('raw_data_dir') == 'data/raw':
+    credentials['raw_data_dir'] = str(Path(__file__).parent.absolute() / 'data/raw')
+  credentials['workers'] = args.workers
+  if args.no_http_cache:
+    credentials['http_cache_dir'] = ''
+  elif credentials.get('http_cache_dir') == 'data/http_cache':
+    credentials['http_cache_dir'] = str(Path(__file__).parent.absolute() / 'data/http_cache')
+  if credentials.get('version_cache_file') == 'data/version_cache.json':
+    credentials['version_cache_file'] = str(Path(__file__).parent.absolute() / 'data/version_cache.json')
+  if credentials.get('snapshot_dir') == 'data/snapshots':
+    credentials['snapshot_dir'] = str(Path(__file__).parent.absolute() / 'data/snapshots')
+  if args.no_catalog:
+    credentials['catalog_db'] = ''
+  elif credentials.get('catalog_db') == 'data/catalog.sqlite3':
+    credentials['catalog_db'] = str(Path(__file__).parent.absolute() / 'data/catalog.sqlite3')
 
   output_dir = Path(credentials["raw_data_dir"])
   output_dir.mkdir(parents=True, exist_ok=True)
   output_file = output_dir / f"repo-{org_name}.json"
-  print(f"\nWriting {len(sanitized_data)} processed repository records to {output_file}...")
-  with open(output_file, 'w') as f:
-    json.dump(sanitized_data, f, indent=2)
-  print(f"Data saved to {output_file}")
+  store = SnapshotStore(credentials['snapshot_dir']) if credentials.get('snapshot_dir') else None
+  if args.from_snapshot and (not store or not store.manifest_path(output_file.stem).exists()):
+    print(f"Exiting: no snapshot of '{org_name}' found in {credentials.get('snapshot_dir') or 'SNAPSHOT_DIR'}.", flush=True)
+    sys.exit(1)
+  return credentials, output_file, store
+
+def scan_org(credentials, org_name, args, output_file, store, version_resolver):
+  """Scans one organization into repo-{org}.json."""
+  if args.from_snapshot:
+    checkpoint = Checkpoint(output_file.with_suffix('.ndjson'))
+    print(f"Re-running the sanitizer rules over {store.manifest_path(output_file.stem)} with {args.workers} processes...", flush=True)
+    try:
+      rebuild_from_snapshot(store, output_file.stem, checkpoint, args.workers)
+    finally:
+      checkpoint.close()
+  else:
+    previous = PreviousScan.load(output_file) if args.incremental else PreviousScan()
+    # Raw inputs of every repository are kept so the rules can later be re-run offline.
+    recorder = store.writer(output_file.stem, resume=args.resume) if store and not args.no_snapshot else None
+    # Records are streamed to the checkpoint as they complete, so a crash loses nothing.
+    checkpoint = Checkpoint(output_file.with_suffix('.ndjson'), resume=args.resume)
+
+    try:
+      if args.graphql:
+        process_with_graphql(credentials, org_name, args, previous, checkpoint, version_resolver, recorder)
+      elif args.engine == 'async':
+        process_with_async(credentials, org_name, args, previous, checkpoint, version_resolver, recorder)
+      else:
+        process_with_rest(credentials, args, previous, checkpoint, version_resolver, recorder)
+    finally:
+      checkpoint.close()
+      if recorder:
+        recorder.close()
+    if recorder:
+      recorder.commit()
+
+  print(f"\nWriting processed repository records from {checkpoint.path} to {output_file}...")
+  record_count = checkpoint.write_json(output_file)
+  print(f"Saved {record_count} records to {output_file}")
+  if credentials.get('catalog_db'):
+    sync_catalog(credentials['catalog_db'], output_file)
+
+def run_catalog(args):
+  """--catalog-import / --catalog-export: loads the raw files into the catalog and/or exports from it."""
+  root = Path(__file__).parent.absolute()
+  catalog_db = os.environ.get('CATALOG_DB', 'data/catalog.sqlite3')
+  if catalog_db == 'data/catalog.sqlite3':
+    catalog_db = str(root / 'data/catalog.sqlite3')
+  if args.catalog_import:
+    raw_data_dir = os.environ.get('RAW_DATA_DIR', 'data/raw')
+    if raw_data_dir == 'data/raw':
+      raw_data_dir = str(root / 'data/raw')
+    for raw_file in sorted(Path(raw_data_dir).glob('repo-*.json')):
+      sync_catalog(catalog_db, raw_file)
+  if args.catalog_export:
+    output_dir = Path(args.output or root / 'data')
+    catalog = CatalogStore(catalog_db)
+    try:
+      count = catalog.export_code_json(output_dir / 'code.json', indent=not args.compact_json)
+      print(f"Exported {count} projects to {output_dir / 'code.json'}")
+      count = catalog.export_mapping_csv(output_dir / 'privateid_mapping.csv')
+      print(f"Added {count} new private IDs to {output_dir / 'privateid_mapping.csv'}")
+      count = catalog.export_exemption_log(output_dir / 'exempted_log.csv')
+      print(f"Added {count} new exemptions to {output_dir / 'exempted_log.csv'}")
+    finally:
+      catalog.close()
+
+###############################################################
+## The intention is to provide a simple interface to update
+## us with existing repositories in a Github organization, and
+## then sanitize the data to a common format such as code.json
+## to provide the user with all of the known repositories.
+###############################################################
+def main():
+  parser = argparse.ArgumentParser(description='Process GitHub organizations')
+  parser.add_argument('--output', help='Output directory path (for --combine, where code.json is written; default data/)')
+  parser.add_argument('--combine', action='store_true', help='Merge the raw repo-*.json files (RAW_DATA_DIR) into one deduplicated code.json, without scanning')
+  parser.add_argument('--browser-output', help='With --combine, also write the metadata browser files (table.json, detail shards and their compressed variants) to this directory')
+  parser.add_argument('--compact-json', action='store_true', help='With --combine or --catalog-export, write code.json without indentation')
+  parser.add_argument('--generate-csv', action='store_true', help='Add the private IDs in the raw repo-*.json files (RAW_DATA_DIR) that are not mapped yet to privateid_mapping.csv in --output (default data/), without scanning')
+  parser.add_argument('--catalog-import', action='store_true', help='Upsert every raw repo-*.json file (RAW_DATA_DIR) into the SQLite catalog (CATALOG_DB), without scanning')
+  parser.add_argument('--catalog-export', action='store_true', help='Write code.json from the SQLite catalog (CATALOG_DB) to --output (default data/) and add its new private IDs and exemptions to privateid_mapping.csv and exempted_log.csv there')
+  parser.add_argument('--no-catalog', action='store_true', help='Do not upsert the scanned records into the SQLite catalog (CATALOG_DB)')
+  parser.add_argument('--org', help='The GitHub organization to scan (overrides GH_ORG in .env)')
+  parser.add_argument('--orgs', help='Comma-separated GitHub organizations to scan concurrently, one repo-{org}.json each (overrides GH_ORGS in .env)')
+  parser.add_argument('--limit', type=int, help='Limit the number of repositories to process for testing')
+  parser.add_argument('--workers', type=int, default=10, help='Number of parallel workers to process repositories, per organization')
+  parser.add_argument('--engine', choices=['threads', 'async'], default='threads', help='threads: PyGithub on a thread pool; async: aiohttp with concurrent per-repository fetches')
+  parser.add_argument('--max-in-flight', type=int, default=200, help='Maximum concurrent HTTP requests for --engine async')
+  parser.add_argument('--graphql', action='store_true', help='Fetch repository data in GraphQL batches instead of per-repository REST calls')
+  parser.add_argument('--incremental', action='store_true', help='Carry forward records from the previous repo-{org}.json for repositories that have not changed')
+  parser.add_argument('--no-http-cache', action='store_true', help='Disable the on-disk conditional-request cache (HTTP_CACHE_DIR)')
+  parser.add_argument('--graphql-batch-size', type=int, default=50, help='Repositories per GraphQL query (max 100)')
+  parser.add_argument('--no-snapshot', action='store_true', help='Do not record raw repository inputs in the snapshot store (SNAPSHOT_DIR)')
+  parser.add_argument('--from-snapshot', action='store_true', help='Re-run the sanitizer rules over the last recorded snapshot of the organization, without any API calls')
+  parser.add_argument('--resume', action='store_true', help='Continue an interrupted scan from its checkpoint, skipping repositories already processed')
+  args = parser.parse_args()
+
+  now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+  print(f"Process starting: {now}", flush=True)
+
+  if args.combine:
+    raw_data_dir = os.environ.get('RAW_DATA_DIR', 'data/raw')
+    if raw_data_dir == 'data/raw':
+      raw_data_dir = str(Path(__file__).parent.absolute() / 'data/raw')
+    output_dir = args.output or str(Path(__file__).parent.absolute() / 'data')
+    # With several raw files and CPUs, the index pass parses them on up to --workers processes.
+    code_json = Combine().combine_json_files(raw_data_dir, output_dir, indent=not args.compact_json, workers=args.workers)
+    if not code_json:
+      sys.exit(1)
+    if args.browser_output:
+      rows, shards = BrowserArtifacts(args.browser_output).write(code_json)
+      print(f"Wrote the browser table ({rows} rows) and {shards} detail shards to {args.browser_output}")
+    now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    print(f"Completed processing at {now}")
+    return
+
+  if args.generate_csv:
+    raw_data_dir = os.environ.get('RAW_DATA_DIR', 'data/raw')
+    if raw_data_dir == 'data/raw':
+      raw_data_dir = str(Path(__file__).parent.absolute() / 'data/raw')
+    csv_path = Path(args.output or Path(__file__).parent.absolute() / 'data') / 'privateid_mapping.csv'
+    added = PrivateIdMapping(csv_path).update(raw_data_dir)
+    print(f"Added {added} new private IDs to {csv_path}")
+    now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    print(f"Completed processing at {now}")
+    return
+
+  if args.catalog_import or args.catalog_export:
+    run_catalog(args)
+    now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    print(f"Completed processing at {now}")
+    return
+
+  config = Config()
+  # Determine the target organizations from the flags or the .env file
+  org_names = parse_orgs(args)
+  if not org_names:
+    print("Exiting: No GitHub organization specified. Use the --org/--orgs flags or set GH_ORG/GH_ORGS in your .env file.", flush=True)
+    sys.exit(1)
+
+  # Every organization is validated before any scan starts.
+  targets = [(org_name, *prepare_org(config, args, org_name)) for org_name in org_names]
+  first_credentials = targets[0][1]
+  # Every organization's workers send through the one shared GitHub connection pool.
+  for _, credentials, _, _ in targets:
+    credentials['http_pool_size'] = args.workers * len(targets)
+  print(f'Raw data directory: {first_credentials["raw_data_dir"]}', flush=True)
+
+  # One resolver for all organizations, so their version cache entries land in one file.
+  version_resolver = None if args.from_snapshot else VersionResolver(first_credentials.get('version_cache_file'))
+  failed = []
+  try:
+    if args.from_snapshot or len(targets) == 1:
+      # Offline rebuilds are CPU-bound and already use a process pool, so run them in turn.
+      for org_name, credentials, output_file, store in targets:
+        scan_org(credentials, org_name, args, output_file, store, version_resolver)
+    else:
+      # Organizations share one connection pool and HTTP cache. Each draws on its own
+      # quota's scheduler, so orgs with separate App installations proceed side by side
+      # while orgs sharing a token share its pacing.
+      print(f"Scanning {len(targets)} organizations concurrently...", flush=True)
+      with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = {
+          executor.submit(scan_org, credentials, org_name, args, output_file, store, version_resolver): org_name
+          for org_name, credentials, output_file, store in targets
+        }
+        for future in as_completed(futures):
+          try:
+            future.result()
+          except Exception as exc:
+            print(f"Scan of {futures[future]} failed: {exc}", flush=True)
+            failed.append(futures[future])
+  finally:
+    if version_resolver:
+      version_resolver.save()
+  if not args.from_snapshot:
+    if first_credentials.get('http_cache_dir'):
+      print(HttpCache.open(first_credentials['http_cache_dir']).summary())
+    # The async engine sends through its own aiohttp connector instead.
+    if args.graphql or args.engine != 'async':
+      print(ApiAdapter.shared('github').summary())
+    for quota_name in dict.fromkeys(Repository.quota_name(credentials) for _, credentials, _, _ in targets):
+      print(RateLimitScheduler.for_github(quota_name).summary())
+    print(version_resolver.summary())
 
   now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
   print(f"Completed processing at {now}")
+  if failed:
+    sys.exit(1)
 
 if __name__ == "__main__":
   main()
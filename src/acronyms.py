@@ -0,0 +1,57 @@
+import re
+
+class AcronymMatcher:
+  """
+  Finds organization acronyms in repository topics, README text and name/URL, built once
+  from the ORG_ACRONYMS config.
+
+  Each lookup returns the acronym that comes first in ORG_ACRONYMS among all that match,
+  so the config order stays the priority order (and 'cdc', listed last, only wins when
+  nothing more specific matches). The README is scanned once with a single alternation
+  of every acronym between word boundaries, whatever the number of acronyms.
+  """
+
+  def __init__(self, org_acronyms):
+    # Lowercased acronym -> (priority, acronym as configured); the first spelling wins.
+    self._by_lower = {}
+    for priority, acronym in enumerate(org_acronyms):
+      self._by_lower.setdefault(acronym.lower(), (priority, acronym))
+    self._ordered = sorted(self._by_lower.values())
+    # Longest first so no acronym is shadowed by one of its prefixes.
+    alternatives = sorted(self._by_lower, key=len, reverse=True)
+    self._word_regex = re.compile(r'\b(?:' + '|'.join(map(re.escape, alternatives)) + r')\b') if alternatives else None
+    self._name_needles = [
+      (acronym, (f"{lower}-", f"-{lower}", f"/{lower}/"), f"/{lower}")
+      for lower, (_, acronym) in sorted(self._by_lower.items(), key=lambda item: item[1][0])
+    ]
+
+  def __bool__(self):
+    return bool(self._by_lower)
+
+  def match_tags(self, tags):
+    """Acronym that is exactly one of the tags (case-insensitive)."""
+    tags_lower = {tag.lower() for tag in tags}
+    for _, acronym in self._ordered:
+      if acronym.lower() in tags_lower:
+        return acronym
+    return None
+
+  def match_text(self, text):
+    """Acronym appearing as a whole word anywhere in text, in one pass."""
+    if not text or self._word_regex is None:
+      return None
+    best = None
+    for match in self._word_regex.finditer(text.lower()):
+      found = self._by_lower[match.group(0)]
+      if best is None or found < best:
+        best = found
+        if best[0] == 0:
+          break
+    return best[1] if best else None
+
+  def match_name(self, search_string):
+    """Acronym in a lowercased name/URL string as 'acronym-', '-acronym', '/acronym/' or a trailing '/acronym'."""
+    for acronym, needles, suffix in self._name_needles:
+      if any(needle in search_string for needle in needles) or search_string.endswith(suffix):
+        return acronym
+    return None
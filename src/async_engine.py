@@ -0,0 +1,279 @@
+import asyncio
+import base64
+import json
+
+import aiohttp
+
+from src.repo_files import README_PATHS, GITHUB_CODEOWNERS_PATHS, GITHUB_FILES_QUERY, github_files
+from src.sanitize import Sanitizer
+from src.snapshot import License, RepoSnapshot
+
+class AsyncScanner:
+  """
+  Scans a GitHub organization with aiohttp instead of blocking PyGithub calls.
+
+  Every repository's README, CODEOWNERS, languages and tags requests are issued
+  concurrently, and all requests across all repositories share one semaphore, so the
+  number of requests in flight (not the number of threads) bounds the scan. An
+  optional RateLimitScheduler paces those requests against the GitHub quota. The
+  fetched data is packed into a RepoSnapshot and run through the same Sanitizer rules
+  as the threaded engine, with README, CODEOWNERS and the version resolved the same way
+  (src/repo_files.py, VersionResolver.github_steps).
+  """
+  API_URL = 'https://api.github.com'
+  ACCEPT = 'application/vnd.github+json'
+  MAX_ATTEMPTS = 3
+
+  def __init__(self, token, max_in_flight=200, api_url=API_URL, scheduler=None, max_pending=None, version_resolver=None):
+    self.token = token
+    self.scheduler = scheduler
+    self.max_in_flight = max_in_flight
+    # Each repository issues a handful of requests, so this many keeps the semaphore busy.
+    self.max_pending = max(1, max_pending or max_in_flight)
+    self.api_url = api_url.rstrip('/')
+    self.sanitizer = Sanitizer(version_resolver=version_resolver)
+    self.total_count = None
+    self._semaphore = None
+
+  async def _acquire(self):
+    """Waits for a slot from the rate-limit scheduler without blocking the event loop."""
+    if self.scheduler is None:
+      return
+    while True:
+      wait = self.scheduler.try_acquire()
+      if wait <= 0:
+        return
+      await asyncio.sleep(min(wait, self.scheduler.MAX_SLEEP))
+
+  async def _request(self, session, url, params=None, json_body=None):
+    """
+    Returns (status, headers, parsed JSON or None) for one GET, or POST of json_body,
+    under the shared semaphore.
+    """
+    attempt = 1
+    while True:
+      await self._acquire()
+      try:
+        async with self._semaphore:
+          send = session.get(url, params=params) if json_body is None else session.post(url, json=json_body)
+          async with send as response:
+            status, headers = response.status, response.headers
+            body = await response.text()
+            request_info, history = response.request_info, response.history
+      except BaseException as exc:
+        # No response reached release(), so the slot is freed on every failure, including
+        # timeouts, payload errors and cancellation; only connection errors are retried.
+        if self.scheduler is not None:
+          self.scheduler.abort()
+        if not isinstance(exc, aiohttp.ClientConnectionError) or attempt == self.MAX_ATTEMPTS:
+          raise
+        attempt += 1
+        await asyncio.sleep(attempt)
+        continue
+
+      # Rate-limit rejections wait out the scheduler's global pause and are resent.
+      if self.scheduler is not None and self.scheduler.release(status, headers, body):
+        continue
+      if status == 404:
+        return 404, headers, None
+      if status >= 500 and attempt < self.MAX_ATTEMPTS:
+        # Server errors are retried with a short backoff.
+        attempt += 1
+        await asyncio.sleep(attempt)
+        continue
+      if status >= 400:
+        raise aiohttp.ClientResponseError(request_info, history, status=status, message=body[:200])
+      return status, headers, json.loads(body) if body else None
+
+  async def _get_json(self, session, url):
+    _, _, data = await self._request(session, url)
+    return data
+
+  @staticmethod
+  def _next_link(headers):
+    for link in headers.get('Link', '').split(','):
+      parts = link.split(';')
+      if len(parts) == 2 and parts[1].strip() == 'rel="next"':
+        return parts[0].strip()[1:-1]
+    return None
+
+  async def _get_decoded(self, session, url, full_name, label):
+    """Decoded text of a contents-style response, or None if absent or on error."""
+    try:
+      status, _, data = await self._request(session, url)
+      if status == 404 or not isinstance(data, dict) or 'content' not in data:
+        return None
+      return base64.b64decode(data['content']).decode('utf-8', errors='ignore')
+    except Exception as e:
+      print(f"Error fetching {label} for {full_name}: {e}")
+      return None
+
+  async def _get_file_content(self, session, full_name, file_path):
+    """Same contract as Sanitizer._get_file_content."""
+    return await self._get_decoded(session, f"{self.api_url}/repos/{full_name}/contents/{file_path}", full_name, f"'{file_path}'")
+
+  async def _first_file_content(self, session, full_name, candidates):
+    """Same contract as Sanitizer._first_file_content."""
+    for path in candidates:
+      content = await self._get_file_content(session, full_name, path)
+      if content:
+        return content
+    return None
+
+  async def _get_files(self, session, full_name):
+    """
+    Same contract as Sanitizer._get_files: README and CODEOWNERS in one GraphQL query,
+    re-downloaded on every scan for the reasons given there.
+    """
+    owner, _, name = full_name.partition('/')
+    body = {'query': GITHUB_FILES_QUERY, 'variables': {'owner': owner, 'name': name}}
+    try:
+      _, _, data = await self._request(session, f"{self.api_url}/graphql", json_body=body)
+      return github_files(data['data']['repository'] or {})
+    except Exception as e:
+      print(f"Error looking up README and CODEOWNERS for {full_name}, falling back to REST: {e}")
+      return (
+        await self._first_file_content(session, full_name, README_PATHS),
+        await self._first_file_content(session, full_name, GITHUB_CODEOWNERS_PATHS),
+      )
+
+  async def _resolve_version(self, session, snapshot):
+    """
+    (latest version, tag names read) through the same VersionResolver.github_steps as
+    the threaded engine, so only the tag pages they need are requested.
+    """
+    repo_url = f"{self.api_url}/repos/{snapshot.full_name}"
+    steps = self.sanitizer.version_resolver.github_steps(snapshot.html_url, snapshot.pushed_at.isoformat() if snapshot.pushed_at else '')
+    page_number = next(steps)
+    while True:
+      _, headers, page = await self._request(session, f"{repo_url}/tags", {'per_page': 100, 'page': page_number + 1})
+      answer = [(tag['name'], (tag.get('commit') or {}).get('sha')) for tag in page or []], self._next_link(headers) is not None
+      try:
+        page_number = steps.send(answer)
+      except StopIteration as done:
+        return done.value
+
+  @staticmethod
+  def snapshot_from_rest(payload):
+    """Maps a repository object from the REST listing onto a RepoSnapshot."""
+    license_info = payload.get('license')
+    return RepoSnapshot(
+      id=payload['id'],
+      name=payload['name'],
+      full_name=payload['full_name'],
+      html_url=payload['html_url'],
+      description=payload.get('description'),
+      homepage=payload.get('homepage'),
+      private=payload['private'],
+      archived=payload['archived'],
+      fork=payload['fork'],
+      size=payload['size'],
+      created_at=RepoSnapshot.parse_timestamp(payload.get('created_at')),
+      pushed_at=RepoSnapshot.parse_timestamp(payload.get('pushed_at')),
+      license=License(license_info['name']) if license_info else None,
+      topics=payload.get('topics') or [],
+    )
+
+  async def _process(self, session, snapshot, previous):
+    previous_record = previous.match_github(snapshot) if previous else None
+    if previous_record:
+      if self.sanitizer.snapshot_recorder:
+        self.sanitizer.snapshot_recorder.carry_forward(snapshot.id)
+      return previous_record
+    # Forks and empty repositories are skipped by the rules before any content is needed.
+    if snapshot.fork or snapshot.size == 0:
+      return self.sanitizer.get_snapshot_metadata(snapshot)
+
+    try:
+      (snapshot.readme, snapshot.codeowners), languages, (_, tag_names) = await asyncio.gather(
+        self._get_files(session, snapshot.full_name),
+        self._get_json(session, f"{self.api_url}/repos/{snapshot.full_name}/languages"),
+        self._resolve_version(session, snapshot),
+      )
+    except Exception as e:
+      print(f"Failed processing repository {snapshot.full_name}: {e}")
+      return None
+    snapshot.languages = list((languages or {}).keys())
+    snapshot.tag_names = tag_names
+    return self.sanitizer.get_snapshot_metadata(snapshot)
+
+  async def _checkpointed(self, session, snapshot, previous, checkpoint):
+    data = await self._process(session, snapshot, previous)
+    if data:
+      checkpoint.append(snapshot.id, data)
+
+  async def _list_repos(self, session, org_name, limit):
+    """Yields the organization's repositories as snapshots, one listing page at a time."""
+    listed = 0
+    url = f"{self.api_url}/orgs/{org_name}/repos"
+    params = {'type': 'all', 'per_page': 100}
+    while url and not (limit and listed >= limit):
+      _, response_headers, page = await self._request(session, url, params)
+      for payload in page or []:
+        if limit and listed >= limit:
+          return
+        listed += 1
+        yield self.snapshot_from_rest(payload)
+      url = self._next_link(response_headers)
+      params = None  # The next link already carries the query string.
+
+  async def scan(self, org_name, limit=None, previous=None, checkpoint=None):
+    """
+    Lists the organization and sanitizes its repositories. Records are returned in listing
+    order, or, with a checkpoint, appended to it as each one completes (and ids it already
+    holds are skipped).
+
+    Like SubmissionWindow for the threaded engine, at most max_pending repositories are
+    being processed at a time: the next listing page is only requested when slots free
+    up, and a repository's snapshot and task are dropped as soon as it finishes (and, with
+    a checkpoint, its record is written).
+    """
+    self._semaphore = asyncio.Semaphore(self.max_in_flight)
+    headers = {
+      'Authorization': f"Bearer {self.token}",
+      'Accept': self.ACCEPT,
+      'X-GitHub-Api-Version': '2022-11-28',
+    }
+    connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+      snapshots = self._list_repos(session, org_name, limit)
+      pending = {}
+      results = []
+      submitted = 0
+      processed_count = 0
+      exhausted = False
+      try:
+        while pending or not exhausted:
+          while not exhausted and len(pending) < self.max_pending:
+            snapshot = await anext(snapshots, None)
+            if snapshot is None:
+              exhausted = True
+              self.total_count = submitted
+            elif checkpoint is not None and snapshot.id in checkpoint:
+              continue
+            else:
+              if checkpoint is None:
+                task = self._process(session, snapshot, previous)
+              else:
+                task = self._checkpointed(session, snapshot, previous, checkpoint)
+              pending[asyncio.create_task(task)] = (submitted, snapshot.full_name)
+              submitted += 1
+          if not pending:
+            break
+          done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+          for task in done:
+            index, full_name = pending.pop(task)
+            data = task.result()
+            if data:
+              results.append((index, data))
+            processed_count += 1
+            print(f"[{processed_count}/{self.total_count or submitted}] Successfully processed: {full_name}")
+      finally:
+        for task in pending:
+          task.cancel()
+        await snapshots.aclose()
+      results.sort(key=lambda item: item[0])
+      return [data for _, data in results]
+
+  def run(self, org_name, limit=None, previous=None, checkpoint=None):
+    return asyncio.run(self.scan(org_name, limit, previous, checkpoint))
@@ -0,0 +1,131 @@
+# Files for the metadata browser (docs/index.html), written from code.json at combine time.
+#
+# table.json holds only the columns the table shows, already derived, as
+#   {"columns": [...], "shardSize": N, "total": T, "rows": [[...], ...]}
+# and details/<n>.json holds the full records of rows n*N to (n+1)*N - 1, fetched when
+# a Details button is clicked. Every file also gets a gzip variant and, when the brotli
+# package is installed, a brotli one, for servers that serve precompressed files.
+import gzip
+import os
+import shutil
+from pathlib import Path
+
+from src import jsonio
+from src.combine import Combine
+
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+TABLE_COLUMNS = ['Repository Name', 'Organization', 'Platform', 'Public', 'Contact Email', 'Exemption', 'Repository URL', 'Status']
+# Usage types that are not exemptions.
+RELEASABLE_USAGE_TYPES = ('governmentWideReuse', 'openSource')
+
+def table_row(record):
+  """The table columns of one record, derived the way the browser did client-side."""
+  permissions = record.get('permissions') or {}
+  usage_type = permissions.get('usageType') or ''
+  repository_url = record.get('repositoryURL') or ''
+  contact = record.get('contact')
+  is_public = usage_type == 'openSource' or (repository_url and 'ShareIT-Act/assets/' not in repository_url)
+  return [
+    record.get('name', 'N/A'),
+    record.get('organization', record.get('agency', 'N/A')),
+    Combine.record_platform(record),
+    'Y' if is_public else 'N',
+    contact.get('email', 'N/A') if isinstance(contact, dict) else contact or 'N/A',
+    usage_type if usage_type not in RELEASABLE_USAGE_TYPES else '',
+    repository_url,
+    record.get('status', 'N/A'),
+  ]
+
+class BrowserArtifacts:
+  """
+  Writes table.json and the detail shards for the metadata browser into output_dir.
+  code.json is streamed once; only the current shard of full records is held, and the
+  table is written row by row. Every file is replaced atomically, and shards left over
+  from a larger catalog are removed.
+  """
+  SHARD_SIZE = 200
+
+  def __init__(self, output_dir, shard_size=SHARD_SIZE):
+    self.output_dir = Path(output_dir)
+    self.details_dir = self.output_dir / 'details'
+    self.shard_size = shard_size
+
+  @staticmethod
+  def _compress(path):
+    """Writes path.gz (with a fixed timestamp, so unchanged files compress identically) and path.br."""
+    variants = [('.gz', lambda f: gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0))]
+    if brotli:
+      variants.append(('.br', _BrotliWriter))
+    for suffix, open_compressed in variants:
+      target = path.with_name(path.name + suffix)
+      tmp_path = target.with_name(target.name + '.tmp')
+      with open(path, 'rb') as src, open(tmp_path, 'wb') as raw, open_compressed(raw) as out:
+        shutil.copyfileobj(src, out)
+      os.replace(tmp_path, target)
+
+  def _write(self, path, chunks):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+      for chunk in chunks:
+        f.write(chunk)
+    os.replace(tmp_path, path)
+    self._compress(path)
+
+  def _write_shard(self, number, records):
+    self._write(self.details_dir / f"{number}.json", [jsonio.dumps(records)])
+
+  def _table_chunks(self, rows, total):
+    yield jsonio.dumps({'columns': TABLE_COLUMNS, 'shardSize': self.shard_size})[:-1] + ',"rows":['
+    for count, row in enumerate(rows):
+      yield (',' if count else '') + jsonio.dumps(row)
+    yield f'],"total":{total[0]}}}'
+
+  def write(self, code_json):
+    """Writes the artifacts for code_json. Returns (rows, shards)."""
+    self.details_dir.mkdir(parents=True, exist_ok=True)
+    total = [0]
+    shards = [0]
+
+    def rows():
+      shard = []
+      for record in jsonio.iter_projects(code_json):
+        if not isinstance(record, dict):
+          continue
+        shard.append(record)
+        total[0] += 1
+        yield table_row(record)
+        if len(shard) == self.shard_size:
+          self._write_shard(shards[0], shard)
+          shards[0] += 1
+          shard = []
+      if shard:
+        self._write_shard(shards[0], shard)
+        shards[0] += 1
+
+    self._write(self.output_dir / 'table.json', self._table_chunks(rows(), total))
+    for path in self.details_dir.iterdir():
+      number = path.name.split('.')[0]
+      if not number.isdigit() or int(number) >= shards[0]:
+        path.unlink()
+    return total[0], shards[0]
+
+class _BrotliWriter:
+  """A write-only file object that brotli-compresses into fileobj."""
+
+  def __init__(self, fileobj):
+    self.fileobj = fileobj
+    self.compressor = brotli.Compressor(quality=11)
+
+  def write(self, data):
+    self.fileobj.write(self.compressor.process(data))
+    return len(data)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.fileobj.write(self.compressor.finish())
@@ -0,0 +1,247 @@
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src import jsonio
+from src.combine import Combine
+from src.mapping import MAPPING_COLUMNS, append_rows, known_keys, mapping_row
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+  key TEXT PRIMARY KEY,
+  private_id TEXT,
+  repository_url TEXT,
+  name TEXT,
+  organization TEXT,
+  usage_type TEXT,
+  platform TEXT,
+  updated TEXT,
+  source TEXT NOT NULL,
+  synced TEXT NOT NULL,
+  first_seen TEXT NOT NULL,
+  exempted_at TEXT,
+  record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_private_id ON projects (private_id);
+CREATE INDEX IF NOT EXISTS projects_organization ON projects (organization);
+CREATE INDEX IF NOT EXISTS projects_usage_type ON projects (usage_type);
+CREATE INDEX IF NOT EXISTS projects_platform ON projects (platform);
+CREATE INDEX IF NOT EXISTS projects_source ON projects (source, synced);
+"""
+
+# A newer scan replaces a row, except for when the project was first seen and, while it
+# stays under the same exemption, when that exemption was first logged.
+UPSERT = """
+INSERT INTO projects (key, private_id, repository_url, name, organization, usage_type, platform,
+                      updated, source, synced, first_seen, exempted_at, record)
+VALUES (:key, :private_id, :repository_url, :name, :organization, :usage_type, :platform,
+        :updated, :source, :synced, :now, CASE WHEN :usage_type LIKE 'exempt%' THEN :now END, :record)
+ON CONFLICT (key) DO UPDATE SET
+  private_id = excluded.private_id,
+  repository_url = excluded.repository_url,
+  name = excluded.name,
+  organization = excluded.organization,
+  platform = excluded.platform,
+  updated = excluded.updated,
+  source = excluded.source,
+  synced = excluded.synced,
+  record = excluded.record,
+  exempted_at = CASE
+    WHEN excluded.usage_type NOT LIKE 'exempt%' THEN NULL
+    WHEN projects.usage_type IS excluded.usage_type THEN projects.exempted_at
+    ELSE excluded.exempted_at
+  END,
+  usage_type = excluded.usage_type
+WHERE excluded.updated >= projects.updated OR projects.source = excluded.source
+"""
+
+EXEMPTION_COLUMNS = ['privateID', 'repositoryName', 'usageType', 'exemptionText', 'timestamp']
+
+class CatalogStore:
+  """
+  Local SQLite catalog of every sanitized record, the system of record for the files
+  published from it.
+
+  Each scan syncs its repo-*.json into the catalog (sync_file), upserting records by the
+  same key Combine deduplicates on (privateID, private_id or repositoryURL) and dropping
+  the rows of that source the scan no longer lists. privateID, organization, usageType
+  and platform are indexed columns, so lookups and the exports (code.json, the private ID
+  mapping CSV and the exemption log) are streaming, indexed queries instead of reparses
+  of every raw file.
+  """
+  BATCH_SIZE = 500
+
+  def __init__(self, path):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    # Several scans (orgs, instances) may sync into the catalog at the same time.
+    self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+    self.connection.execute('PRAGMA journal_mode=WAL')
+    self.connection.executescript(SCHEMA)
+
+  def close(self):
+    self.connection.close()
+
+  @classmethod
+  def row(cls, record, source, synced, now):
+    """Column values for one record; records without a key are keyed by source and name."""
+    private_id = record.get('privateID') or record.get('private_id')
+    repository_url = record.get('repositoryURL')
+    date = record.get('date') or {}
+    permissions = record.get('permissions') or {}
+    return {
+      'key': Combine.record_key(record) or f"{source}:{record.get('name')}",
+      'private_id': private_id,
+      'repository_url': repository_url,
+      'name': record.get('name'),
+      'organization': record.get('organization'),
+      'usage_type': permissions.get('usageType'),
+      'platform': Combine.record_platform(record),
+      'updated': date.get('metadataLastUpdated') or date.get('lastModified') or '',
+      'source': source,
+      'synced': synced,
+      'now': now,
+      'record': jsonio.dumps(record),
+    }
+
+  def upsert(self, records, source):
+    """Upserts records (an iterable) from source, in batches. Returns the sync token."""
+    synced = uuid.uuid4().hex
+    now = datetime.now(timezone.utc).isoformat()
+    batch = []
+    with self.connection:
+      for record in records:
+        batch.append(self.row(record, source, synced, now))
+        if len(batch) >= self.BATCH_SIZE:
+          self.connection.executemany(UPSERT, batch)
+          batch = []
+      if batch:
+        self.connection.executemany(UPSERT, batch)
+    return synced
+
+  def sync_file(self, path):
+    """
+    Upserts a scan's output file, streamed record by record, and removes the rows from
+    the same file that the scan no longer contains. Returns (rows upserted, rows removed).
+    """
+    path = Path(path)
+    source = path.stem
+    count = 0
+
+    def records():
+      nonlocal count
+      for record in jsonio.iter_array(path):
+        if isinstance(record, dict):
+          count += 1
+          yield record
+
+    synced = self.upsert(records(), source)
+    with self.connection:
+      removed = self.connection.execute(
+        'DELETE FROM projects WHERE source = ? AND synced != ?', (source, synced)
+      ).rowcount
+    return count, removed
+
+  def get(self, private_id):
+    """The record with this private ID, or None."""
+    row = self.connection.execute('SELECT record FROM projects WHERE private_id = ?', (private_id,)).fetchone()
+    return jsonio.loads(row[0]) if row else None
+
+  def count_by(self, column):
+    """{value: project count} for one of the indexed columns."""
+    if column not in ('organization', 'usage_type', 'platform'):
+      raise ValueError(f"Not an indexed column: {column}")
+    return dict(self.connection.execute(f'SELECT {column}, COUNT(*) FROM projects GROUP BY {column}'))
+
+  def __len__(self):
+    return self.connection.execute('SELECT COUNT(*) FROM projects').fetchone()[0]
+
+  def _stream(self, query, parameters=()):
+    with closing(self.connection.cursor()) as cursor:
+      cursor.execute(query, parameters)
+      while True:
+        rows = cursor.fetchmany(self.BATCH_SIZE)
+        if not rows:
+          return
+        yield from rows
+
+  @staticmethod
+  def _replace(path, write):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+      count = write(f)
+    os.replace(tmp_path, path)
+    return count
+
+  def export_code_json(self, path, indent=True):
+    """Writes code.json, one record at a time, in key order. Returns the project count."""
+    head, tail = jsonio.dumps({
+      "version": "2.0",
+      "agency": "CDC",
+      "measurementType": {
+          "method": "projects"
+      },
+      "projects": []
+    }, indent).rsplit('[]', 1)
+    separator, opening, closing_bracket = (',\n    ', '[\n    ', '\n  ]') if indent else (',', '[', ']')
+
+    def write(f):
+      count = 0
+      f.write(head)
+      for (record,) in self._stream('SELECT record FROM projects ORDER BY key'):
+        text = jsonio.dumps(Combine.published(jsonio.loads(record)), indent)
+        f.write(separator if count else opening)
+        f.write(text.replace('\n', '\n    ') if indent else text)
+        count += 1
+      f.write(closing_bracket if count else '[]')
+      f.write(tail)
+      return count
+    return self._replace(path, write)
+
+  def export_mapping_csv(self, path):
+    """
+    Merges the private ID mapping (see src/mapping.py) into path: rows already in the
+    file are kept as they are, DateAdded included, and projects whose private ID is not
+    mapped yet are appended with DateAdded set to when the catalog first saw them.
+    Returns the number of rows added.
+    """
+    known = known_keys(path, ['PrivateID'])
+
+    def rows():
+      query = 'SELECT private_id, record, first_seen FROM projects WHERE private_id IS NOT NULL ORDER BY first_seen, key'
+      for private_id, record, first_seen in self._stream(query):
+        if private_id not in known:
+          yield mapping_row(private_id, jsonio.loads(record), first_seen)
+    return append_rows(path, MAPPING_COLUMNS, rows())
+
+  def export_exemption_log(self, path):
+    """
+    Merges the exempted projects into the exemption log at path: logged entries are kept
+    as they are, timestamps included, and a project is appended, with the time the
+    catalog first saw the exemption, when its privateID and usageType are not logged yet.
+    Returns the number of entries added.
+    """
+    known = known_keys(path, ['privateID', 'usageType'])
+
+    def rows():
+      query = "SELECT key, name, usage_type, record, exempted_at FROM projects WHERE usage_type LIKE 'exempt%' ORDER BY exempted_at, key"
+      for key, name, usage_type, record, exempted_at in self._stream(query):
+        if (key, usage_type) not in known:
+          exemption_text = (jsonio.loads(record).get('permissions') or {}).get('exemptionText', '')
+          yield [key, name, usage_type, exemption_text, exempted_at]
+    # The log has always been written with Unix line endings.
+    return append_rows(path, EXEMPTION_COLUMNS, rows(), lineterminator='\n')
+
+def sync_catalog(catalog_db, output_file):
+  """Syncs a scan's output file into the catalog at catalog_db and reports the result."""
+  catalog = CatalogStore(catalog_db)
+  try:
+    upserted, removed = catalog.sync_file(output_file)
+  finally:
+    catalog.close()
+  print(f"Synced {upserted} records from {Path(output_file).name} into {catalog_db} ({removed} no longer listed removed)", flush=True)
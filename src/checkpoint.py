@@ -0,0 +1,126 @@
+import os
+from pathlib import Path
+
+from src import jsonio
+from src.combine import Combine
+from src.content_hash import previous_stamps, stamp
+
+class Checkpoint:
+  """
+  Append-only NDJSON file that receives each sanitized record as soon as it is ready.
+
+  Every line is {"id": <repository id>, "record": <record>}. Only the ids are kept in
+  memory, and a resumed scan skips them; repositories that failed or were skipped by the
+  rules (forks, empty) have no line and are evaluated again. Once the scan finishes,
+  write_json() streams the lines into the usual repo-*.json array and removes the
+  checkpoint.
+  """
+
+  def __init__(self, path, resume=False):
+    self.path = Path(path)
+    self.done = set()
+    if resume:
+      self.done = self._load_ids()
+      if self.done:
+        print(f"Resuming from {self.path}: {len(self.done)} repositories already processed.", flush=True)
+      mode = 'a'
+    else:
+      mode = 'w'
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._file = open(self.path, mode, encoding='utf-8')
+    if resume and self._ends_mid_line():
+      # Start a fresh line after a record cut short by the crash.
+      self._file.write('\n')
+
+  def _ends_mid_line(self):
+    if not self.path.exists() or self.path.stat().st_size == 0:
+      return False
+    with open(self.path, 'rb') as f:
+      f.seek(-1, os.SEEK_END)
+      return f.read(1) != b'\n'
+
+  def _load_ids(self):
+    ids = set()
+    if not self.path.exists():
+      print(f"No checkpoint found at {self.path}; starting from the beginning.", flush=True)
+      return ids
+    with open(self.path, 'r', encoding='utf-8') as f:
+      for entry in self._entries(f):
+        ids.add(entry['id'])
+    return ids
+
+  @staticmethod
+  def _entries(f):
+    for line in f:
+      try:
+        yield jsonio.loads(line)
+      except ValueError:
+        # A line cut short by a crash mid-write; that repository is simply processed again.
+        continue
+
+  def __contains__(self, repo_id):
+    return repo_id in self.done
+
+  def __len__(self):
+    return len(self.done)
+
+  def append(self, repo_id, record):
+    self._file.write(jsonio.dumps({'id': repo_id, 'record': record}) + '\n')
+    self._file.flush()
+    self.done.add(repo_id)
+
+  def close(self):
+    if not self._file.closed:
+      self._file.close()
+
+  def _sorted_offsets(self):
+    """
+    Offsets of the checkpoint lines in output order: keyed records by privateID (else
+    repositoryURL), then unkeyed records in the order they were added. Only the keys
+    are kept in memory.
+    """
+    index = []
+    offset = 0
+    with open(self.path, 'rb') as f:
+      for line in f:
+        try:
+          record = jsonio.loads(line)['record']
+        except ValueError:
+          # A line cut short by a crash mid-write.
+          record = None
+        if record is not None:
+          key = Combine.record_key(record)
+          index.append((key is None, key or '', len(index), offset))
+        offset += len(line)
+    index.sort()
+    return [entry[-1] for entry in index]
+
+  def write_json(self, output_file):
+    """
+    Converts the checkpoint into a JSON array formatted like json.dump(records, f,
+    indent=2) (see src/jsonio.py), ordered by record key, then deletes the checkpoint.
+    Records are read back one at a time and stamped with their content hash; records
+    whose content matches the previous output file keep its metadataLastUpdated (see
+    src/content_hash.py). Returns the record count.
+    """
+    self.close()
+    output_file = Path(output_file)
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    stamps = previous_stamps(output_file)
+    count = 0
+    changed = 0
+    with open(self.path, 'rb') as src, open(tmp_file, 'w', encoding='utf-8') as out:
+      for offset in self._sorted_offsets():
+        src.seek(offset)
+        record = jsonio.loads(src.readline())['record']
+        changed += stamp(record, stamps)
+        out.write(',\n  ' if count else '[\n  ')
+        # Encoded strings never contain raw newlines, so every newline is structural.
+        out.write(jsonio.dumps(record, indent=True).replace('\n', '\n  '))
+        count += 1
+      out.write('\n]' if count else '[]')
+    os.replace(tmp_file, output_file)
+    self.path.unlink()
+    if stamps:
+      print(f"{changed} of {count} records are new or changed since the previous run", flush=True)
+    return count
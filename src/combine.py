@@ -1,56 +1,195 @@
-import json
-
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
+from src import jsonio
+
+def _records(file_path):
+  """The dict records of a raw file, in order; a file that fails to parse ends early."""
+  try:
+    for record in jsonio.iter_array(file_path):
+      if isinstance(record, dict):
+        yield record
+  except ValueError:
+    print(f"Error: {file_path.name} is not valid JSON, skipping the rest of it")
+  except Exception as e:
+    print(f"Error processing {file_path.name}: {e}")
+
+def _index_file(file_path):
+  """(key, updated, record number) of every keyed record in a raw file; runs in a worker."""
+  entries = []
+  for record_number, record in enumerate(_records(file_path)):
+    key = Combine.record_key(record)
+    if key is not None:
+      entries.append((key, Combine.record_updated(record), record_number))
+  return entries
+
 class Combine:
-  def combine_json_files(self, input_dir, output_dir=None):
+  """
+  Merges the raw repo-*.json files into code.json in two streaming passes.
+
+  The first pass builds an index of the newest record for each project, keyed by its
+  private id or else its repository URL, and compared on date.metadataLastUpdated.
+  Parsing dominates it, so with several files and several CPUs the files are parsed
+  on a process pool and their entries merged in file order. The second pass writes the winning records to code.json in batches of RENDER_BATCH,
+  so memory holds the index and one batch of records, not every record of every
+  platform. Serializing a batch in one call instead of one call per record keeps the
+  stdlib encoder's per-call overhead off the critical path.
+  """
+  RENDER_BATCH = 256
+
+  # Fields the raw files keep for internal outputs (the private ID mapping) that are not
+  # published in code.json.
+  UNPUBLISHED_FIELDS = ('privateRepositoryURL', 'platformDescription')
+
+  @classmethod
+  def published(cls, record):
+    """record without the UNPUBLISHED_FIELDS."""
+    if not any(field in record for field in cls.UNPUBLISHED_FIELDS):
+      return record
+    return {field: value for field, value in record.items() if field not in cls.UNPUBLISHED_FIELDS}
+
+  @staticmethod
+  def record_key(record):
+    """privateID (GitHub/GitLab), private_id (other platforms) or repositoryURL; None if none is set."""
+    return record.get('privateID') or record.get('private_id') or record.get('repositoryURL') or None
+
+  @staticmethod
+  def record_platform(record):
+    """
+    'GitHub', 'GitLab', 'ADO' or 'Unknown', as the metadata browser shows it: from the
+    platform field, else the private id, the repository URL or the README URL.
+    """
+    for field in ('platform', 'privateID', 'private_id', 'repositoryURL', 'readme_url'):
+      value = (record.get(field) or '')
+      value = value.lower() if isinstance(value, str) else ''
+      if 'github' in value:
+        return 'GitHub'
+      if 'gitlab' in value:
+        return 'GitLab'
+      if 'azure' in value or 'visualstudio' in value:
+        return 'ADO'
+    return 'Unknown'
+
+  @staticmethod
+  def record_updated(record):
+    date = record.get('date') or {}
+    value = date.get('metadataLastUpdated') or date.get('lastModified')
+    if not value:
+      return datetime.min.replace(tzinfo=timezone.utc)
+    try:
+      updated = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+      return datetime.min.replace(tzinfo=timezone.utc)
+    return updated if updated.tzinfo else updated.replace(tzinfo=timezone.utc)
+
+  @staticmethod
+  def _render(records, indent):
+    """
+    The records serialized for their place in the projects array and joined by the
+    array's separators, as json.dump lays them out.
+    """
+    text = jsonio.dumps(records, indent)
+    if not indent:
+      return text[1:-1]
+    # Encoded strings never contain raw newlines, so every newline is structural. Each
+    # one gains the projects array's indent, and the list's brackets are dropped.
+    return text.replace('\n', '\n  ')[len('[\n    '):-len('\n  ]')]
+
+  @staticmethod
+  def index_processes(workers, files):
+    """Processes for the index pass: 1 (no pool) unless there are several files and CPUs."""
+    return max(1, min(workers, files, os.cpu_count() or 1))
+
+  def _index_entries(self, json_files, workers):
+    """(file number, entries of _index_file) for each file, in file order."""
+    processes = self.index_processes(workers, len(json_files))
+    if processes == 1:
+      yield from enumerate(map(_index_file, json_files))
+      return
+    print(f"Indexing {len(json_files)} files on {processes} processes")
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+      yield from enumerate(executor.map(_index_file, json_files))
+
+  def combine_json_files(self, input_dir, output_dir=None, indent=True, workers=1):
+    """
+    Writes code.json from the raw files in input_dir; indent=False writes compact JSON.
+    The index pass uses up to workers processes (see index_processes).
+    """
     raw_data_path = Path(input_dir)
     if not raw_data_path.exists() or not raw_data_path.is_dir():
       print(f"Directory not found: {raw_data_path}")
       return None
 
-    print(f"Combining JSON files from {raw_data_path}")
+    print(f"Combining JSON files from {raw_data_path} (JSON backend: {jsonio.BACKEND})")
 
-    json_files = list(raw_data_path.glob('*.json'))
+    output_path = Path(output_dir if output_dir else input_dir)
+    output_file = output_path / "code.json"
+    json_files = sorted(path for path in raw_data_path.glob('*.json') if path.resolve() != output_file.resolve())
     if not json_files:
       print("No JSON files found")
       return None
 
-    combined_data = []
-    for file_path in json_files:
-      print(f"Reading {file_path.name}")
-      try:
-        with open(file_path, 'r') as f:
-          data = json.load(f)
-          if isinstance(data, list):
-            combined_data.extend(data)
-          else:
-            combined_data.append(data)
-      except json.JSONDecodeError:
-        print(f"Error: {file_path.name} is not valid JSON, skipping")
-      except Exception as e:
-        print(f"Error processing {file_path.name}: {e}")
-
-    if not combined_data:
-      print("No valid data found")
-      return None
+    # Pass 1: key -> (updated, file number, record number) of the newest record.
+    winners = {}
+    for file_number, entries in self._index_entries(json_files, workers):
+      for key, updated, record_number in entries:
+        # Ties keep the record seen first.
+        if key not in winners or updated > winners[key][0]:
+          winners[key] = (updated, file_number, record_number)
+      print(f"Read {json_files[file_number].name}")
+    keep = defaultdict(set)
+    for _, file_number, record_number in winners.values():
+      keep[file_number].add(record_number)
+    del winners
 
-    output_path = Path(output_dir if output_dir else input_dir)
+    # Pass 2: write the winners in batches, in the same layout json.dump produced.
     output_path.mkdir(parents=True, exist_ok=True)
-    output_file = output_path / "code.json"
-
-    data = {
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    head, tail = jsonio.dumps({
       "version": "2.0",
       "agency": "CDC",
       "measurementType": {
           "method": "projects"
       },
-      "projects": combined_data
-    }
+      "projects": []
+    }, indent).rsplit('[]', 1)
+    separator, opening, closing = (',\n    ', '[\n    ', '\n  ]') if indent else (',', '[', ']')
+    count = 0
+    duplicates = 0
+    batch = []
+
+    def flush(out):
+      out.write(separator if count > len(batch) else opening)
+      out.write(self._render(batch, indent))
+      batch.clear()
 
-    with open(output_file, 'w') as f:
-      json.dump(data, f, indent=2)
+    with open(tmp_file, 'w', encoding='utf-8') as out:
+      out.write(head)
+      for file_number, file_path in enumerate(json_files):
+        kept = keep.get(file_number, set())
+        for record_number, record in enumerate(_records(file_path)):
+          # Unkeyed records are all kept; of the keyed ones, only the winners.
+          if self.record_key(record) is not None and record_number not in kept:
+            duplicates += 1
+            continue
+          batch.append(self.published(record))
+          count += 1
+          if len(batch) == self.RENDER_BATCH:
+            flush(out)
+      if batch:
+        flush(out)
+      out.write(closing if count else '[]')
+      out.write(tail)
+
+    if not count:
+      tmp_file.unlink()
+      print("No valid data found")
+      return None
+    os.replace(tmp_file, output_file)
 
     print(f"Combined data saved to {output_file}")
-    print(f"Total repositories: {len(combined_data)}")
+    print(f"Total repositories: {count} ({duplicates} duplicate records dropped)")
     return str(output_file)
@@ -85,8 +85,18 @@ class Config:
     except FileNotFoundError:
         print(f"Warning: Private key file not found at {key_path}. Authentication will likely fail.")
 
+    try:
+      http_cache_max_mb = int(os.environ.get('HTTP_CACHE_MAX_MB', '512'))
+    except ValueError:
+      http_cache_max_mb = 512
+
     return {
       'raw_data_dir' : os.environ.get('RAW_DATA_DIR', 'data/raw'),
+      'http_cache_dir': os.environ.get('HTTP_CACHE_DIR', 'data/http_cache'),
+      'http_cache_max_bytes': http_cache_max_mb * 1024 * 1024,
+      'version_cache_file': os.environ.get('VERSION_CACHE_FILE', 'data/version_cache.json'),
+      'snapshot_dir': os.environ.get('SNAPSHOT_DIR', 'data/snapshots'),
+      'catalog_db': os.environ.get('CATALOG_DB', 'data/catalog.sqlite3'),
       'github_org': org_name or os.environ.get('GH_ORG', ''),
       'github_app_id': app_id,
       'github_app_installation_id': installation_id,
@@ -0,0 +1,47 @@
+import hashlib
+from pathlib import Path
+
+from src import jsonio
+from src.combine import Combine
+
+def content_hash(record):
+  """
+  sha256 of the record as compact JSON with sorted keys, leaving out the fields that
+  change on every run without the repository changing: date.metadataLastUpdated and
+  contentHash itself.
+  """
+  stable = {field: value for field, value in record.items() if field != 'contentHash'}
+  if isinstance(stable.get('date'), dict):
+    stable['date'] = {field: value for field, value in stable['date'].items() if field != 'metadataLastUpdated'}
+  return hashlib.sha256(jsonio.dumps(stable, sort_keys=True).encode('utf-8')).hexdigest()
+
+def previous_stamps(path):
+  """{record key: (content hash, metadataLastUpdated)} of the records in a previous output file."""
+  path = Path(path)
+  stamps = {}
+  if not path.exists():
+    return stamps
+  try:
+    for record in jsonio.iter_array(path):
+      key = Combine.record_key(record) if isinstance(record, dict) else None
+      if key:
+        # Files written before records carried a hash are hashed here instead.
+        stamps[key] = (record.get('contentHash') or content_hash(record), (record.get('date') or {}).get('metadataLastUpdated'))
+  except (OSError, ValueError) as e:
+    print(f"Warning: could not read previous output {path} ({e}); every record counts as changed.")
+  return stamps
+
+def stamp(record, stamps):
+  """
+  Sets record's contentHash and, when the content matches the previous run's record,
+  puts back that record's metadataLastUpdated, so the date only advances on a change.
+  Returns True when the record is new or changed.
+  """
+  record.pop('contentHash', None)
+  digest = content_hash(record)
+  record['contentHash'] = digest
+  previous_hash, previous_updated = stamps.get(Combine.record_key(record), (None, None))
+  if previous_hash != digest or not previous_updated:
+    return True
+  record.setdefault('date', {})['metadataLastUpdated'] = previous_updated
+  return False
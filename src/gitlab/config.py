@@ -64,8 +64,18 @@ class GitlabConfig:
             domain = gitlab_url.replace("https://", "").replace("http://", "").replace("/", "").replace(".", "_").upper()
             prefix = f"{domain}_"
 
+        try:
+            http_cache_max_mb = int(os.environ.get('HTTP_CACHE_MAX_MB', '512'))
+        except ValueError:
+            http_cache_max_mb = 512
+
         return {
             'raw_data_dir': os.environ.get('RAW_DATA_DIR', 'data/raw'),
+            'http_cache_dir': os.environ.get('HTTP_CACHE_DIR', 'data/http_cache'),
+            'http_cache_max_bytes': http_cache_max_mb * 1024 * 1024,
+            'version_cache_file': os.environ.get('VERSION_CACHE_FILE', 'data/version_cache.json'),
+            'snapshot_dir': os.environ.get('SNAPSHOT_DIR', 'data/snapshots'),
+            'catalog_db': os.environ.get('CATALOG_DB', 'data/catalog.sqlite3'),
             'gitlab_url': gitlab_url or os.environ.get('GL_URL', 'https://gitlab.com'),
             'gitlab_group_id': group_id or os.environ.get('GL_GROUP_ID'),
             'gitlab_token': os.environ.get(f'{prefix}GL_TOKEN', os.environ.get('GL_TOKEN', '')),
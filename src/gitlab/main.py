@@ -6,48 +6,100 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.gitlab.config import GitlabConfig
 from src.gitlab.repository import GitlabRepository
 from src.gitlab.sanitize import GitlabSanitizer
+from src.http_cache import HttpCache
+from src.transport import ApiAdapter
+from src.incremental import PreviousScan
+from src.ratelimit import RateLimitScheduler
+from src.checkpoint import Checkpoint
+from src.window import SubmissionWindow
+from src.version import VersionResolver
+from src.snapshot import SnapshotStore
+from src.offline import rebuild_from_snapshot
+from src.catalog import sync_catalog
 
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import itertools
 from pathlib import Path
-import json
 import argparse
 
-###############################################################
-## The intention is to provide a simple interface to update
-## us with existing repositories in a GitLab instance/group, and
-## then sanitize the data to a common format such as code.json
-## to provide the user with all of the known repositories.
-###############################################################
-def main():
-    parser = argparse.ArgumentParser(description='Process GitLab instance/group')
-    parser.add_argument('--output', help='Output directory path')
-    parser.add_argument('--url', help='GitLab instance URL (overrides GL_URL in .env)', default='https://gitlab.com')
-    parser.add_argument('--group-id', help='GitLab group ID (overrides GL_GROUP_ID in .env)')
-    parser.add_argument('--limit', type=int, help='Limit the number of repositories to process for testing')
-    parser.add_argument('--workers', type=int, default=10, help='Number of parallel workers to process repositories')
-    parser.add_argument('--socks-proxy', help='SOCKS proxy URL (e.g., socks5h://127.0.0.1:1080)')
-    parser.add_argument('--no-verify-ssl', action='store_true', help='Disable SSL verification')
-    args = parser.parse_args()
+def process_projects(credentials, args, previous, checkpoint, version_resolver, recorder):
+    """
+    Sanitizes every project on a thread pool. Projects that previous reports as unchanged
+    are carried forward, and projects already in the checkpoint are skipped.
+    """
+    # Get repos from GitLab; the listing is a generator paginated as projects are consumed.
+    repos_to_process = GitlabRepository().get_repos(credentials)
+    # A streamed listing has no total up front, so progress shows '?' unless limited.
+    total_repos_to_process = '?'
 
-    now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-    print(f"GitLab process starting: {now}", flush=True)
+    if args.limit:
+        # Applied lazily: no page beyond the one holding the last needed project is fetched.
+        repos_to_process = itertools.islice(repos_to_process, args.limit)
+        total_repos_to_process = args.limit
+        print(f"Limiting processing to the first {args.limit} repositories.", flush=True)
 
-    config = GitlabConfig()
-    
-    # Determine the target GitLab URL and group from args or env
-    gitlab_url = args.url or os.environ.get('GL_URL', 'https://gitlab.com')
-    group_id = args.group_id or os.environ.get('GL_GROUP_ID')
+    sanitizer = GitlabSanitizer(version_resolver=version_resolver, snapshot_recorder=recorder)
+    skipped = {'reused': 0, 'resumed': 0}
+
+    def repos_needing_processing():
+        # Pulled lazily by the submission window, so listing pages load as work completes.
+        for repo in repos_to_process:
+            if repo.id in checkpoint:
+                skipped['resumed'] += 1
+            elif previous_record := previous.match_gitlab(repo, sanitizer._get_private_id_prefix(repo)):
+                checkpoint.append(repo.id, previous_record)
+                if recorder:
+                    recorder.carry_forward(repo.id)
+                skipped['reused'] += 1
+            else:
+                yield repo
 
+    print(f"Processing {total_repos_to_process} repositories with up to {args.workers} workers...", flush=True)
+    total_repos = total_repos_to_process
+    processed_count = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        window = SubmissionWindow(executor, max_pending=2 * args.workers)
+        for repo, future in window.map(sanitizer.get_repository_metadata, repos_needing_processing()):
+            processed_count += 1
+            progress = processed_count + skipped['reused'] + skipped['resumed']
+            repo_name = getattr(repo, 'path_with_namespace', f'ID-{getattr(repo, "id", "unknown")}')
+            try:
+                data = future.result()
+                if data:
+                    checkpoint.append(repo.id, data)
+                print(f"[{progress}/{total_repos}] Successfully processed: {repo_name}")
+            except Exception as exc:
+                print(f"[{progress}/{total_repos}] Error processing {repo_name}: {exc}")
+    if skipped['reused']:
+        print(f"Carried forward {skipped['reused']} unchanged repositories from the previous scan.", flush=True)
+
+def parse_targets(args):
+    """
+    Pairs each --url with its --group-id. A single URL also falls back to GL_URL and
+    GL_GROUP_ID; with several URLs, group IDs are given in the same order ('' for all
+    accessible projects) or not at all.
+    """
+    urls = args.url or [os.environ.get('GL_URL', 'https://gitlab.com')]
+    group_ids = args.group_id or []
+    if len(urls) == 1:
+        return [(urls[0], group_ids[0] if group_ids else os.environ.get('GL_GROUP_ID'))]
+    if group_ids and len(group_ids) != len(urls):
+        print(f"Exiting: {len(urls)} --url targets but {len(group_ids)} --group-id values; give one per URL ('' for none) or none at all.", flush=True)
+        sys.exit(1)
+    return [(url, (group_ids[index] if group_ids else None) or None) for index, url in enumerate(urls)]
+
+def prepare_target(config, args, gitlab_url, group_id):
+    """Resolves one instance's credentials and output file, exiting on configuration errors."""
     credentials, errors = config.get_and_verify_credentials(gitlab_url, group_id)
-    if errors:
+    # Rebuilding from the snapshot store needs no API credentials.
+    if errors and not args.from_snapshot:
         print(f"Exiting due to configuration errors for GitLab instance '{gitlab_url}':\n- " + "\n- ".join(errors), flush=True)
         sys.exit(1)
     
     # Debug: Show which token is being used (first 10 chars only)
     token_preview = credentials.get('gitlab_token', '')[:10] + '...' if credentials.get('gitlab_token') else 'None'
-    print(f"Using token: {token_preview}", flush=True)
+    print(f"Using token for {gitlab_url}: {token_preview}", flush=True)
     
     # Debug: Show token lookup logic
     domain = gitlab_url.replace("https://", "").replace("http://", "").replace("/", "").replace(".", "_").upper()
@@ -71,58 +123,139 @@ def main():
         credentials['raw_data_dir'] = args.output
     elif credentials.get('raw_data_dir') == 'data/raw':
         credentials['raw_data_dir'] = str(Path(__file__).parent.parent.parent.absolute() / 'data/raw')
-    print(f'Raw data directory: {credentials["raw_data_dir"]}', flush=True)
-
-    # Get repos from GitLab
-    repos_list = GitlabRepository().get_repos(credentials)
-    
-    repos_to_process = repos_list
-    total_repos_to_process = len(repos_list)
-    
-    if args.limit:
-        repos_to_process = repos_list[:args.limit]
-        total_repos_to_process = len(repos_to_process)
-        print(f"Limiting processing to the first {total_repos_to_process} repositories.", flush=True)
-
-    sanitizer = GitlabSanitizer()
-    sanitized_data = []
-
-    print(f"Processing {total_repos_to_process} repositories with up to {args.workers} workers...", flush=True)
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        future_to_repo = {executor.submit(sanitizer.get_repository_metadata, repo): repo for repo in repos_to_process}
-
-        processed_count = 0
-        total_repos = total_repos_to_process
-        for future in as_completed(future_to_repo):
-            repo = future_to_repo[future]
-            processed_count += 1
-            try:
-                data = future.result()
-                if data:
-                    sanitized_data.append(data)
-                repo_name = getattr(repo, 'path_with_namespace', f'ID-{getattr(repo, "id", "unknown")}')
-                print(f"[{processed_count}/{total_repos}] Successfully processed: {repo_name}")
-            except Exception as exc:
-                repo_name = getattr(repo, 'path_with_namespace', f'ID-{getattr(repo, "id", "unknown")}')
-                print(f"[{processed_count}/{total_repos}] Error processing {repo_name}: {exc}")
+    credentials['workers'] = args.workers
+    if args.no_http_cache:
+        credentials['http_cache_dir'] = ''
+    elif credentials.get('http_cache_dir') == 'data/http_cache':
+        credentials['http_cache_dir'] = str(Path(__file__).parent.parent.parent.absolute() / 'data/http_cache')
+    if credentials.get('version_cache_file') == 'data/version_cache.json':
+        credentials['version_cache_file'] = str(Path(__file__).parent.parent.parent.absolute() / 'data/version_cache.json')
+    if credentials.get('snapshot_dir') == 'data/snapshots':
+        credentials['snapshot_dir'] = str(Path(__file__).parent.parent.parent.absolute() / 'data/snapshots')
+    if args.no_catalog:
+        credentials['catalog_db'] = ''
+    elif credentials.get('catalog_db') == 'data/catalog.sqlite3':
+        credentials['catalog_db'] = str(Path(__file__).parent.parent.parent.absolute() / 'data/catalog.sqlite3')
 
     output_dir = Path(credentials["raw_data_dir"])
     output_dir.mkdir(parents=True, exist_ok=True)
-    
+
     # Create output filename based on GitLab URL and group
     safe_url = gitlab_url.replace("https://", "").replace("http://", "").replace("/", "-")
     if group_id:
         output_file = output_dir / f"repo-gitlab-{safe_url}-group-{group_id}.json"
     else:
         output_file = output_dir / f"repo-gitlab-{safe_url}.json"
-    
-    print(f"\nWriting {len(sanitized_data)} processed repository records to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(sanitized_data, f, indent=2)
-    print(f"Data saved to {output_file}")
+
+    store = SnapshotStore(credentials['snapshot_dir']) if credentials.get('snapshot_dir') else None
+    if args.from_snapshot and (not store or not store.manifest_path(output_file.stem).exists()):
+        print(f"Exiting: no snapshot of {output_file.stem} found in {credentials.get('snapshot_dir') or 'SNAPSHOT_DIR'}.", flush=True)
+        sys.exit(1)
+    return credentials, output_file, store
+
+def scan_target(credentials, args, output_file, store, version_resolver):
+    """
+    Scans one instance into its own output file. Each instance has its own session and
+    connection pool, rate-limit scheduler and pool of args.workers threads.
+    """
+    if args.from_snapshot:
+        checkpoint = Checkpoint(output_file.with_suffix('.ndjson'))
+        print(f"Re-running the sanitizer rules over {store.manifest_path(output_file.stem)} with {args.workers} processes...", flush=True)
+        try:
+            rebuild_from_snapshot(store, output_file.stem, checkpoint, args.workers)
+        finally:
+            checkpoint.close()
+    else:
+        previous = PreviousScan.load(output_file) if args.incremental else PreviousScan()
+        # Raw inputs of every project are kept so the rules can later be re-run offline.
+        recorder = store.writer(output_file.stem, resume=args.resume) if store and not args.no_snapshot else None
+        # Records are streamed to the checkpoint as they complete, so a crash loses nothing.
+        checkpoint = Checkpoint(output_file.with_suffix('.ndjson'), resume=args.resume)
+
+        try:
+            process_projects(credentials, args, previous, checkpoint, version_resolver, recorder)
+        finally:
+            checkpoint.close()
+            if recorder:
+                recorder.close()
+        if recorder:
+            recorder.commit()
+
+    print(f"\nWriting processed repository records from {checkpoint.path} to {output_file}...")
+    record_count = checkpoint.write_json(output_file)
+    print(f"Saved {record_count} records to {output_file}")
+    if credentials.get('catalog_db'):
+        sync_catalog(credentials['catalog_db'], output_file)
+    if not args.from_snapshot:
+        print(RateLimitScheduler.for_gitlab(credentials['gitlab_url']).summary())
+        print(ApiAdapter.shared(credentials['gitlab_url']).summary())
+
+###############################################################
+## The intention is to provide a simple interface to update
+## us with existing repositories in a GitLab instance/group, and
+## then sanitize the data to a common format such as code.json
+## to provide the user with all of the known repositories.
+###############################################################
+def main():
+    parser = argparse.ArgumentParser(description='Process GitLab instances/groups')
+    parser.add_argument('--output', help='Output directory path')
+    parser.add_argument('--url', action='append', help='GitLab instance URL (overrides GL_URL in .env); repeat to scan several instances concurrently')
+    parser.add_argument('--group-id', action='append', help='GitLab group ID (overrides GL_GROUP_ID in .env); repeat once per --url when scanning several instances')
+    parser.add_argument('--limit', type=int, help='Limit the number of repositories to process for testing')
+    parser.add_argument('--workers', type=int, default=10, help='Number of parallel workers to process repositories, per instance')
+    parser.add_argument('--socks-proxy', help='SOCKS proxy URL (e.g., socks5h://127.0.0.1:1080)')
+    parser.add_argument('--no-verify-ssl', action='store_true', help='Disable SSL verification')
+    parser.add_argument('--incremental', action='store_true', help='Carry forward records from the previous output file for projects that have not changed')
+    parser.add_argument('--no-catalog', action='store_true', help='Do not upsert the scanned records into the SQLite catalog (CATALOG_DB)')
+    parser.add_argument('--no-http-cache', action='store_true', help='Disable the on-disk conditional-request cache (HTTP_CACHE_DIR)')
+    parser.add_argument('--no-snapshot', action='store_true', help='Do not record raw project inputs in the snapshot store (SNAPSHOT_DIR)')
+    parser.add_argument('--from-snapshot', action='store_true', help='Re-run the sanitizer rules over the last recorded snapshot, without any API calls')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted scan from its checkpoint, skipping projects already processed')
+    args = parser.parse_args()
+
+    now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    print(f"GitLab process starting: {now}", flush=True)
+
+    config = GitlabConfig()
+    # Every target is validated before any scan starts.
+    targets = [prepare_target(config, args, gitlab_url, group_id) for gitlab_url, group_id in parse_targets(args)]
+    print(f'Raw data directory: {targets[0][0]["raw_data_dir"]}', flush=True)
+
+    # One resolver for all instances, so their version cache entries land in one file.
+    version_resolver = None if args.from_snapshot else VersionResolver(targets[0][0].get('version_cache_file'))
+    failed = []
+    try:
+        if args.from_snapshot or len(targets) == 1:
+            # Offline rebuilds are CPU-bound and already use a process pool, so run them in turn.
+            for credentials, output_file, store in targets:
+                scan_target(credentials, args, output_file, store, version_resolver)
+        else:
+            # Instances have independent rate limits, so they are scanned side by side.
+            print(f"Scanning {len(targets)} GitLab instances concurrently...", flush=True)
+            with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+                futures = {
+                    executor.submit(scan_target, credentials, args, output_file, store, version_resolver): credentials['gitlab_url']
+                    for credentials, output_file, store in targets
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        print(f"Scan of {futures[future]} failed: {exc}", flush=True)
+                        failed.append(futures[future])
+    finally:
+        if version_resolver:
+            version_resolver.save()
+    if not args.from_snapshot:
+        credentials = targets[0][0]
+        if credentials.get('http_cache_dir'):
+            print(HttpCache.open(credentials['http_cache_dir']).summary())
+        print(version_resolver.summary())
 
     now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
     print(f"GitLab processing completed at {now}")
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
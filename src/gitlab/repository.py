@@ -1,7 +1,11 @@
 import gitlab
-import requests
+from gitlab.exceptions import GitlabListError
 from urllib3.util.retry import Retry
 
+from src.http_cache import HttpCache
+from src.ratelimit import RateLimitScheduler
+from src.transport import ApiAdapter
+
 class GitlabRepository:
     def authenticate(self, credentials):
         """Authenticate with GitLab using the provided credentials."""
@@ -10,28 +14,55 @@ class GitlabRepository:
         socks_proxy = credentials.get('socks_proxy')
         verify_ssl = credentials.get('verify_ssl', True)
         
-        # Set up session with proxy if needed
-        session = None
-        if socks_proxy:
-            session = requests.Session()
-            session.proxies = {
-                'http': socks_proxy,
-                'https': socks_proxy
-            }
-            session.verify = verify_ssl
+        # Conditional requests against the on-disk cache turn unchanged payloads into 304s.
+        cache = None
+        if credentials.get('http_cache_dir'):
+            cache = HttpCache.open(credentials['http_cache_dir'], credentials.get('http_cache_max_bytes'))
+        workers = credentials.get('workers', 10)
+        # One scheduler per instance paces all workers against its RateLimit-* headers.
+        scheduler = RateLimitScheduler.for_gitlab(gitlab_url, max_concurrency=workers)
+        # One adapter per instance keeps a keep-alive pool sized to the workers, which
+        # saves a TLS handshake per request (and per SOCKS tunnel) once it is warm.
+        adapter = ApiAdapter.shared(gitlab_url, pool_size=workers, cache=cache, scheduler=scheduler)
+        session = adapter.session(proxy=socks_proxy, verify_ssl=verify_ssl)
 
-            # Suppress InsecureRequestWarning if SSL verification is disabled
-            if not verify_ssl:
-                import urllib3
-                urllib3.disable_warnings()
+        # Suppress InsecureRequestWarning if SSL verification is disabled
+        if socks_proxy and not verify_ssl:
+            import urllib3
+            urllib3.disable_warnings()
 
         # Create GitLab client
         gl = gitlab.Gitlab(gitlab_url, private_token=token, session=session, ssl_verify=verify_ssl)
         
         return gl
 
+    def iter_projects(self, manager, **filters):
+        """
+        Yields the projects of a listing as its pages arrive.
+
+        Keyset pagination (ordered by id) keeps deep pages as cheap as the first on large
+        instances. GitLab refuses it for listings that do not support it, such as a
+        group's projects, and those fall back to offset pagination.
+        """
+        try:
+            try:
+                projects = manager.list(iterator=True, per_page=100, pagination='keyset', order_by='id', sort='asc', **filters)
+            except GitlabListError as e:
+                if e.response_code not in (400, 405):
+                    raise
+                projects = manager.list(iterator=True, per_page=100, order_by='id', sort='asc', **filters)
+        except Exception as e:
+            print(f"Error listing repositories: {e}")
+            return
+        if projects.total is not None:
+            print(f"Found {projects.total} repositories.")
+        yield from projects
+
     def get_repos(self, credentials):
-        """Get repositories from GitLab instance or group."""
+        """
+        Get repositories from GitLab instance or group, as a generator that fetches
+        listing pages only as projects are consumed.
+        """
         gl = self.authenticate(credentials)
         group_id = credentials.get('gitlab_group_id')
         
@@ -40,20 +71,12 @@ class GitlabRepository:
             try:
                 group = gl.groups.get(group_id)
                 print(f"Found group: {group.name}")
-                # Get all projects in the group including subgroups
-                projects = group.projects.list(all=True, include_subgroups=True)
-                print(f"Found {len(projects)} repositories in group.")
-                return projects
             except Exception as e:
                 print(f"Error fetching group {group_id}: {e}")
-                return []
+                return iter(())
+            # Get all projects in the group including subgroups, with the license and
+            # statistics the sanitizer needs so projects are not fetched again.
+            return self.iter_projects(group.projects, include_subgroups=True, license=True, statistics=True)
         else:
             print("Fetching all accessible repositories...")
-            try:
-                # Get all projects accessible to the user
-                projects = gl.projects.list(all=True, membership=True)
-                print(f"Found {len(projects)} accessible repositories.")
-                return projects
-            except Exception as e:
-                print(f"Error fetching all repositories: {e}")
-                return []
+            return self.iter_projects(gl.projects, membership=True, license=True, statistics=True)
@@ -3,9 +3,14 @@ import re
 import gitlab
 from datetime import datetime, timezone
 from gitlab.exceptions import GitlabGetError
-from packaging.version import parse as parse_version, InvalidVersion
+from gitlab.v4.objects import Project
 
 from src.gitlab.config import GitlabConfig
+from src.version import VersionResolver, latest_version as latest_version_of
+from src.markers import MARKER_KEYS, parse_markers
+from src.acronyms import AcronymMatcher
+from src.gitlab.snapshot import ProjectSnapshot
+from src.repo_files import README_PATHS, GITLAB_CODEOWNERS_PATHS
 
 class GitlabSanitizer:
     """
@@ -32,9 +37,13 @@ class GitlabSanitizer:
         'tex', 'roff', 'csv', 'tsv'
     ]
 
-    def __init__(self):
+    def __init__(self, version_resolver=None, snapshot_recorder=None):
         """Initializes the Sanitizer with configuration and regex patterns."""
         self.config = GitlabConfig().get_app_config()
+        self.acronym_matcher = AcronymMatcher(self.config.get('ORG_ACRONYMS', {}))
+        self.version_resolver = version_resolver or VersionResolver()
+        # Optional ManifestWriter that keeps the raw inputs of every project for --from-snapshot.
+        self.snapshot_recorder = snapshot_recorder
         self.email_regex = re.compile(r'[\w.+-]+@cdc\.gov')
         self.marker_regex_template = r'(?i)^\s*(?:{}):\s*(.*)$'
 
@@ -55,10 +64,49 @@ class GitlabSanitizer:
             print(f"Error fetching '{file_path}' for {project.path_with_namespace}: {e}")
             return None
 
+    def _list_tree(self, project, path=''):
+        """
+        Paths of the files and directories directly under path on the default branch,
+        or None if the tree cannot be listed.
+        """
+        try:
+            items = project.repository_tree(path=path, ref=project.default_branch, get_all=True, per_page=100)
+            return {item['path'] for item in items}
+        except Exception as e:
+            print(f"Error listing '{path or '/'}' for {project.path_with_namespace}: {e}")
+            return None
+
+    def _first_file_content(self, project, candidates, listings):
+        """
+        Content of the first candidate path that exists and is not empty.
+
+        Only paths present in a tree listing are fetched, so missing candidates cost no
+        404s. Listings are cached in the listings dict across calls, and a subdirectory is
+        listed only when a candidate inside it is reached and the root lists it. If the
+        tree cannot be listed, every candidate is fetched in turn as before.
+        """
+        if '' not in listings:
+            listings[''] = self._list_tree(project)
+        for path in candidates:
+            directory = path.rpartition('/')[0]
+            if directory not in listings:
+                root = listings['']
+                listings[directory] = self._list_tree(project, directory) if root is None or directory in root else set()
+            entries = listings[directory]
+            if entries is not None and path not in entries:
+                continue
+            content = self._get_file_content(project, path)
+            if content:
+                return content
+        return None
+
     def _parse_marker(self, content, key):
         """Parse a text block for a specific "Key: Value" marker."""
         if not content:
             return None
+        if key in MARKER_KEYS:
+            # All known markers come from one cached scan of the README.
+            return parse_markers(content).get(key)
         regex = re.compile(self.marker_regex_template.format(key), re.MULTILINE)
         match = regex.search(content)
         return match.group(1).strip() if match else None
@@ -70,33 +118,26 @@ class GitlabSanitizer:
         if org_from_marker:
             return org_from_marker
 
-        org_acronyms = self.config.get('ORG_ACRONYMS', {})
-        if not org_acronyms:
+        if not self.acronym_matcher:
             return self.config.get('AGENCY_NAME', 'CDC')
 
         # 2. Search for acronyms in project topics/tags
         if tags:
-            tags_lower = {tag.lower() for tag in tags}
-            for acronym, full_name in org_acronyms.items():
-                if acronym.lower() in tags_lower:
-                    return acronym
+            org_from_tags = self.acronym_matcher.match_tags(tags)
+            if org_from_tags:
+                return org_from_tags
 
-        # 3. Search for acronyms in README content
-        if readme_content:
-            readme_lower = readme_content.lower()
-            for acronym, full_name in org_acronyms.items():
-                if re.search(r'\b' + re.escape(acronym.lower()) + r'\b', readme_lower):
-                    return acronym
+        # 3. Search for acronyms in the entire README content.
+        # Whole words only, to avoid matching substrings (e.g., 'flu' in 'influenza').
+        org_from_readme = self.acronym_matcher.match_text(readme_content)
+        if org_from_readme:
+            return org_from_readme
 
         # 4. Check project name and URL
         search_string = f"{project.name} {project.web_url} {project.path_with_namespace}".lower()
-        for acronym, full_name in org_acronyms.items():
-            acronym_lower = acronym.lower()
-            if (f"{acronym_lower}-" in search_string or
-                f"-{acronym_lower}" in search_string or
-                f"/{acronym_lower}/" in search_string or
-                search_string.endswith(f"/{acronym_lower}")):
-                return acronym
+        org_from_name = self.acronym_matcher.match_name(search_string)
+        if org_from_name:
+            return org_from_name
 
         # 5. Default to agency name
         return self.config.get('AGENCY_NAME', 'CDC')
@@ -157,21 +198,15 @@ class GitlabSanitizer:
         # 4. Default status
         return "development"
 
-    def _infer_version(self, project, readme_content):
-        """Infer version from GitLab tags or README marker."""
-        # 1. Scan tags for latest semantic version
+    def _infer_version(self, project, readme_content, tag_names=None):
+        """Infer version from GitLab tags (or tag names already fetched) or README marker."""
+        # 1. Latest semantic version among the tags
         latest_version = None
         try:
-            tags = project.tags.list(all=True)
-            for tag in tags:
-                try:
-                    version_str = tag.name.lstrip('vV')
-                    current_version = parse_version(version_str)
-                    if not current_version.is_prerelease:
-                        if latest_version is None or current_version > latest_version:
-                            latest_version = current_version
-                except InvalidVersion:
-                    continue
+            if tag_names is None:
+                latest_version, _ = self.version_resolver.resolve_gitlab(project)
+            else:
+                latest_version = latest_version_of(tag_names)
         except Exception:
             pass
 
@@ -231,6 +266,41 @@ class GitlabSanitizer:
         # 3. Default
         return ""
 
+    def _project_from_listing(self, project_ref):
+        """
+        Returns a Project to run the rules on, built from a listing entry without another
+        API call. Listings request license and statistics up front; the project is only
+        fetched again when a public project's license (which decides its usageType) is
+        missing from the listing.
+        """
+        if not hasattr(project_ref, 'manager'):
+            return project_ref
+        gl = project_ref.manager.gitlab
+        if project_ref.visibility == 'public' and 'license' not in project_ref.attributes:
+            return gl.projects.get(project_ref.id, license=True)
+        if isinstance(project_ref, Project):
+            return project_ref
+        # Group listings return GroupProject objects, which lack the files, languages and
+        # tags endpoints; rebind the listing attributes to a Project without fetching.
+        return Project(gl.projects, project_ref.attributes)
+
+    def _is_empty(self, project):
+        if 'empty_repo' in project.attributes:
+            return bool(project.empty_repo)
+        # Older instances only report emptiness through the (requested) statistics.
+        statistics = getattr(project, 'statistics', None) or {}
+        return statistics.get('commit_count') == 0
+
+    def _is_fork(self, project):
+        if getattr(project, 'forked_from_project', None):
+            print(f"Skipping forked repository: {project.path_with_namespace}")
+            return True
+        return False
+
+    def _record(self, snapshot):
+        if self.snapshot_recorder is not None:
+            self.snapshot_recorder.add(snapshot)
+
     def _get_private_id_prefix(self, project):
         """Get private ID prefix based on GitLab instance."""
         url = project.web_url.lower()
@@ -246,15 +316,11 @@ class GitlabSanitizer:
         Process a GitLab project and return sanitized metadata.
         """
         try:
-            # Get full project details
-            if hasattr(project_ref, 'manager'):
-                project = project_ref.manager.gitlab.projects.get(project_ref.id, lazy=False)
-            else:
-                project = project_ref
-            
+            project = self._project_from_listing(project_ref)
+
             # Skip forks if desired
-            if hasattr(project, 'forked_from_project') and project.forked_from_project:
-                print(f"Skipping forked repository: {project.path_with_namespace}")
+            if self._is_fork(project):
+                self._record(ProjectSnapshot(project.attributes))
                 return None
 
             # Skip empty repositories
@@ -262,21 +328,15 @@ class GitlabSanitizer:
                 print(f"Skipping repository without tree access: {project.path_with_namespace}")
                 return None
 
-            # Fetch file contents
-            readme_content = self._get_file_content(project, 'README.md')
-            if not readme_content:
-                # Try other README variations
-                for readme_name in ['README.rst', 'README.txt', 'README']:
-                    readme_content = self._get_file_content(project, readme_name)
-                    if readme_content:
-                        break
-
-            # Try to get CODEOWNERS
-            codeowners_content = None
-            for codeowners_path in ['CODEOWNERS', '.gitlab/CODEOWNERS', '.github/CODEOWNERS', 'docs/CODEOWNERS']:
-                codeowners_content = self._get_file_content(project, codeowners_path)
-                if codeowners_content:
-                    break
+            # An empty repository has no files, languages or tags to fetch.
+            if self._is_empty(project):
+                self._record(ProjectSnapshot(project.attributes))
+                return self._build_metadata(project, None, None, [], [])
+
+            # Fetch the README and CODEOWNERS from the locations the tree lists
+            listings = {}
+            readme_content = self._first_file_content(project, README_PATHS, listings)
+            codeowners_content = self._first_file_content(project, GITLAB_CODEOWNERS_PATHS, listings)
 
             # Get languages
             languages = []
@@ -286,58 +346,14 @@ class GitlabSanitizer:
             except Exception:
                 pass
 
-            # Get topics/tags
-            tags = getattr(project, 'topics', []) or []
-
-            # Perform inferences
-            description = self._infer_description(project, readme_content)
-            usage_type, exemption_text, repository_url = self._infer_usage_and_url(project, readme_content, languages)
-            status = self._infer_status(project, readme_content)
-            organization = self._infer_organization(project, readme_content, tags)
-            contact_email = self._infer_contact_email(project, readme_content, codeowners_content)
-            version = self._infer_version(project, readme_content)
-
-            # Assemble metadata
-            metadata = {
-                "name": project.name,
-                "organization": organization,
-                "description": description,
-                "version": version,
-                "status": status,
-                "vcs": "git",
-                "homepageURL": getattr(project, 'web_url', ''),
-                "repositoryURL": repository_url,
-                "repositoryVisibility": "private" if project.visibility == 'private' else "public",
-                "languages": languages,
-                "tags": tags,
-                "contact": {
-                    "email": contact_email
-                },
-                "date": {
-                    "created": project.created_at if hasattr(project, 'created_at') else None,
-                    "lastModified": project.last_activity_at if hasattr(project, 'last_activity_at') else None,
-                    "metadataLastUpdated": datetime.now(timezone.utc).isoformat()
-                },
-                "permissions": {
-                    "usageType": usage_type,
-                    "licenses": []
-                }
-            }
-
-            # Add license info if available
-            if hasattr(project, 'license') and project.license:
-                metadata["permissions"]["licenses"] = [{"name": project.license.get("name", "Unknown")}]
-
-            # Add exemption text if present
-            if exemption_text:
-                metadata["permissions"]["exemptionText"] = exemption_text
-
-            # Add private ID for private repos
-            if project.visibility == 'private':
-                prefix = self._get_private_id_prefix(project)
-                metadata["privateID"] = f"{prefix}_{project.id}"
+            # Get the tags the latest version is resolved from
+            try:
+                _, tag_names = self.version_resolver.resolve_gitlab(project)
+            except Exception:
+                tag_names = []
 
-            return metadata
+            self._record(ProjectSnapshot(project.attributes, readme_content, codeowners_content, languages, tag_names))
+            return self._build_metadata(project, readme_content, codeowners_content, languages, tag_names)
 
         except Exception as e:
             project_name = getattr(project_ref, 'path_with_namespace', f'ID-{getattr(project_ref, "id", "unknown")}')
@@ -345,3 +361,83 @@ class GitlabSanitizer:
             import traceback
             traceback.print_exc()
             return None
+
+    def get_snapshot_metadata(self, snapshot):
+        """
+        Applies the same rules as get_repository_metadata to a ProjectSnapshot whose
+        contents were already fetched (e.g. from the snapshot store). No API calls.
+        """
+        try:
+            if self._is_fork(snapshot):
+                return None
+            return self._build_metadata(snapshot, snapshot.readme, snapshot.codeowners,
+                                        snapshot.languages, snapshot.tag_names)
+        except Exception as e:
+            print(f"Failed processing GitLab repository {getattr(snapshot, 'path_with_namespace', snapshot.id)}: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def _build_metadata(self, project, readme_content, codeowners_content, languages, tag_names=None):
+        """Performs the inferences and assembles the code.json project entry."""
+        # Get topics/tags
+        tags = getattr(project, 'topics', []) or []
+
+        # Perform inferences
+        description = self._infer_description(project, readme_content)
+        usage_type, exemption_text, repository_url = self._infer_usage_and_url(project, readme_content, languages)
+        status = self._infer_status(project, readme_content)
+        organization = self._infer_organization(project, readme_content, tags)
+        contact_email = self._infer_contact_email(project, readme_content, codeowners_content)
+        version = self._infer_version(project, readme_content, tag_names)
+
+        # Assemble metadata
+        metadata = {
+            "name": project.name,
+            "organization": organization,
+            "description": description,
+            "version": version,
+            "status": status,
+            "vcs": "git",
+            "homepageURL": getattr(project, 'web_url', ''),
+            "repositoryURL": repository_url,
+            "repositoryVisibility": "private" if project.visibility == 'private' else "public",
+            "languages": languages,
+            "tags": tags,
+            "contact": {
+                "email": contact_email
+            },
+            "date": {
+                "created": project.created_at if hasattr(project, 'created_at') else None,
+                "lastModified": project.last_activity_at if hasattr(project, 'last_activity_at') else None,
+                "metadataLastUpdated": datetime.now(timezone.utc).isoformat()
+            },
+            "permissions": {
+                "usageType": usage_type,
+                "licenses": []
+            }
+        }
+
+        # Add license info if available
+        if hasattr(project, 'license') and project.license:
+            metadata["permissions"]["licenses"] = [{"name": project.license.get("name", "Unknown")}]
+
+        # Add exemption text if present
+        if exemption_text:
+            metadata["permissions"]["exemptionText"] = exemption_text
+
+        # Keep the platform description when the README supplied the published one,
+        # for --incremental to compare against. Not published: Combine drops it.
+        platform_description = (project.description or "").strip()
+        if description != platform_description:
+            metadata["platformDescription"] = platform_description
+
+        # Add private ID for private repos
+        if project.visibility == 'private':
+            prefix = self._get_private_id_prefix(project)
+            metadata["privateID"] = f"{prefix}_{project.id}"
+            # repositoryURL points at a notice PDF; the private ID mapping needs the real one.
+            # Not published: Combine drops it from code.json.
+            metadata["privateRepositoryURL"] = project.web_url
+
+        return metadata
@@ -0,0 +1,40 @@
+class ProjectSnapshot:
+    """
+    The raw inputs the GitLab sanitizer rules read for one project: the project's API
+    attributes plus the fetched README, CODEOWNERS, languages and version tags.
+
+    Attributes resolve against the stored API attributes, like a python-gitlab Project,
+    so GitlabSanitizer can run its rules on a snapshot without any API calls.
+    """
+    PLATFORM = 'gitlab'
+
+    def __init__(self, attributes, readme=None, codeowners=None, languages=None, tag_names=None):
+        self.attributes = attributes
+        self.readme = readme
+        self.codeowners = codeowners
+        self.languages = languages or []
+        self.tag_names = tag_names or []
+
+    def __getattr__(self, name):
+        # Only called for names not set in __init__, i.e. the project's API fields.
+        try:
+            return self.__dict__['attributes'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def to_entry(self, store):
+        return {
+            'platform': self.PLATFORM,
+            'id': self.attributes['id'],
+            'attributes': self.attributes,
+            'readme': store.put_blob(self.readme),
+            'codeowners': store.put_blob(self.codeowners),
+            'languages': self.languages,
+            'tag_names': self.tag_names,
+        }
+
+    @classmethod
+    def from_entry(cls, entry, store):
+        return cls(entry['attributes'], readme=store.get_blob(entry.get('readme')),
+                   codeowners=store.get_blob(entry.get('codeowners')),
+                   languages=entry.get('languages'), tag_names=entry.get('tag_names'))
@@ -0,0 +1,152 @@
+from github.GithubException import GithubException
+
+from src.snapshot import License, RepoSnapshot
+from src.repo_files import github_file_aliases, github_files
+from src.version import VersionResolver, run_steps
+
+# Everything the sanitizer rules read for a repository, fetched in one round trip
+# for a whole page of repositories instead of six or more REST calls per repository.
+# Every README and CODEOWNERS location is requested; the first one present is used. The
+# newest tags are the first page of VersionResolver.github_steps.
+ORG_REPOSITORIES_QUERY = """
+query($org: String!, $first: Int!, $after: String, $tags: Int!) {
+  organization(login: $org) {
+    repositories(first: $first, after: $after, orderBy: {field: CREATED_AT, direction: ASC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        name
+        nameWithOwner
+        url
+        description
+        homepageUrl
+        isPrivate
+        isArchived
+        isFork
+        isEmpty
+        diskUsage
+        createdAt
+        pushedAt
+        licenseInfo { name }
+        %s
+        languages(first: 100, orderBy: {field: SIZE, direction: DESC}) { nodes { name } }
+        repositoryTopics(first: 100) { nodes { topic { name } } }
+        refs(refPrefix: "refs/tags/", first: $tags, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+          pageInfo { hasNextPage endCursor }
+          nodes { name target { oid } }
+        }
+      }
+    }
+  }
+}
+""" % github_file_aliases()
+
+# The tags after the first page, for the repositories whose version needs them all.
+REPOSITORY_TAGS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    refs(refPrefix: "refs/tags/", first: $first, after: $after, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name target { oid } }
+    }
+  }
+}
+"""
+
+class GraphqlFetcher:
+  """
+  Pages through an organization's repositories with the GitHub GraphQL API and
+  yields one RepoSnapshot per repository, ready for Sanitizer.get_snapshot_metadata.
+  """
+  def __init__(self, github_client, batch_size=50, tag_count=100, version_resolver=None):
+    self.requester = github_client.requester
+    self.batch_size = batch_size
+    self.tag_count = tag_count
+    self.version_resolver = version_resolver or VersionResolver()
+    self.total_count = None
+
+  def _query_page(self, org_name, after, batch_size):
+    """
+    Runs one page query. Pages with large READMEs can time out on GitHub's side, so a
+    failed page is retried with half the batch size until a single repository fails.
+    """
+    while True:
+      variables = {'org': org_name, 'first': batch_size, 'after': after, 'tags': self.tag_count}
+      try:
+        _, data = self.requester.graphql_query(ORG_REPOSITORIES_QUERY, variables)
+        return data['data']['organization']['repositories'], batch_size
+      except GithubException as e:
+        if batch_size == 1 or e.status not in (400, 502, 503, 504):
+          raise
+        batch_size = max(1, batch_size // 2)
+        print(f"GraphQL page failed ({e.status}), retrying with batch size {batch_size}")
+
+  def iter_snapshots(self, org_name):
+    """Yields a RepoSnapshot for every repository in the organization."""
+    after = None
+    batch_size = self.batch_size
+    while True:
+      page, batch_size = self._query_page(org_name, after, batch_size)
+      self.total_count = page['totalCount']
+      for node in page['nodes']:
+        if node:
+          yield self.snapshot_from_node(node)
+      if not page['pageInfo']['hasNextPage']:
+        return
+      after = page['pageInfo']['endCursor']
+
+  @staticmethod
+  def _tag_page(refs):
+    return [(ref['name'], (ref.get('target') or {}).get('oid')) for ref in refs['nodes']], refs['pageInfo']['hasNextPage']
+
+  def resolve_version(self, node, pushed_at=None):
+    """
+    (latest version, tag names read) of a repository node with the same VersionResolver
+    steps as the REST engines: the node already holds the first page of tags, and only
+    a full scan queries the remaining ones.
+    """
+    owner, _, name = node['nameWithOwner'].partition('/')
+    cursor = node['refs']['pageInfo']['endCursor']
+
+    def fetch(page_number):
+      nonlocal cursor
+      if page_number == 0:
+        return self._tag_page(node['refs'])
+      variables = {'owner': owner, 'name': name, 'first': self.tag_count, 'after': cursor}
+      _, data = self.requester.graphql_query(REPOSITORY_TAGS_QUERY, variables)
+      refs = data['data']['repository']['refs']
+      cursor = refs['pageInfo']['endCursor']
+      return self._tag_page(refs)
+
+    pushed_at = pushed_at.isoformat() if pushed_at else ''
+    return run_steps(self.version_resolver.github_steps(node['url'], pushed_at), fetch)
+
+  def snapshot_from_node(self, node):
+    """Maps a GraphQL repository node onto the REST field names the rules read."""
+    license_info = node.get('licenseInfo')
+    readme, codeowners = github_files(node)
+    pushed_at = RepoSnapshot.parse_timestamp(node.get('pushedAt'))
+    # Forks and empty repositories are skipped by the rules, as in the other engines.
+    _, tag_names = (None, []) if node['isFork'] or node.get('isEmpty') else self.resolve_version(node, pushed_at)
+    return RepoSnapshot(
+      id=node['databaseId'],
+      name=node['name'],
+      full_name=node['nameWithOwner'],
+      html_url=node['url'],
+      description=node.get('description'),
+      homepage=node.get('homepageUrl'),
+      private=node['isPrivate'],
+      archived=node['isArchived'],
+      fork=node['isFork'],
+      # REST reports size 0 for empty repositories, which the sanitizer skips.
+      size=0 if node.get('isEmpty') else (node.get('diskUsage') or 0),
+      created_at=RepoSnapshot.parse_timestamp(node.get('createdAt')),
+      pushed_at=pushed_at,
+      license=License(license_info['name']) if license_info else None,
+      readme=readme,
+      codeowners=codeowners,
+      languages=[lang['name'] for lang in node['languages']['nodes']],
+      topics=[topic['topic']['name'] for topic in node['repositoryTopics']['nodes']],
+      tag_names=tag_names,
+    )
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+class HttpCache:
+  """
+  On-disk cache of GET responses, revalidated with ETag / Last-Modified.
+
+  Each entry is one file: a JSON header line (url, validators, response headers)
+  followed by the raw body. The total size is bounded; when a write pushes it over
+  max_bytes the least recently used entries are evicted. File mtimes carry the
+  recency across runs. Only GETs are cached: the README/CODEOWNERS GraphQL query (see
+  Sanitizer._get_files) is not.
+  """
+  DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+  _instances = {}
+  _instances_lock = threading.Lock()
+
+  def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+    self.cache_dir = Path(cache_dir)
+    self.cache_dir.mkdir(parents=True, exist_ok=True)
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+    self._lock = threading.Lock()
+    self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+    self._total_bytes = 0
+    for path in sorted(self.cache_dir.glob('*.entry'), key=lambda p: p.stat().st_mtime):
+      size = path.stat().st_size
+      self._entries[path.stem] = size
+      self._total_bytes += size
+
+  @classmethod
+  def open(cls, cache_dir, max_bytes=None):
+    """Returns the process-wide cache for cache_dir so every client shares one LRU index."""
+    key = str(Path(cache_dir).absolute())
+    with cls._instances_lock:
+      if key not in cls._instances:
+        cls._instances[key] = cls(cache_dir, max_bytes or cls.DEFAULT_MAX_BYTES)
+      return cls._instances[key]
+
+  def record_hit(self):
+    """Counts a revalidated (304) response; several threads share the cache."""
+    with self._lock:
+      self.hits += 1
+
+  def record_miss(self):
+    """Counts a response fetched in full (200)."""
+    with self._lock:
+      self.misses += 1
+
+  @staticmethod
+  def _key(url, accept):
+    return hashlib.sha256(f"{accept}\n{url}".encode('utf-8')).hexdigest()
+
+  def _path(self, key):
+    return self.cache_dir / f"{key}.entry"
+
+  def get(self, url, accept=''):
+    """Returns the cached entry for url as a dict with a 'body' key, or None."""
+    key = self._key(url, accept)
+    with self._lock:
+      if key not in self._entries:
+        return None
+      self._entries.move_to_end(key)
+    path = self._path(key)
+    try:
+      with open(path, 'rb') as f:
+        entry = json.loads(f.readline())
+        entry['body'] = f.read()
+      os.utime(path)
+      return entry
+    except (OSError, ValueError):
+      with self._lock:
+        self._total_bytes -= self._entries.pop(key, 0)
+      return None
+
+  def put(self, url, accept, headers, body):
+    """Stores a 200 response that carries an ETag or Last-Modified validator."""
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if not (etag or last_modified):
+      return
+    # The body is stored decoded, so encoding/length headers no longer apply.
+    kept_headers = {
+      name: value for name, value in headers.items()
+      if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')
+    }
+    header_line = json.dumps({
+      'url': url,
+      'etag': etag,
+      'last_modified': last_modified,
+      'headers': kept_headers,
+    }).encode('utf-8')
+    key = self._key(url, accept)
+    path = self._path(key)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    try:
+      with open(tmp_path, 'wb') as f:
+        f.write(header_line + b'\n')
+        f.write(body)
+      os.replace(tmp_path, path)
+    except OSError as e:
+      print(f"Warning: could not write HTTP cache entry for {url}: {e}")
+      return
+    size = len(header_line) + 1 + len(body)
+    with self._lock:
+      self._total_bytes += size - self._entries.pop(key, 0)
+      self._entries[key] = size
+      evicted = self._evict()
+    for stale_key in evicted:
+      try:
+        self._path(stale_key).unlink()
+      except OSError:
+        pass
+
+  def _evict(self):
+    """Drops least recently used entries until the cache fits; caller holds the lock."""
+    evicted = []
+    while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+      stale_key, size = self._entries.popitem(last=False)
+      self._total_bytes -= size
+      evicted.append(stale_key)
+    return evicted
+
+  def summary(self):
+    return (f"HTTP cache: {self.hits} revalidated (304), {self.misses} fetched, "
+            f"{len(self._entries)} entries / {self._total_bytes / (1024 * 1024):.1f} MB")
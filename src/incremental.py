@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src import jsonio
+
+class PreviousScan:
+  """
+  Index of the records written by the previous run (repo-*.json), used by --incremental
+  to carry forward repositories that have not changed since.
+
+  Records are keyed by privateID for private repositories and by repositoryURL for
+  public ones, which is what a listing entry can be matched on without extra calls.
+  Repositories that no longer appear in the listing are simply never looked up, so
+  they drop out of the new output.
+  """
+  INACTIVE_AFTER_DAYS = 730
+
+  def __init__(self, records=None):
+    self.records = {}
+    for record in records or []:
+      key = self.record_key(record)
+      if key:
+        self.records[key] = record
+
+  @classmethod
+  def load(cls, path):
+    path = Path(path)
+    if not path.exists():
+      print(f"No previous scan found at {path}; every repository will be processed.")
+      return cls()
+    try:
+      records = jsonio.load(path)
+    except (OSError, ValueError) as e:
+      print(f"Warning: could not read previous scan {path} ({e}); every repository will be processed.")
+      return cls()
+    print(f"Loaded {len(records)} records from previous scan {path}")
+    return cls(records)
+
+  def __len__(self):
+    return len(self.records)
+
+  @staticmethod
+  def normalized_description(description):
+    """The platform description as the sanitizer records it, "" when it is None or blank."""
+    return (description or "").strip()
+
+  @staticmethod
+  def platform_description(record):
+    """
+    The platform description a record was built from. It is always compared, so a
+    description cleared on the platform does not carry the old one forward. When the
+    README supplied the published description, the sanitizer keeps the platform's in
+    platformDescription; otherwise the two are the same.
+    """
+    return record.get('platformDescription', record.get('description'))
+
+  @staticmethod
+  def record_key(record):
+    return record.get('privateID') or record.get('repositoryURL')
+
+  def _unchanged(self, record, last_modified, expected):
+    """Compares the listing-derived fields of a record against the current listing."""
+    date = record.get('date') or {}
+    if not last_modified or date.get('lastModified') != last_modified:
+      return False
+    for field, value in expected.items():
+      current = self.platform_description(record) if field == 'description' else record.get(field)
+      if current != value:
+        return False
+    # The inactive status is time based, so a quiet repository can go stale without a push.
+    if record.get('status') == 'development':
+      pushed_at = datetime.fromisoformat(last_modified.replace('Z', '+00:00'))
+      if pushed_at.tzinfo is None:
+        pushed_at = pushed_at.replace(tzinfo=timezone.utc)
+      if (datetime.now(timezone.utc) - pushed_at).days > self.INACTIVE_AFTER_DAYS:
+        return False
+    return True
+
+  def match_github(self, repo):
+    """
+    Returns the previous record for a GitHub repository (PyGithub listing object or
+    RepoSnapshot) when nothing the listing reports has changed, otherwise None.
+    """
+    key = f"github_{repo.id}" if repo.private else repo.html_url
+    record = self.records.get(key)
+    if record is None:
+      return None
+    if (record.get('status') == 'archived') != bool(repo.archived):
+      return None
+    expected = {
+      'name': repo.name,
+      'description': self.normalized_description(repo.description),
+      'homepageURL': repo.homepage or "",
+      'repositoryVisibility': "private" if repo.private else "public",
+      'tags': repo.topics,
+    }
+    licenses = record.get('permissions', {}).get('licenses')
+    if licenses != ([{"name": repo.license.name}] if repo.license else []):
+      return None
+    last_modified = repo.pushed_at.isoformat() if repo.pushed_at else None
+    return record if self._unchanged(record, last_modified, expected) else None
+
+  def match_gitlab(self, project, private_id_prefix):
+    """Returns the previous record for a GitLab listing entry when unchanged, otherwise None."""
+    is_private = project.visibility == 'private'
+    key = f"{private_id_prefix}_{project.id}" if is_private else project.web_url
+    record = self.records.get(key)
+    if record is None:
+      return None
+    if (record.get('status') == 'archived') != bool(getattr(project, 'archived', False)):
+      return None
+    expected = {
+      'name': project.name,
+      'description': self.normalized_description(project.description),
+      'homepageURL': project.web_url,
+      'repositoryVisibility': "private" if is_private else "public",
+      'tags': getattr(project, 'topics', []) or [],
+    }
+    # Listings only carry the license when requested; compare it when present.
+    if 'license' in project.attributes:
+      license_name = project.license.get("name", "Unknown") if project.license else None
+      licenses = record.get('permissions', {}).get('licenses')
+      if licenses != ([{"name": license_name}] if license_name else []):
+        return None
+    return record if self._unchanged(record, project.last_activity_at, expected) else None
@@ -0,0 +1,146 @@
+# Reading and writing of catalog JSON (repo-*.json, code.json) through one backend.
+#
+# orjson is used when it is installed (pip install orjson, or the "fast" extra) and the
+# standard library otherwise. Both backends produce the same text: UTF-8 with non-ASCII
+# characters unescaped, either indented by two spaces like json.dump(indent=2) or
+# compact without spaces. Catalog files are read record by record with either backend.
+import json
+import os
+import re
+from pathlib import Path
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+BACKEND = 'orjson' if orjson else 'json'
+
+def loads(data):
+  """Parses JSON text (str or bytes)."""
+  if orjson:
+    return orjson.loads(data)
+  return json.loads(data)
+
+def dumps(obj, indent=False, sort_keys=False):
+  """Serializes obj to a str, indented by two spaces or compact, optionally with sorted keys."""
+  if orjson:
+    option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return orjson.dumps(obj, option=option).decode('utf-8')
+  if indent:
+    return json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+  return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys)
+
+def load(path):
+  with open(path, 'rb') as f:
+    return loads(f.read())
+
+def dump(obj, path, indent=True):
+  """Writes obj to path atomically (through a temporary file)."""
+  path = Path(path)
+  tmp_path = path.with_name(path.name + '.tmp')
+  with open(tmp_path, 'w', encoding='utf-8') as f:
+    f.write(dumps(obj, indent))
+  os.replace(tmp_path, path)
+
+# Whitespace and the commas between array items or object members.
+_SEPARATORS = re.compile(r'[\s,]*')
+# Whitespace and the colon between an object key and its value.
+_KEY_SEPARATOR = re.compile(r'[\s:]*')
+
+class _ChunkedText:
+  """A text file read in chunks and decoded one JSON value at a time."""
+
+  def __init__(self, f, chunk_size):
+    self.f = f
+    self.chunk_size = chunk_size
+    self.buffer = f.read(chunk_size)
+    self.pos = 0
+    self.eof = not self.buffer
+    self.decoder = json.JSONDecoder()
+
+  def _read_more(self):
+    """Drops the text already consumed and appends the next chunk; False at end of file."""
+    if self.eof:
+      return False
+    more = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+    self.eof = not more
+    self.buffer = self.buffer[self.pos:] + more
+    self.pos = 0
+    return bool(more)
+
+  def peek(self, separators=_SEPARATORS):
+    """Skips separators and returns the next character without consuming it ('' at the end)."""
+    while True:
+      self.pos = separators.match(self.buffer, self.pos).end()
+      if self.pos < len(self.buffer) or not self._read_more():
+        return self.buffer[self.pos:self.pos + 1]
+
+  def value(self):
+    """Decodes and consumes the JSON value at the current position."""
+    while True:
+      try:
+        item, end = self.decoder.raw_decode(self.buffer, self.pos)
+      except json.JSONDecodeError:
+        # The value may continue in the next chunk.
+        if not self._read_more():
+          raise
+        continue
+      # So may a number running to the end of the buffer.
+      if end == len(self.buffer) and self._read_more():
+        continue
+      self.pos = end
+      return item
+
+def iter_json_array(path, chunk_size=1 << 16, key=None):
+  """
+  Yields the items of a JSON array file one at a time, reading it in chunks, so only
+  the current record is held in memory. With key, the array is the value of that
+  member of a top-level object instead (e.g. key='projects' for code.json); a file
+  without the member yields nothing. A file holding a single object, with no key,
+  yields the object.
+  """
+  with open(path, 'r', encoding='utf-8') as f:
+    text = _ChunkedText(f, chunk_size)
+    char = text.peek()
+    if char == '{' and key is not None:
+      text.pos += 1
+      while True:
+        if text.peek() in ('}', ''):
+          return
+        name = text.value()
+        text.peek(_KEY_SEPARATOR)
+        if name == key:
+          break
+        # Other members (version, agency, ...) are small; decode and drop them.
+        text.value()
+      char = text.peek()
+      if char != '[':
+        raise ValueError(f"{path}: {key} is not an array")
+    if char != '[':
+      yield json.loads(text.buffer[text.pos:] + f.read())
+      return
+    text.pos += 1
+    while True:
+      char = text.peek()
+      if char == ']':
+        return
+      if char == '':
+        raise ValueError(f"{path}: unterminated JSON array")
+      yield text.value()
+
+def iter_projects(path):
+  """
+  Yields the projects of a catalog file one at a time with bounded memory: the projects
+  array of a code.json, or the items of a raw repo-*.json array.
+  """
+  yield from iter_json_array(path, key='projects')
+
+def iter_array(path):
+  """
+  Yields the items of a JSON array file (a file holding a single object yields it), one
+  at a time with iter_json_array(), whatever the backend. Parsing a whole file at once
+  is no faster, even with orjson, because every record has to be allocated and tracked
+  together, and the stdlib decoder already decodes each record in C.
+  """
+  yield from iter_json_array(path)
@@ -0,0 +1,123 @@
+import csv
+import itertools
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from src import jsonio
+
+MAPPING_COLUMNS = ['PrivateID', 'RepositoryName', 'RepositoryURL', 'Organization', 'ContactEmails', 'DateAdded']
+
+def repository_url(record):
+  """
+  The real URL of a record's repository, or '' when the record does not carry one.
+  Private and exempted records point repositoryURL at a notice PDF and keep the real
+  URL in privateRepositoryURL.
+  """
+  url = record.get('privateRepositoryURL') or record.get('repositoryURL') or ''
+  return '' if urlparse(url).path.lower().endswith('.pdf') else url
+
+def mapping_row(private_id, record, date_added):
+  """
+  One privateid_mapping.csv row. RepositoryName is the record's name and Organization
+  the namespace the repository URL puts it in (the record's organization without a URL).
+  """
+  url = repository_url(record)
+  segments = urlparse(url).path.strip('/').split('/')
+  organization = segments[-2] if url and len(segments) > 1 else record.get('organization') or ''
+  contact = (record.get('contact') or {}).get('email') or ''
+  return [private_id, record.get('name') or '', url, organization, contact, date_added]
+
+def known_keys(csv_path, columns):
+  """The set of values (tuples when several columns) of columns in an existing CSV file."""
+  keys = set()
+  csv_path = Path(csv_path)
+  if not csv_path.exists():
+    return keys
+  with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if not header:
+      return keys
+    indexes = [header.index(column) for column in columns]
+    for row in reader:
+      if len(row) > max(indexes):
+        keys.add(row[indexes[0]] if len(indexes) == 1 else tuple(row[index] for index in indexes))
+  return keys
+
+def append_rows(csv_path, header, rows, lineterminator='\r\n'):
+  """
+  Appends rows to a copy of csv_path (created with header if missing or empty) that then
+  atomically replaces it; existing rows are copied byte for byte. Leaves the file
+  untouched when rows is empty. Returns the number of rows appended.
+  """
+  csv_path = Path(csv_path)
+  first = next(rows, None)
+  if first is None:
+    return 0
+
+  csv_path.parent.mkdir(parents=True, exist_ok=True)
+  tmp_path = csv_path.with_name(csv_path.name + '.tmp')
+  exists = csv_path.exists() and csv_path.stat().st_size > 0
+  ends_mid_line = False
+  if exists:
+    shutil.copyfile(csv_path, tmp_path)
+    with open(csv_path, 'rb') as f:
+      f.seek(-1, os.SEEK_END)
+      ends_mid_line = f.read(1) not in (b'\n', b'\r')
+  count = 0
+  with open(tmp_path, 'a' if exists else 'w', encoding='utf-8', newline='') as f:
+    if ends_mid_line:
+      f.write(lineterminator)
+    writer = csv.writer(f, lineterminator=lineterminator)
+    if not exists:
+      writer.writerow(header)
+    for row in itertools.chain([first], rows):
+      writer.writerow(row)
+      count += 1
+  os.replace(tmp_path, csv_path)
+  return count
+
+class PrivateIdMapping:
+  """
+  Keeps data/privateid_mapping.csv in step with the raw repo-*.json files.
+
+  Existing rows are never rewritten, so every DateAdded stays the date the id was first
+  mapped. Only the PrivateID column of the existing file is read, into a set, and the
+  raw records are streamed against it; rows for ids not seen before are appended to a
+  copy of the file that then atomically replaces it.
+  """
+
+  def __init__(self, csv_path):
+    self.csv_path = Path(csv_path)
+
+  def known_ids(self):
+    return known_keys(self.csv_path, ['PrivateID'])
+
+  @staticmethod
+  def _raw_records(raw_dir):
+    for raw_file in sorted(Path(raw_dir).glob('*.json')):
+      if raw_file.name == 'code.json':
+        continue
+      try:
+        for record in jsonio.iter_array(raw_file):
+          if isinstance(record, dict):
+            yield record
+      except ValueError:
+        print(f"Error: {raw_file.name} is not valid JSON, skipping the rest of it")
+
+  def new_rows(self, records, known):
+    """Rows for the records whose private id is not in known, which is updated as it goes."""
+    date_added = datetime.now().isoformat()
+    for record in records:
+      private_id = record.get('privateID') or record.get('private_id')
+      if private_id and private_id not in known:
+        known.add(private_id)
+        yield mapping_row(private_id, record, date_added)
+
+  def update(self, raw_dir):
+    """Appends the private ids in raw_dir's files that are not mapped yet. Returns how many."""
+    rows = self.new_rows(self._raw_records(raw_dir), self.known_ids())
+    return append_rows(self.csv_path, MAPPING_COLUMNS, rows)
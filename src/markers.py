@@ -0,0 +1,43 @@
+import re
+from functools import lru_cache
+
+# Every "Key: Value" marker the sanitizers read from a README, spelled the way they ask for it.
+MARKER_KEYS = (
+  'Organization|Org',
+  'Contact email',
+  'Status',
+  'Version',
+  'Exemption',
+  'Exemption justification',
+)
+
+_ALTERNATIVES = {}
+for _key in MARKER_KEYS:
+  for _alternative in _key.split('|'):
+    _ALTERNATIVES[_alternative.lower()] = _key
+
+# One pattern for all keys. The value sits in a lookahead so a marker whose value is
+# empty (and therefore runs into the next line, as with the per-key pattern) does not
+# consume the marker on that next line.
+_MARKER_REGEX = re.compile(
+  r'(?im)^\s*({}):(?=\s*(.*)$)'.format('|'.join(
+    re.escape(alternative) for alternative in sorted(_ALTERNATIVES, key=len, reverse=True)
+  ))
+)
+
+@lru_cache(maxsize=64)
+def parse_markers(content):
+  """
+  Scans a README once and returns {key: stripped value} for the first occurrence of each
+  key in MARKER_KEYS, matching what a separate search per key would find.
+  """
+  markers = {}
+  if not content:
+    return markers
+  for match in _MARKER_REGEX.finditer(content):
+    key = _ALTERNATIVES[match.group(1).lower()]
+    if key not in markers:
+      markers[key] = match.group(2).strip()
+      if len(markers) == len(MARKER_KEYS):
+        break
+  return markers
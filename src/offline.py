@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import itertools
+
+from src.snapshot import RepoSnapshot, SnapshotStore
+from src.window import SubmissionWindow
+
+# One sanitizer per platform per worker process, built on first use.
+_sanitizers = {}
+
+def _sanitizer_for(platform):
+  if platform not in _sanitizers:
+    if platform == 'gitlab':
+      from src.gitlab.sanitize import GitlabSanitizer
+      _sanitizers[platform] = GitlabSanitizer()
+    else:
+      from src.sanitize import Sanitizer
+      _sanitizers[platform] = Sanitizer()
+  return _sanitizers[platform]
+
+def sanitize_entries(store_root, entries):
+  """Runs the sanitizer rules over a chunk of manifest entries; executed in a worker process."""
+  store = SnapshotStore(store_root)
+  results = []
+  for entry in entries:
+    if entry['platform'] == 'gitlab':
+      from src.gitlab.snapshot import ProjectSnapshot
+      snapshot = ProjectSnapshot.from_entry(entry, store)
+    else:
+      snapshot = RepoSnapshot.from_entry(entry, store)
+    results.append((entry['id'], _sanitizer_for(entry['platform']).get_snapshot_metadata(snapshot)))
+  return results
+
+def rebuild_from_snapshot(store, manifest_name, checkpoint, workers, chunk_size=50):
+  """
+  Re-runs the sanitizer rules over one scan's manifest on a process pool, without any
+  network access, appending each record to checkpoint. Returns the number of entries.
+  """
+  entries = store.iter_entries(manifest_name)
+  chunks = iter(lambda: list(itertools.islice(entries, chunk_size)), [])
+  count = 0
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    window = SubmissionWindow(executor, max_pending=2 * workers)
+    for chunk, future in window.map(partial(sanitize_entries, str(store.root)), chunks):
+      for repo_id, record in future.result():
+        if record:
+          checkpoint.append(repo_id, record)
+      count += len(chunk)
+      print(f"[{count}] Re-sanitized {len(chunk)} repositories from {manifest_name}", flush=True)
+  return count
@@ -0,0 +1,160 @@
+import email.utils
+import threading
+import time
+
+class RateLimitScheduler:
+  """
+  Paces every request that shares one API quota, across all worker threads.
+
+  The scheduler reads the rate-limit headers of each response. When a quota runs low
+  it spaces requests so the remainder lasts until the reset; when it is exhausted, or
+  the server sends Retry-After, it pauses all workers at once until the reset instead
+  of letting each thread back off on its own. Secondary (abuse) limits halve the number
+  of requests allowed in flight, which then grows back by one after a run of successes.
+  """
+  POLL_INTERVAL = 0.05
+  MAX_SLEEP = 5.0
+  # Start pacing once less than this fraction of a quota is left.
+  PACE_BELOW_FRACTION = 0.25
+  # Requests kept in reserve so other tools using the same token are not starved.
+  RESERVE = 20
+  GROW_AFTER_SUCCESSES = 50
+  DEFAULT_SECONDARY_PAUSE = 60
+
+  _instances = {}
+  _instances_lock = threading.Lock()
+
+  def __init__(self, name, remaining_header, reset_header, limit_header,
+               resource_header=None, max_concurrency=10, clock=time.time):
+    self.name = name
+    self.remaining_header = remaining_header
+    self.reset_header = reset_header
+    self.limit_header = limit_header
+    self.resource_header = resource_header
+    self.max_concurrency = max(1, max_concurrency)
+    self.concurrency = self.max_concurrency
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._in_flight = 0
+    self._paused_until = 0.0
+    self._next_slot = 0.0
+    self._successes = 0
+    self._quotas = {}  # resource -> (remaining, limit, reset epoch seconds)
+    self.pauses = 0
+
+  @classmethod
+  def for_github(cls, name='github', max_concurrency=10):
+    return cls.shared(name, 'X-RateLimit-Remaining', 'X-RateLimit-Reset', 'X-RateLimit-Limit',
+                      resource_header='X-RateLimit-Resource', max_concurrency=max_concurrency)
+
+  @classmethod
+  def for_gitlab(cls, name, max_concurrency=10):
+    return cls.shared(name, 'RateLimit-Remaining', 'RateLimit-Reset', 'RateLimit-Limit',
+                      max_concurrency=max_concurrency)
+
+  @classmethod
+  def shared(cls, name, *args, **kwargs):
+    """Returns the process-wide scheduler for a quota so every client and worker shares it."""
+    with cls._instances_lock:
+      if name not in cls._instances:
+        cls._instances[name] = cls(name, *args, **kwargs)
+      return cls._instances[name]
+
+  def _spacing(self, now):
+    """Seconds between request starts so that each low quota lasts until its reset."""
+    spacing = 0.0
+    for remaining, limit, reset in self._quotas.values():
+      window = reset - now
+      if window <= 0 or not limit or remaining >= limit * self.PACE_BELOW_FRACTION:
+        continue
+      spacing = max(spacing, window / max(remaining - self.RESERVE, 1))
+    return spacing
+
+  def try_acquire(self):
+    """Takes a request slot if one is free now; otherwise returns the seconds to wait."""
+    with self._lock:
+      now = self._clock()
+      wait = max(self._paused_until - now, self._next_slot - now)
+      if wait > 0:
+        return wait
+      if self._in_flight >= self.concurrency:
+        return self.POLL_INTERVAL
+      self._in_flight += 1
+      self._next_slot = now + self._spacing(now)
+      return 0
+
+  def acquire(self):
+    """Blocks the calling thread until it may send a request."""
+    while True:
+      wait = self.try_acquire()
+      if wait <= 0:
+        return
+      time.sleep(min(wait, self.MAX_SLEEP))
+
+  def abort(self):
+    """Frees a slot whose request failed before any response arrived."""
+    with self._lock:
+      self._in_flight -= 1
+
+  @staticmethod
+  def _retry_after(headers, now):
+    value = headers.get('Retry-After')
+    if not value:
+      return None
+    try:
+      return float(value)
+    except ValueError:
+      parsed = email.utils.parsedate_to_datetime(value)
+      return max(parsed.timestamp() - now, 0) if parsed else None
+
+  def release(self, status, headers, body=''):
+    """
+    Records a response and frees its slot. Returns True when the response was a rate
+    limit rejection; the caller should then acquire again and resend the request.
+    """
+    with self._lock:
+      self._in_flight -= 1
+      now = self._clock()
+      remaining = headers.get(self.remaining_header)
+      reset = headers.get(self.reset_header)
+      if remaining is not None and reset is not None:
+        resource = headers.get(self.resource_header, 'core') if self.resource_header else 'core'
+        try:
+          self._quotas[resource] = (int(remaining), int(headers.get(self.limit_header) or 0), float(reset))
+        except ValueError:
+          pass
+
+      if status not in (403, 429):
+        self._successes += 1
+        if self._successes >= self.GROW_AFTER_SUCCESSES and self.concurrency < self.max_concurrency:
+          self.concurrency += 1
+          self._successes = 0
+        return False
+
+      retry_after = self._retry_after(headers, now)
+      if remaining == '0' and reset is not None:
+        # Primary limit: everything waits for the quota window to reset.
+        pause_until = float(reset) + 1
+        reason = 'rate limit exhausted'
+      elif retry_after is not None or status == 429 or 'secondary rate limit' in (body or '').lower():
+        # Secondary limit: back off and send fewer requests at once.
+        pause_until = now + (retry_after if retry_after is not None else self.DEFAULT_SECONDARY_PAUSE)
+        # Requests already in flight when the limit hit report it too; shrink only once.
+        if self._paused_until <= now:
+          self.concurrency = max(1, self.concurrency // 2)
+        self._successes = 0
+        reason = f"secondary rate limit, concurrency now {self.concurrency}"
+      else:
+        # A plain 403 (e.g. missing permission) is a real answer, not a limit.
+        self._successes += 1
+        return False
+
+      if pause_until > self._paused_until:
+        self._paused_until = pause_until
+        self.pauses += 1
+        print(f"[{self.name}] {reason}; pausing all workers for {max(pause_until - now, 0):.0f}s", flush=True)
+      return True
+
+  def summary(self):
+    quotas = ', '.join(f"{resource}: {remaining}/{limit}" for resource, (remaining, limit, _) in self._quotas.items())
+    return f"[{self.name}] rate limit pauses: {self.pauses}, concurrency: {self.concurrency}/{self.max_concurrency}, remaining {quotas or 'unknown'}"
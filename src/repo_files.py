@@ -0,0 +1,42 @@
+# Where the rules look for a repository's README and CODEOWNERS, in order of preference.
+# Every GitHub engine resolves both with these lists (see github_files), so the REST,
+# async and GraphQL scans agree on which file a repository's record is built from.
+README_PATHS = ('README.md', 'README.rst', 'README.txt', 'README', 'readme.md', '.github/README.md', 'docs/README.md')
+GITLAB_CODEOWNERS_PATHS = ('CODEOWNERS', '.gitlab/CODEOWNERS', '.github/CODEOWNERS', 'docs/CODEOWNERS')
+# The root file was the only one read before, so it keeps precedence over GitHub's other locations.
+GITHUB_CODEOWNERS_PATHS = ('CODEOWNERS', '.github/CODEOWNERS', 'docs/CODEOWNERS')
+
+def blob_aliases(prefix, paths, indent='        '):
+  """GraphQL fields fetching each path's text at HEAD, aliased <prefix>0, <prefix>1, ..."""
+  return ('\n' + indent).join(
+    f'{prefix}{index}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}'
+    for index, path in enumerate(paths)
+  )
+
+def github_file_aliases(indent='        '):
+  """The README and CODEOWNERS aliases of every location, for a repository node."""
+  return blob_aliases('readme', README_PATHS, indent) + '\n' + indent + blob_aliases('codeowners', GITHUB_CODEOWNERS_PATHS, indent)
+
+# Both files of one repository in a single request, for the engines that fetch per repository.
+GITHUB_FILES_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    %s
+  }
+}
+""" % github_file_aliases(indent='    ')
+
+def first_blob_text(node, prefix, count):
+  """Text of the first aliased blob that exists and is not empty (see blob_aliases), or None."""
+  for index in range(count):
+    blob = node.get(f'{prefix}{index}')
+    if blob and blob.get('text'):
+      return blob['text']
+  return None
+
+def github_files(node):
+  """(README, CODEOWNERS) text of a repository node queried with github_file_aliases."""
+  return (
+    first_blob_text(node, 'readme', len(README_PATHS)),
+    first_blob_text(node, 'codeowners', len(GITHUB_CODEOWNERS_PATHS)),
+  )
@@ -1,33 +1,73 @@
+import hashlib
+
 from github import Auth
 from github import Github
 from github import GithubIntegration
 from urllib3.util.retry import Retry
 
+from src.http_cache import HttpCache
+from src.ratelimit import RateLimitScheduler
+from src.transport import ApiAdapter, mount_github_adapter
+
 class Repository:
+  @staticmethod
+  def _shared_adapter(credentials, retry_strategy):
+    """One adapter, and so one set of keep-alive pools, for every organization in the process."""
+    # Conditional requests against the on-disk cache turn unchanged README,
+    # CODEOWNERS, languages and tags payloads into free 304s.
+    cache = None
+    if credentials.get('http_cache_dir'):
+      cache = HttpCache.open(credentials['http_cache_dir'], credentials.get('http_cache_max_bytes'))
+    return ApiAdapter.shared('github', pool_size=credentials.get('http_pool_size') or credentials.get('workers', 10),
+                             cache=cache, max_retries=retry_strategy)
+
+  @staticmethod
+  def quota_name(credentials):
+    """
+    Names the rate-limit quota the credentials draw from: an App installation has its
+    own, while a personal access token's quota is shared by every org it scans.
+    """
+    if credentials.get('github_token'):
+      return f"github:token-{hashlib.sha256(credentials['github_token'].encode()).hexdigest()[:8]}"
+    return f"github:installation-{credentials.get('github_app_installation_id')}"
+
+  def scheduler(self, credentials, max_concurrency=None):
+    """The process-wide scheduler for the credentials' quota."""
+    return RateLimitScheduler.for_github(self.quota_name(credentials),
+                                         max_concurrency=max_concurrency or credentials.get('workers', 10))
+
   def authenticate(self, credentials):
-    app_id = credentials.get('github_app_id', '')
-    installation_id = credentials.get('github_app_installation_id', '')
-    private_key = credentials.get('github_app_private_key', '')
-    
-    # Configure a retry strategy that respects GitHub's rate-limiting headers.
-    # This will automatically wait and retry when a rate limit is encountered,
-    # making the script robust against hitting the API limits.
+    # Server errors are retried with backoff. Rate limits (403/429) are not retried
+    # blindly here: the quota's shared scheduler reads the rate-limit headers, pauses
+    # every worker using that quota until it resets and resends the request.
     retry_strategy = Retry(
         total=10,
         backoff_factor=1,
-        status_forcelist=[403, 500, 502, 503, 504],
+        status_forcelist=[500, 502, 503, 504],
         respect_retry_after_header=True
     )
+    adapter = self._shared_adapter(credentials, retry_strategy)
+    token = self.get_access_token(credentials)
+    adapter.route_token(token, self.scheduler(credentials))
+
+    # The scheduler paces requests, so PyGithub's fixed 0.25s gap between requests is dropped.
+    # Without PyGithub's own timeout the adapter's separate connect/read timeouts apply.
+    github_client = Github(token, retry=retry_strategy, per_page=100, seconds_between_requests=None, timeout=None)
+    return mount_github_adapter(github_client, adapter)
 
+  def get_access_token(self, credentials):
+    """Returns the token used for API calls: the PAT if configured, else an App installation token."""
     ## Use the Github personal access token for authentication
     ## Otherwise, use GitHub App authentication
     ## This is just a personal preference, either is fine.
     if 'github_token' in credentials and credentials['github_token']:
-      return Github(credentials['github_token'], retry=retry_strategy)
+      return credentials['github_token']
+    app_id = credentials.get('github_app_id', '')
+    installation_id = credentials.get('github_app_installation_id', '')
+    private_key = credentials.get('github_app_private_key', '')
     auth = Auth.AppAuth(app_id, private_key)
     gi = GithubIntegration(auth=auth)
-    access_token = gi.get_access_token(installation_id).token
-    return Github(access_token, retry=retry_strategy)
+    return gi.get_access_token(installation_id).token
 
   def get_repos(self, credentials):
     g = self.authenticate(credentials)
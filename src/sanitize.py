@@ -2,7 +2,6 @@ import base64
 import re
 from datetime import datetime, timezone
 from github.GithubException import UnknownObjectException
-from packaging.version import parse as parse_version, InvalidVersion
 
 # Note that this implementation relies on the packaging library to correctly parse and compare semantic versions 
 # from repository tags. You may need to add it to your project's dependencies (e.g., pip install packaging).
@@ -10,6 +9,11 @@ from packaging.version import parse as parse_version, InvalidVersion
 # Assuming config.py is in the same src directory and contains get_app_config()
 # with the necessary keys as described in the requirements.
 from src.config import Config
+from src.version import VersionResolver, latest_version
+from src.markers import MARKER_KEYS, parse_markers
+from src.acronyms import AcronymMatcher
+from src.snapshot import RepoSnapshot
+from src.repo_files import README_PATHS, GITHUB_CODEOWNERS_PATHS, GITHUB_FILES_QUERY, github_files
 
 class Sanitizer:
     """
@@ -37,9 +41,13 @@ class Sanitizer:
         'tex', 'roff', 'csv', 'tsv'
     ]
 
-    def __init__(self):
+    def __init__(self, version_resolver=None, snapshot_recorder=None):
         """Initializes the Sanitizer with configuration and regex patterns."""
         self.config = Config().get_app_config()
+        self.acronym_matcher = AcronymMatcher(self.config.get('ORG_ACRONYMS', {}))
+        self.version_resolver = version_resolver or VersionResolver()
+        # Optional ManifestWriter that keeps the raw inputs of every repository for --from-snapshot.
+        self.snapshot_recorder = snapshot_recorder
         self.email_regex = re.compile(r'[\w.+-]+@cdc\.gov')
         # Case-insensitive regex to find "Key: Value" at the start of a line
         # The key is wrapped in a non-capturing group (?:...) to correctly handle
@@ -66,6 +74,34 @@ class Sanitizer:
             print(f"Error fetching '{file_path}' for {repo.full_name}: {e}")
             return None
 
+    def _first_file_content(self, repo, candidates):
+        """Content of the first candidate path that exists and is not empty, over REST."""
+        for path in candidates:
+            content = self._get_file_content(repo, path)
+            if content:
+                return content
+        return None
+
+    def _get_files(self, repo):
+        """
+        Fetches (README, CODEOWNERS) from the first of README_PATHS and of
+        GITHUB_CODEOWNERS_PATHS that exists, with the one GraphQL query every GitHub
+        engine resolves them with instead of a 404 per missing path. Falls back to
+        reading the same paths over REST if the query fails.
+
+        GraphQL POSTs bypass the HTTP cache, so both files are downloaded in full on
+        every scan. That is deliberate: over REST only the path that exists could be
+        revalidated with a 304, while every missing candidate before it would still
+        cost an uncached 404, so probing the paths costs more requests than it saves.
+        """
+        owner, _, name = repo.full_name.partition('/')
+        try:
+            _, data = repo.requester.graphql_query(GITHUB_FILES_QUERY, {'owner': owner, 'name': name})
+            return github_files(data['data']['repository'] or {})
+        except Exception as e:
+            print(f"Error looking up README and CODEOWNERS for {repo.full_name}, falling back to REST: {e}")
+            return self._first_file_content(repo, README_PATHS), self._first_file_content(repo, GITHUB_CODEOWNERS_PATHS)
+
     def _parse_marker(self, content, key):
         """
         Parses a text block for a specific "Key: Value" marker.
@@ -79,6 +115,9 @@ class Sanitizer:
         """
         if not content:
             return None
+        if key in MARKER_KEYS:
+            # All known markers come from one cached scan of the README.
+            return parse_markers(content).get(key)
         regex = re.compile(self.marker_regex_template.format(key), re.MULTILINE)
         match = regex.search(content)
         return match.group(1).strip() if match else None
@@ -90,38 +129,27 @@ class Sanitizer:
         if org_from_marker:
             return org_from_marker
 
-        org_acronyms = self.config.get('ORG_ACRONYMS', {})
-        if not org_acronyms:
+        if not self.acronym_matcher:
             return self.config.get('AGENCY_NAME', 'CDC') # Fallback if no acronyms defined
 
         # 2. Search for acronyms in repository tags
         if tags:
-            # Create a lowercase set for efficient lookup
-            tags_lower = {tag.lower() for tag in tags}
-            for acronym, full_name in org_acronyms.items():
-                if acronym.lower() in tags_lower:
-                    return acronym
+            org_from_tags = self.acronym_matcher.match_tags(tags)
+            if org_from_tags:
+                return org_from_tags
 
-        # 3. Search for acronyms in the entire README content
-        if readme_content:
-            readme_lower = readme_content.lower()
-            for acronym, full_name in org_acronyms.items():
-                # Use word boundaries to avoid matching substrings (e.g., 'flu' in 'influenza').
-                # The acronym is treated as a literal string, not a regex pattern.
-                if re.search(r'\b' + re.escape(acronym.lower()) + r'\b', readme_lower):
-                    return acronym
+        # 3. Search for acronyms in the entire README content.
+        # Whole words only, to avoid matching substrings (e.g., 'flu' in 'influenza').
+        org_from_readme = self.acronym_matcher.match_text(readme_content)
+        if org_from_readme:
+            return org_from_readme
 
         # 4. Programmatic Check for known acronyms in repo name and URL
         # Combine name and URL for a broader search context.
         search_string = f"{repo.name} {repo.html_url}".lower()
-        for acronym, full_name in org_acronyms.items():
-            acronym_lower = acronym.lower()
-            # Check for common patterns like 'acronym-', '-acronym', or '/acronym/'
-            if (f"{acronym_lower}-" in search_string or
-                f"-{acronym_lower}" in search_string or
-                f"/{acronym_lower}/" in search_string or
-                search_string.endswith(f"/{acronym_lower}")):
-                return acronym
+        org_from_name = self.acronym_matcher.match_name(search_string)
+        if org_from_name:
+            return org_from_name
 
         # 5. Default to agency name
         return self.config.get('AGENCY_NAME', 'CDC')
@@ -174,24 +202,20 @@ class Sanitizer:
         # 4. Default status
         return "development"
 
-    def _infer_version(self, repo, readme_content):
-        """Infers the version from tags or a README marker."""
-        # 1. Scan tags for the latest valid semantic version
-        latest_version = None
-        tags = repo.get_tags()
-        for tag in tags:
-            try:
-                # Remove common prefixes like 'v'
-                version_str = tag.name.lstrip('vV')
-                current_version = parse_version(version_str)
-                if not current_version.is_prerelease:
-                    if latest_version is None or current_version > latest_version:
-                        latest_version = current_version
-            except InvalidVersion:
-                continue  # Ignore tags that are not valid versions
-
-        if latest_version:
-            return str(latest_version)
+    def _infer_version(self, repo, readme_content, tag_names=None):
+        """
+        Infers the version from tags or a README marker.
+
+        tag_names may be supplied by callers that already fetched them (e.g. a GraphQL
+        batch); otherwise the version resolver looks the tags up via the REST API.
+        """
+        # 1. Latest valid semantic version among the tags
+        if tag_names is None:
+            version_from_tags, _ = self.version_resolver.resolve_github(repo)
+        else:
+            version_from_tags = latest_version(tag_names)
+        if version_from_tags:
+            return str(version_from_tags)
 
         # 2. Fallback to README marker
         version_from_readme = self._parse_marker(readme_content, 'Version')
@@ -253,6 +277,22 @@ class Sanitizer:
         # 3. Default to empty string if no description can be found
         return ""
 
+    def _should_skip(self, repo):
+        """Forks and empty repositories are not part of the inventory."""
+        if repo.fork:
+            print(f"Skipping forked repository: {repo.full_name}")
+            return True
+
+        # Skip empty repositories to avoid errors when fetching contents.
+        if repo.size == 0:
+            print(f"Skipping empty repository: {repo.full_name}")
+            return True
+        return False
+
+    def _record(self, snapshot):
+        if self.snapshot_recorder is not None:
+            self.snapshot_recorder.add(snapshot)
+
     def get_repository_metadata(self, repo) -> dict:
         """
         Processes a single repository object and returns its sanitized metadata.
@@ -264,68 +304,97 @@ class Sanitizer:
             A dictionary containing the sanitized repository metadata, or None if
             the repository should be skipped (e.g., it's a fork).
         """
-        if repo.fork:
-            print(f"Skipping forked repository: {repo.full_name}")
-            return None
-
-        # Skip empty repositories to avoid errors when fetching contents.
-        if repo.size == 0:
-            print(f"Skipping empty repository: {repo.full_name}")
+        if self._should_skip(repo):
+            self._record(RepoSnapshot.from_repo(repo, topics=repo.topics))
             return None
 
         try:
             # --- Fetch file contents once ---
-            readme_content = self._get_file_content(repo, 'README.md')
-            codeowners_content = self._get_file_content(repo, 'CODEOWNERS')
+            readme_content, codeowners_content = self._get_files(repo)
 
-            # --- Fetch raw data and perform inferences ---
+            # --- Fetch raw data ---
             languages = list(repo.get_languages().keys())
             tags = repo.get_topics()
-            description = self._infer_description(repo, readme_content)
-            usage_type, exemption_text, repository_url = self._infer_usage_and_url(repo, readme_content, languages)
-            status = self._infer_status(repo, readme_content)
-            organization = self._infer_organization(repo, readme_content, tags)
-            contact_email = self._infer_contact_email(repo, readme_content, codeowners_content)
-            version = self._infer_version(repo, readme_content)
-
-            # --- Assemble the final metadata object ---
-            metadata = {
-                "name": repo.name,
-                "organization": organization,
-                "description": description,
-                "version": version,
-                "status": status,
-                "vcs": "git",
-                "homepageURL": repo.homepage or "",
-                "repositoryURL": repository_url,
-                "repositoryVisibility": "private" if repo.private else "public",
-                "languages": languages,
-                "tags": tags,
-                "contact": {
-                    "email": contact_email
-                },
-                "date": {
-                    "created": repo.created_at.isoformat(),
-                    "lastModified": repo.pushed_at.isoformat(),
-                    "metadataLastUpdated": datetime.now(timezone.utc).isoformat()
-                },
-                "permissions": {
-                    "usageType": usage_type,
-                    "licenses": [{"name": repo.license.name}] if repo.license else []
-                }
-            }
-
-            # Conditionally add optional fields
-            if exemption_text:
-                metadata["permissions"]["exemptionText"] = exemption_text
+            _, tag_names = self.version_resolver.resolve_github(repo)
+            self._record(RepoSnapshot.from_repo(repo, readme_content, codeowners_content, languages, tags, tag_names))
+            return self._build_metadata(repo, readme_content, codeowners_content, languages, tags, tag_names)
 
-            if repo.private:
-                metadata["privateID"] = f"github_{repo.id}"
+        except Exception as e:
+            print(f"Failed processing repository {repo.full_name}: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            return metadata
+    def get_snapshot_metadata(self, snapshot) -> dict:
+        """
+        Applies the same rules as get_repository_metadata to a RepoSnapshot whose
+        contents were already fetched (e.g. by the GraphQL batch fetcher). No API calls.
+        """
+        self._record(snapshot)
+        if self._should_skip(snapshot):
+            return None
 
+        try:
+            return self._build_metadata(
+                snapshot, snapshot.readme, snapshot.codeowners,
+                snapshot.languages, snapshot.topics, snapshot.tag_names
+            )
         except Exception as e:
-            print(f"Failed processing repository {repo.full_name}: {e}")
+            print(f"Failed processing repository {snapshot.full_name}: {e}")
             import traceback
             traceback.print_exc()
             return None
+
+    def _build_metadata(self, repo, readme_content, codeowners_content, languages, tags, tag_names=None) -> dict:
+        """Performs the inferences and assembles the code.json project entry."""
+        description = self._infer_description(repo, readme_content)
+        usage_type, exemption_text, repository_url = self._infer_usage_and_url(repo, readme_content, languages)
+        status = self._infer_status(repo, readme_content)
+        organization = self._infer_organization(repo, readme_content, tags)
+        contact_email = self._infer_contact_email(repo, readme_content, codeowners_content)
+        version = self._infer_version(repo, readme_content, tag_names)
+
+        # --- Assemble the final metadata object ---
+        metadata = {
+            "name": repo.name,
+            "organization": organization,
+            "description": description,
+            "version": version,
+            "status": status,
+            "vcs": "git",
+            "homepageURL": repo.homepage or "",
+            "repositoryURL": repository_url,
+            "repositoryVisibility": "private" if repo.private else "public",
+            "languages": languages,
+            "tags": tags,
+            "contact": {
+                "email": contact_email
+            },
+            "date": {
+                "created": repo.created_at.isoformat(),
+                "lastModified": repo.pushed_at.isoformat(),
+                "metadataLastUpdated": datetime.now(timezone.utc).isoformat()
+            },
+            "permissions": {
+                "usageType": usage_type,
+                "licenses": [{"name": repo.license.name}] if repo.license else []
+            }
+        }
+
+        # Conditionally add optional fields
+        if exemption_text:
+            metadata["permissions"]["exemptionText"] = exemption_text
+
+        # A README-derived description never equals the platform's, so --incremental
+        # matches on the platform one instead. Not published: Combine drops it.
+        platform_description = (repo.description or "").strip()
+        if description != platform_description:
+            metadata["platformDescription"] = platform_description
+
+        if repo.private:
+            metadata["privateID"] = f"github_{repo.id}"
+            # repositoryURL points at a notice PDF; the private ID mapping needs the real one.
+            # Not published: Combine drops it from code.json.
+            metadata["privateRepositoryURL"] = repo.html_url
+
+        return metadata
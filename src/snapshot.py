@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+# Mirrors the one attribute of PyGithub's License object that the rules read.
+License = namedtuple('License', ['name'])
+
+class RepoSnapshot:
+  """
+  The platform fields and file contents the sanitizer rules need for one repository.
+
+  Attribute names mirror PyGithub's Repository object, so the inference methods in
+  Sanitizer accept either a live repository or a snapshot. A snapshot never touches
+  the network once it has been built, and to_entry()/from_entry() move it in and out
+  of a SnapshotStore.
+  """
+  PLATFORM = 'github'
+  FIELDS = ('id', 'name', 'full_name', 'html_url', 'description', 'homepage',
+            'private', 'archived', 'fork', 'size')
+
+  def __init__(self, id, name, full_name, html_url, description=None, homepage=None,
+               private=False, archived=False, fork=False, size=0,
+               created_at=None, pushed_at=None, license=None,
+               readme=None, codeowners=None, languages=None, topics=None, tag_names=None):
+    self.id = id
+    self.name = name
+    self.full_name = full_name
+    self.html_url = html_url
+    self.description = description
+    self.homepage = homepage
+    self.private = private
+    self.archived = archived
+    self.fork = fork
+    self.size = size
+    self.created_at = created_at
+    self.pushed_at = pushed_at
+    self.license = license
+    # Fetched content, already decoded.
+    self.readme = readme
+    self.codeowners = codeowners
+    self.languages = languages or []
+    self.topics = topics or []
+    self.tag_names = tag_names or []
+
+  @staticmethod
+  def parse_timestamp(value):
+    """Parses an ISO-8601 timestamp as returned by the GitHub APIs ('Z' suffix included)."""
+    if not value:
+      return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+  @classmethod
+  def from_repo(cls, repo, readme=None, codeowners=None, languages=None, topics=None, tag_names=None):
+    """Copies the fields the rules read from a PyGithub Repository (or another snapshot)."""
+    return cls(**{field: getattr(repo, field) for field in cls.FIELDS},
+               created_at=repo.created_at, pushed_at=repo.pushed_at,
+               license=License(repo.license.name) if repo.license else None,
+               readme=readme, codeowners=codeowners, languages=languages, topics=topics, tag_names=tag_names)
+
+  def to_entry(self, store):
+    """Manifest entry for this snapshot; README and CODEOWNERS go to the store's blobs."""
+    fields = {field: getattr(self, field) for field in self.FIELDS}
+    fields['created_at'] = self.created_at.isoformat() if self.created_at else None
+    fields['pushed_at'] = self.pushed_at.isoformat() if self.pushed_at else None
+    fields['license'] = self.license.name if self.license else None
+    return {
+      'platform': self.PLATFORM,
+      'id': self.id,
+      'fields': fields,
+      'readme': store.put_blob(self.readme),
+      'codeowners': store.put_blob(self.codeowners),
+      'languages': self.languages,
+      'topics': self.topics,
+      'tag_names': self.tag_names,
+    }
+
+  @classmethod
+  def from_entry(cls, entry, store):
+    fields = dict(entry['fields'])
+    fields['created_at'] = cls.parse_timestamp(fields.get('created_at'))
+    fields['pushed_at'] = cls.parse_timestamp(fields.get('pushed_at'))
+    fields['license'] = License(fields['license']) if fields.get('license') else None
+    return cls(**fields, readme=store.get_blob(entry.get('readme')), codeowners=store.get_blob(entry.get('codeowners')),
+               languages=entry.get('languages'), topics=entry.get('topics'), tag_names=entry.get('tag_names'))
+
+class SnapshotStore:
+  """
+  Local, content-addressed store of the raw inputs the sanitizer rules read, so the
+  rules can be re-run offline (main.py --from-snapshot) without any API calls.
+
+  README and CODEOWNERS texts are blobs named by their SHA-256, so identical files are
+  stored once across repositories and scans. Each scan writes a manifest named after its
+  output file (manifests/repo-<org>.ndjson) with one line per repository holding the
+  platform fields, languages, topics and tags plus the blob hashes.
+  """
+
+  def __init__(self, root):
+    self.root = Path(root)
+    self.blob_dir = self.root / 'blobs'
+    self.manifest_dir = self.root / 'manifests'
+
+  def _blob_path(self, digest):
+    return self.blob_dir / digest[:2] / digest
+
+  def put_blob(self, text):
+    if text is None:
+      return None
+    data = text.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    path = self._blob_path(digest)
+    if not path.exists():
+      path.parent.mkdir(parents=True, exist_ok=True)
+      tmp_path = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+      tmp_path.write_bytes(data)
+      os.replace(tmp_path, path)
+    return digest
+
+  def get_blob(self, digest):
+    if digest is None:
+      return None
+    return self._blob_path(digest).read_text(encoding='utf-8')
+
+  def manifest_path(self, name):
+    return self.manifest_dir / f"{name}.ndjson"
+
+  def iter_entries(self, name):
+    """Yields the manifest entries of one scan, one parsed line at a time."""
+    with open(self.manifest_path(name), 'r') as f:
+      for line in f:
+        try:
+          yield json.loads(line)
+        except ValueError:
+          continue  # Blank, or cut short by an interrupted scan
+
+  def writer(self, name, resume=False):
+    return ManifestWriter(self, name, resume)
+
+class ManifestWriter:
+  """
+  Writes one scan's manifest. Lines go to a .partial file that replaces the manifest
+  only when the scan completes; with resume the partial file of the interrupted scan is
+  extended. Safe to call from worker threads.
+  """
+
+  def __init__(self, store, name, resume=False):
+    self.store = store
+    self.path = store.manifest_path(name)
+    self.partial_path = self.path.with_name(self.path.name + '.partial')
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._lock = threading.Lock()
+    resume = resume and self.partial_path.exists()
+    self._file = open(self.partial_path, 'a' if resume else 'w')
+    if resume and self._file.tell() and not self.partial_path.read_bytes().endswith(b'\n'):
+      self._file.write('\n')
+    self._previous = None
+
+  def add(self, snapshot):
+    line = json.dumps(snapshot.to_entry(self.store)) + '\n'
+    with self._lock:
+      self._file.write(line)
+      self._file.flush()
+
+  def carry_forward(self, repo_id):
+    """Copies a repository's entry from the last complete manifest (for --incremental reuse)."""
+    with self._lock:
+      if self._previous is None:
+        self._previous = {}
+        if self.path.exists():
+          with open(self.path, 'r') as f:
+            for line in f:
+              if line.strip():
+                self._previous[json.loads(line)['id']] = line if line.endswith('\n') else line + '\n'
+      line = self._previous.get(repo_id)
+      if line:
+        self._file.write(line)
+        self._file.flush()
+
+  def close(self):
+    if not self._file.closed:
+      self._file.close()
+
+  def commit(self):
+    self.close()
+    os.replace(self.partial_path, self.path)
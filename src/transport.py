@@ -0,0 +1,184 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from github.Requester import HTTPSRequestsConnectionClass
+
+class ApiAdapter(HTTPAdapter):
+  """
+  requests transport adapter shared by the GitHub and GitLab clients.
+
+  When a cache is given, GET requests are sent with If-None-Match /
+  If-Modified-Since, and a 304 reply is answered from the cache as a normal 200
+  response. GitHub does not count 304s against the rate limit.
+
+  When a RateLimitScheduler is given, every request waits for a slot from it and
+  reports its response back; responses rejected by a rate limit are resent once the
+  scheduler's global pause is over, so callers never see them. One adapter (and so one
+  connection pool) can serve clients with different quotas: route_token() sends the
+  requests carrying a token to that token's scheduler instead.
+
+  Requests sent without a timeout get DEFAULT_TIMEOUT (connect, read) seconds.
+  """
+  MAX_RATE_LIMIT_RETRIES = 5
+  DEFAULT_TIMEOUT = (10, 60)
+
+  _instances = {}
+  _instances_lock = threading.Lock()
+
+  def __init__(self, cache=None, scheduler=None, name='http', timeout=DEFAULT_TIMEOUT, **kwargs):
+    super().__init__(**kwargs)
+    self.cache = cache
+    self.scheduler = scheduler
+    self.name = name
+    self.timeout = timeout
+    self.requests_sent = 0
+    self._stats_lock = threading.Lock()
+    self._schedulers_by_token = {}
+
+  @classmethod
+  def shared(cls, name, pool_size=10, **kwargs):
+    """
+    Returns the process-wide adapter for name (a platform or instance), so every client
+    and worker talking to it shares one set of keep-alive pools.
+
+    Each host gets a pool of pool_size connections, which should cover every worker
+    that sends through the adapter. The pool blocks instead of opening extra
+    connections that it would discard afterwards ("connection pool is full"), which
+    also caps the connections per host.
+    """
+    with cls._instances_lock:
+      if name not in cls._instances:
+        cls._instances[name] = cls(name=name, pool_maxsize=max(pool_size, 1), pool_block=True, **kwargs)
+      return cls._instances[name]
+
+  def session(self, proxy=None, verify_ssl=True):
+    """A requests.Session sending through this adapter, optionally via a (SOCKS) proxy."""
+    session = requests.Session()
+    session.mount('https://', self)
+    session.mount('http://', self)
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    if proxy:
+      session.proxies = {'http': proxy, 'https': proxy}
+    session.verify = verify_ssl
+    return session
+
+  def connection_stats(self):
+    """(connections opened, requests sent) over the pools the adapter currently holds."""
+    opened = 0
+    sent = 0
+    for manager in (self.poolmanager, *self.proxy_manager.values()):
+      for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        if pool is not None:
+          opened += pool.num_connections
+          sent += pool.num_requests
+    return opened, sent
+
+  def summary(self):
+    opened, sent = self.connection_stats()
+    reused = f"{100 * (sent - opened) / sent:.0f}%" if sent else 'n/a'
+    return f"[{self.name}] HTTP requests: {self.requests_sent}, connections opened: {opened}, reused: {reused}"
+
+  def route_token(self, token, scheduler):
+    """Paces requests authenticated with token by scheduler."""
+    self._schedulers_by_token[token] = scheduler
+
+  def _scheduler_for(self, request):
+    if self._schedulers_by_token:
+      # 'token <value>' or 'Bearer <value>'
+      token = (request.headers.get('Authorization') or '').rpartition(' ')[2]
+      if token in self._schedulers_by_token:
+        return self._schedulers_by_token[token]
+    return self.scheduler
+
+  def send(self, request, **kwargs):
+    if kwargs.get('timeout') is None:
+      kwargs['timeout'] = self.timeout
+    with self._stats_lock:
+      self.requests_sent += 1
+    scheduler = self._scheduler_for(request)
+    if scheduler is None:
+      return self._send_cached(request, **kwargs)
+
+    for attempt in range(1, self.MAX_RATE_LIMIT_RETRIES + 1):
+      scheduler.acquire()
+      try:
+        response = self._send_cached(request, **kwargs)
+      except Exception:
+        scheduler.abort()
+        raise
+      body = response.text if response.status_code in (403, 429) else ''
+      rate_limited = scheduler.release(response.status_code, response.headers, body)
+      if not rate_limited or attempt == self.MAX_RATE_LIMIT_RETRIES:
+        return response
+      response.close()
+
+  def _send_cached(self, request, **kwargs):
+    if self.cache is None or request.method != 'GET' or kwargs.get('stream'):
+      return super().send(request, **kwargs)
+
+    accept = request.headers.get('Accept', '')
+    entry = self.cache.get(request.url, accept)
+    if entry:
+      if entry.get('etag') and 'If-None-Match' not in request.headers:
+        request.headers['If-None-Match'] = entry['etag']
+      if entry.get('last_modified') and 'If-Modified-Since' not in request.headers:
+        request.headers['If-Modified-Since'] = entry['last_modified']
+
+    response = super().send(request, **kwargs)
+    if entry and response.status_code == 304:
+      self.cache.record_hit()
+      return self._cached_response(request, response, entry)
+    if response.status_code == 200:
+      self.cache.record_miss()
+      self.cache.put(request.url, accept, response.headers, response.content)
+    return response
+
+  def _cached_response(self, request, not_modified, entry):
+    """Rebuilds a 200 response from the cache, keeping the fresh headers of the 304."""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.headers.update(not_modified.headers)
+    for name in ('Content-Encoding', 'Content-Length', 'Transfer-Encoding'):
+      response.headers.pop(name, None)
+    response._content = entry['body']
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.connection = self
+    response.elapsed = not_modified.elapsed
+    not_modified.close()
+    return response
+
+# The private Requester attribute holding the connection class of one client.
+_CONNECTION_CLASS_ATTRIBUTE = '_Requester__connectionClass'
+
+def mount_github_adapter(github_client, adapter):
+  """
+  Routes a PyGithub client's HTTPS traffic through adapter. PyGithub builds its own
+  requests.Session per connection and its only public hook,
+  Requester.injectConnectionClasses, is class-wide and also turns off connection
+  reuse, so this client's requester is given a connection class that mounts ours.
+  The private attribute is checked first, so a PyGithub release that renames it fails
+  here instead of silently bypassing the adapter (and its cache and rate limiting).
+  """
+  requester = github_client.requester
+  current = getattr(requester, _CONNECTION_CLASS_ATTRIBUTE, None)
+  if not (isinstance(current, type) and issubclass(current, HTTPSRequestsConnectionClass)):
+    raise RuntimeError(
+      f"This PyGithub version has no Requester.{_CONNECTION_CLASS_ATTRIBUTE} HTTPS connection class "
+      "to route requests through the shared adapter; pin pygithub to a version that does (2.x)."
+    )
+
+  class AdapterConnection(current):
+    def __init__(self, *args, **kwargs):
+      super().__init__(*args, **kwargs)
+      self.adapter = adapter
+      self.session.mount('https://', adapter)
+
+  setattr(requester, _CONNECTION_CLASS_ATTRIBUTE, AdapterConnection)
+  return github_client
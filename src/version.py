@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+
+from packaging.version import parse as parse_version, InvalidVersion
+
+def latest_version(tag_names):
+  """Returns the highest non-prerelease version among tag names (a leading v is ignored), or None."""
+  latest = None
+  for tag_name in tag_names:
+    try:
+      current = parse_version(tag_name.lstrip('vV'))
+    except InvalidVersion:
+      continue  # Ignore tags that are not valid versions
+    if not current.is_prerelease and (latest is None or current > latest):
+      latest = current
+  return latest
+
+def run_steps(steps, fetch):
+  """Drives a resolution generator (see VersionResolver.github_steps) with a blocking fetch."""
+  page_number = next(steps)
+  while True:
+    try:
+      page_number = steps.send(fetch(page_number))
+    except StopIteration as done:
+      return done.value
+
+class VersionResolver:
+  """
+  Finds a repository's latest version without paginating every tag when it can avoid it.
+
+  The first page of tags is always fetched, and when it is the whole tag list it is used
+  directly. For longer lists its first tag (name and commit SHA) keys a per-repository
+  cache, so a repository whose tags have not moved costs one call. On a cache miss
+  GitLab's tags are read in version order, where the answer is on the first page.
+  GitHub lists tags in no version order, so nothing short of every tag bounds the
+  answer (not even the latest release, which may be a backport such as v1.2.5
+  published after v2.0.0) and a cache miss there scans all tags.
+  The strategy that resolved each repository is stored with its cache entry and counted
+  for the summary.
+
+  Every resolution returns the tag names it read along with the version, so snapshots
+  keep the raw tags and --from-snapshot can re-run the version rules offline. Cache
+  entries keep them too, and a cache hit returns the tags of the scan that filled it.
+  """
+  PER_PAGE = 100
+
+  def __init__(self, cache_file=None):
+    self.cache_file = Path(cache_file) if cache_file else None
+    self.entries = {}
+    self.strategies = Counter()
+    self._lock = threading.Lock()
+    if self.cache_file and self.cache_file.exists():
+      try:
+        with open(self.cache_file, 'r') as f:
+          self.entries = json.load(f)
+      except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable version cache {self.cache_file}: {e}")
+
+  def save(self):
+    if not self.cache_file:
+      return
+    self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+    with self._lock, open(tmp_file, 'w') as f:
+      json.dump(self.entries, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, self.cache_file)
+
+  def summary(self):
+    counts = ', '.join(f"{strategy}: {count}" for strategy, count in sorted(self.strategies.items()))
+    return f"Version resolution strategies: {counts or 'none'}"
+
+  def _cached(self, key, head):
+    entry = self.entries.get(key)
+    # Entries written before tag names were cached cannot give them back, so they miss.
+    if entry and entry.get('head') == head and 'tag_names' in entry:
+      return entry
+    return None
+
+  def _hit(self, entry):
+    with self._lock:
+      self.strategies['cache'] += 1
+    return entry['version'], list(entry['tag_names'])
+
+  def _record(self, key, head, tag_names, strategy):
+    """(version, tag names) of a resolution, the version being the highest of tag_names."""
+    tag_names = list(tag_names)
+    version = latest_version(tag_names)
+    version = str(version) if version else None
+    with self._lock:
+      self.entries[key] = {'head': head, 'version': version, 'strategy': strategy, 'tag_names': tag_names}
+      self.strategies[strategy] += 1
+    return version, tag_names
+
+  def github_steps(self, key, pushed_at):
+    """
+    The GitHub resolution shared by the REST, async and GraphQL engines, as a generator
+    so each engine does the requests its own way (see run_steps). It yields the number
+    of each page of tags it needs, answered with (tags, more pages follow) where tags
+    are (name, commit SHA) pairs, and returns (version string, tag names).
+    """
+    first_page, more = yield 0
+    if not first_page:
+      return self._record(key, None, [], 'no-tags')
+
+    tag_names = [name for name, _ in first_page]
+    if not more:
+      return self._record(key, None, tag_names, 'tag-page')
+
+    # Tags are not ordered by creation, so the last push is part of the key too.
+    head = f"{first_page[0][0]}@{first_page[0][1]}@{pushed_at or ''}"
+    cached = self._cached(key, head)
+    if cached:
+      return self._hit(cached)
+
+    # The first page says nothing about the others, so every remaining page is read.
+    page_number = 1
+    while more:
+      page, more = yield page_number
+      tag_names.extend(name for name, _ in page)
+      page_number += 1
+    return self._record(key, head, tag_names, 'full-scan')
+
+  def resolve_github(self, repo):
+    """
+    (latest version string, tag names read) for a PyGithub repository; the version is
+    None when no tag is a version.
+    """
+    per_page = repo.requester.per_page
+    tags = repo.get_tags()
+
+    def fetch(page_number):
+      page = tags.get_page(page_number)
+      return [(tag.name, tag.commit.sha) for tag in page], len(page) == per_page
+
+    pushed_at = repo.pushed_at.isoformat() if repo.pushed_at else ''
+    return run_steps(self.github_steps(repo.html_url, pushed_at), fetch)
+
+  def resolve_gitlab(self, project):
+    """
+    (latest version string, tag names read) for a python-gitlab project; the version is
+    None when no tag is a version.
+    """
+    key = project.web_url
+    try:
+      # GitLab can sort tags by version, so the highest version is on the first page.
+      first_page = project.tags.list(order_by='version', sort='desc', per_page=self.PER_PAGE, page=1, get_all=False)
+      ordered = True
+    except Exception:
+      first_page = project.tags.list(per_page=self.PER_PAGE, page=1, get_all=False)
+      ordered = False
+    if not first_page:
+      return self._record(key, None, [], 'no-tags')
+
+    page_names = [tag.name for tag in first_page]
+    page_version = latest_version(page_names)
+    if len(first_page) < self.PER_PAGE:
+      return self._record(key, None, page_names, 'tag-page')
+
+    head = f"{first_page[0].name}@{first_page[0].commit['id']}" if ordered else None
+    cached = self._cached(key, head) if head else None
+    if cached:
+      return self._hit(cached)
+    if ordered and page_version:
+      # The highest version is on this page, so the page is all the rules need.
+      return self._record(key, head, page_names, 'ordered-tags')
+
+    tag_names = [tag.name for tag in project.tags.list(iterator=True, per_page=self.PER_PAGE)]
+    return self._record(key, head, tag_names, 'full-scan')
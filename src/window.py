@@ -0,0 +1,35 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+
+_END = object()
+
+class SubmissionWindow:
+  """
+  Feeds an executor from a (possibly lazy, paginated) iterable while keeping at most
+  max_pending tasks submitted but unfinished.
+
+  The next item is only pulled from the iterable when a slot frees up, so listing pages
+  are fetched as processing progresses and only about max_pending listing objects and
+  futures are alive at any time, however large the organization is.
+  """
+
+  def __init__(self, executor, max_pending):
+    self.executor = executor
+    self.max_pending = max(1, max_pending)
+
+  def map(self, fn, items):
+    """Yields (item, future) pairs in completion order as fn(item) finishes."""
+    pending = {}
+    items = iter(items)
+    exhausted = False
+    while pending or not exhausted:
+      while not exhausted and len(pending) < self.max_pending:
+        item = next(items, _END)
+        if item is _END:
+          exhausted = True
+        else:
+          pending[self.executor.submit(fn, item)] = item
+      if not pending:
+        break
+      done, _ = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        yield pending.pop(future), future
@@ -0,0 +1,44 @@
+import random
+import re
+from src.acronyms import AcronymMatcher
+from src.config import Config
+
+ORG_ACRONYMS = Config().get_app_config()['ORG_ACRONYMS']
+
+def loop_readme(text):
+  """The per-acronym search _infer_organization used to run."""
+  for acronym in ORG_ACRONYMS:
+    if re.search(r'\b' + re.escape(acronym.lower()) + r'\b', text.lower()):
+      return acronym
+  return None
+
+def loop_name(search_string):
+  for acronym in ORG_ACRONYMS:
+    lower = acronym.lower()
+    if (f"{lower}-" in search_string or f"-{lower}" in search_string or
+        f"/{lower}/" in search_string or search_string.endswith(f"/{lower}")):
+      return acronym
+  return None
+
+class TestAcronymMatcher:
+  def test_readme_priority_matches_config_order(self):
+    matcher = AcronymMatcher(ORG_ACRONYMS)
+    assert matcher.match_text("Built by CDC and the NCEZID team") == "ncezid"
+    assert matcher.match_text("Maintained by CSELS") == "cSELS"
+    assert matcher.match_text("influenza data from cdc.gov") == "cdc"
+    assert matcher.match_text("nothing relevant") is None
+
+  def test_agrees_with_per_acronym_search(self):
+    rng = random.Random(7)
+    words = list(ORG_ACRONYMS) + ["data", "flu", "ocio2", "od-ocio", "x_cdc", "Ncird.", "/cgh/"]
+    matcher = AcronymMatcher(ORG_ACRONYMS)
+    for _ in range(500):
+      text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+      assert matcher.match_text(text) == loop_readme(text), text
+      name = "https://github.com/cdcgov/" + "-".join(rng.choice(words) for _ in range(2)).lower()
+      assert matcher.match_name(name) == loop_name(name), name
+
+  def test_tags(self):
+    matcher = AcronymMatcher(ORG_ACRONYMS)
+    assert matcher.match_tags(["CDC", "NCHS"]) == "nchs"
+    assert matcher.match_tags(["python"]) is None
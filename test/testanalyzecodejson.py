@@ -0,0 +1,34 @@
+import json
+from analyze_code_json import analyze_files, field_values, to_json
+
+PROJECTS = [
+  {"name": "a", "privateID": "github_1", "status": "development", "languages": ["Python", "R"], "contact": {"email": "Team@CDC.gov"},
+   "repositoryVisibility": "private", "permissions": {"usageType": "exemptByCIO"}},
+  {"name": "b", "repositoryURL": "https://gitlab.example.gov/x/b", "status": "archived", "languages": ["Python"], "contact": {"email": "b@cdc.gov"},
+   "repositoryVisibility": "public", "permissions": {"usageType": "openSource"}},
+]
+
+def write_catalog(path, projects):
+  path.write_text(json.dumps({"version": "2.0", "measurementType": {"method": "projects"}, "projects": projects}))
+  return path
+
+class TestAnalyzeCodeJson:
+  def test_field_paths(self):
+    assert field_values(PROJECTS[0], "languages") == ["Python", "R"]
+    assert field_values(PROJECTS[0], "contact.email:domain") == ["cdc.gov"]
+    mixed = {"contact": {"email": "run7@cdc.gov;zmo2@CDC.gov, help@hhs.gov; ;lab@state.gov"}}
+    assert field_values(mixed, "contact.email:domain") == ["cdc.gov", "hhs.gov", "state.gov"]
+    assert field_values(PROJECTS[0], "platform") == ["GitHub"]
+    assert field_values(PROJECTS[1], "platform") == ["GitLab"]
+    assert field_values(PROJECTS[0], "homepageURL") == ["unknown"]
+
+  def test_cross_tab_over_several_files(self, tmp_path):
+    files = [write_catalog(tmp_path / "one.json", PROJECTS), write_catalog(tmp_path / "two.json", PROJECTS[:1])]
+
+    stats = analyze_files(files, group_by=["platform", "languages"], workers=2)
+
+    assert stats["total_projects"] == 3
+    assert stats["usage_type"] == {"exemptByCIO": 2, "openSource": 1}
+    assert stats["dimensions"]["languages"] == {"Python": 3, "R": 2}
+    assert stats["crosstab"] == {("GitHub", "Python"): 2, ("GitHub", "R"): 2, ("GitLab", "Python"): 1}
+    assert to_json(stats)["crosstab"][-1] == {"platform": "GitLab", "languages": "Python", "count": 1}
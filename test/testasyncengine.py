@@ -0,0 +1,104 @@
+import asyncio
+import base64
+from aiohttp import web
+from src.async_engine import AsyncScanner
+from src.ratelimit import RateLimitScheduler
+
+REPOS = [
+  {
+    "id": 1, "name": "ocio-tool", "full_name": "CDCgov/ocio-tool",
+    "html_url": "https://github.com/CDCgov/ocio-tool", "description": "A tool", "homepage": None,
+    "private": False, "archived": False, "fork": False, "size": 10,
+    "created_at": "2020-01-01T00:00:00Z", "pushed_at": "2099-01-01T00:00:00Z",
+    "license": {"name": "MIT License"}, "topics": [],
+  },
+  {
+    "id": 2, "name": "forked", "full_name": "CDCgov/forked",
+    "html_url": "https://github.com/CDCgov/forked", "description": None, "homepage": None,
+    "private": False, "archived": False, "fork": True, "size": 10,
+    "created_at": "2020-01-01T00:00:00Z", "pushed_at": "2099-01-01T00:00:00Z",
+    "license": None, "topics": [],
+  },
+]
+
+def encoded(text):
+  return {"content": base64.b64encode(text.encode()).decode()}
+
+async def run_scan(repos_listed=REPOS, max_in_flight=4, max_pending=None, active=None):
+  async def repos(request):
+    return web.json_response(repos_listed)
+
+  async def contents(request):
+    # No /graphql route here, so README and CODEOWNERS come from the REST fallback.
+    path = request.match_info["path"]
+    if path == "CODEOWNERS":
+      return web.json_response(encoded("* owner@cdc.gov\n"))
+    if path == "README.md":
+      if active is not None:
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+      if request.match_info["name"] == "ocio-tool":
+        return web.json_response(encoded("Tool\n====\n\nOrg: ocio\n"))
+    return web.json_response({"message": "Not Found"}, status=404)
+
+  async def languages(request):
+    return web.json_response({"Python": 100, "Shell": 5})
+
+  async def tags(request):
+    if request.query.get("page") == "2":
+      return web.json_response([{"name": "v1.10.0"}])
+    next_url = f"{request.url.with_query({'per_page': 100, 'page': 2})}"
+    return web.json_response([{"name": "v1.2.0"}], headers={"Link": f'<{next_url}>; rel="next"'})
+
+  app = web.Application()
+  app.router.add_get("/orgs/CDCgov/repos", repos)
+  app.router.add_get("/repos/CDCgov/{name}/contents/{path}", contents)
+  app.router.add_get("/repos/CDCgov/{name}/languages", languages)
+  app.router.add_get("/repos/CDCgov/{name}/tags", tags)
+  runner = web.AppRunner(app)
+  await runner.setup()
+  site = web.TCPSite(runner, "127.0.0.1", 0)
+  await site.start()
+  port = site._server.sockets[0].getsockname()[1]
+  try:
+    scanner = AsyncScanner("ghp_test", max_in_flight=max_in_flight, api_url=f"http://127.0.0.1:{port}", max_pending=max_pending)
+    return await scanner.scan("CDCgov")
+  finally:
+    await runner.cleanup()
+
+class TestAsyncScanner:
+  def test_scan_applies_sanitizer_rules(self):
+    records = asyncio.run(run_scan())
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["name"] == "ocio-tool"
+    assert record["organization"] == "ocio"
+    assert record["version"] == "1.10.0"
+    assert record["languages"] == ["Python", "Shell"]
+    assert record["contact"]["email"] == "owner@cdc.gov"
+    assert record["permissions"]["usageType"] == "openSource"
+
+  def test_scan_bounds_repositories_in_flight(self):
+    repos = [dict(REPOS[0], id=n, name=f"tool-{n}", full_name=f"CDCgov/tool-{n}", html_url=f"https://github.com/CDCgov/tool-{n}") for n in range(12)]
+    active = {"now": 0, "peak": 0}
+    records = asyncio.run(run_scan(repos, max_in_flight=100, max_pending=3, active=active))
+
+    assert active["peak"] <= 3
+    assert [record["name"] for record in records] == [f"tool-{n}" for n in range(12)]
+
+  def test_failed_request_frees_its_scheduler_slot(self):
+    class TimingOutSession:
+      def get(self, url, params=None):
+        raise asyncio.TimeoutError()
+
+    scheduler = RateLimitScheduler.for_github('test-timeout', max_concurrency=1)
+    scanner = AsyncScanner("ghp_test", scheduler=scheduler)
+    scanner._semaphore = asyncio.Semaphore(1)
+    try:
+      asyncio.run(scanner._request(TimingOutSession(), "http://127.0.0.1/repos"))
+    except asyncio.TimeoutError:
+      pass
+    assert scheduler._in_flight == 0
@@ -0,0 +1,40 @@
+import gzip
+import json
+from src.browser import BrowserArtifacts, TABLE_COLUMNS, table_row
+
+def project(number, usage_type="openSource"):
+  return {"name": f"tool-{number}", "organization": "OCIO", "privateID": f"github_{number}", "repositoryURL": "",
+          "contact": {"email": "a@cdc.gov"}, "permissions": {"usageType": usage_type}, "status": "development"}
+
+def write_catalog(path, projects):
+  path.write_text(json.dumps({"version": "2.0", "measurementType": {"method": "projects"}, "projects": projects}, indent=2))
+  return path
+
+class TestBrowserArtifacts:
+  def test_table_and_detail_shards(self, tmp_path):
+    projects = [project(number) for number in range(4)] + [project(4, "exemptByCIO")]
+    code_json = write_catalog(tmp_path / "code.json", projects)
+
+    assert BrowserArtifacts(tmp_path / "browser", shard_size=2).write(code_json) == (5, 3)
+
+    table = json.loads((tmp_path / "browser" / "table.json").read_text())
+    assert table["columns"] == TABLE_COLUMNS and table["shardSize"] == 2 and table["total"] == 5
+    assert table["rows"][4] == ["tool-4", "OCIO", "GitHub", "N", "a@cdc.gov", "exemptByCIO", "", "development"]
+    assert table["rows"][0][3] == "Y" and table["rows"][0][5] == ""
+    assert json.loads((tmp_path / "browser" / "details" / "2.json").read_text()) == projects[4:]
+    assert gzip.decompress((tmp_path / "browser" / "table.json.gz").read_bytes()) == (tmp_path / "browser" / "table.json").read_bytes()
+
+  def test_leftover_shards_are_removed(self, tmp_path):
+    browser = BrowserArtifacts(tmp_path / "browser", shard_size=1)
+    browser.write(write_catalog(tmp_path / "code.json", [project(0), project(1), project(2)]))
+    browser.write(write_catalog(tmp_path / "code.json", [project(0)]))
+    assert sorted(path.name for path in (tmp_path / "browser" / "details").iterdir()) == ["0.json", "0.json.gz"]
+
+class TestTableRow:
+  def test_platform_from_private_id_and_platform_fields(self):
+    gitlab = {"name": "pipeline", "private_id": "gitlab_42", "repositoryURL": "https://cdcgov.github.io/ShareIT-Act/assets/files/instructions.pdf",
+              "repositoryVisibility": "private", "permissions": {"usageType": "exemptByCIO"}}
+    ado = {"name": "portal", "platform": "Azure DevOps", "repositoryURL": "", "permissions": {"usageType": "exemptByCIO"}}
+    assert table_row(gitlab)[TABLE_COLUMNS.index("Platform")] == "GitLab"
+    assert table_row(ado)[TABLE_COLUMNS.index("Platform")] == "ADO"
+    assert table_row({"name": "unknown"})[TABLE_COLUMNS.index("Platform")] == "Unknown"
@@ -0,0 +1,89 @@
+import csv
+import json
+from src.catalog import CatalogStore
+
+def record(private_id, updated, name="tool", usage_type="openSource", url=None):
+  return {
+    "name": name,
+    "privateID": private_id,
+    "repositoryURL": url or f"https://github.com/CDCgov/{name}",
+    "organization": "CDCgov",
+    "permissions": {"usageType": usage_type, "exemptionText": "Internal only" if usage_type.startswith("exempt") else None},
+    "contact": {"email": "team@cdc.gov"},
+    "date": {"metadataLastUpdated": updated},
+  }
+
+def write(path, records):
+  path.write_text(json.dumps(records, indent=2))
+  return path
+
+class TestCatalogStore:
+  def test_sync_upserts_and_removes_unlisted(self, tmp_path):
+    catalog = CatalogStore(tmp_path / "catalog.sqlite3")
+    raw = write(tmp_path / "repo-CDCgov.json", [record("github_1", "2024-01-01T00:00:00Z", "a"), record("github_2", "2024-01-01T00:00:00Z", "b")])
+    assert catalog.sync_file(raw) == (2, 0)
+
+    write(raw, [record("github_1", "2024-02-01T00:00:00Z", "renamed")])
+    assert catalog.sync_file(raw) == (1, 1)
+
+    assert len(catalog) == 1
+    assert catalog.get("github_1")["name"] == "renamed"
+    assert catalog.get("github_2") is None
+    assert catalog.count_by("platform") == {"GitHub": 1}
+
+  def test_newer_record_from_another_source_wins(self, tmp_path):
+    catalog = CatalogStore(tmp_path / "catalog.sqlite3")
+    catalog.sync_file(write(tmp_path / "repo-a.json", [record("github_1", "2024-06-01T00:00:00Z", "new")]))
+    catalog.sync_file(write(tmp_path / "repo-b.json", [record("github_1", "2024-01-01T00:00:00Z", "old")]))
+    assert catalog.get("github_1")["name"] == "new"
+
+  def test_first_seen_and_exemption_dates_survive_rescans(self, tmp_path):
+    catalog = CatalogStore(tmp_path / "catalog.sqlite3")
+    raw = tmp_path / "repo-CDCgov.json"
+    catalog.sync_file(write(raw, [record("github_1", "2024-01-01T00:00:00Z", usage_type="exemptByLaw")]))
+    before = catalog.connection.execute("SELECT first_seen, exempted_at FROM projects").fetchone()
+    catalog.sync_file(write(raw, [record("github_1", "2024-02-01T00:00:00Z", usage_type="exemptByLaw")]))
+    assert catalog.connection.execute("SELECT first_seen, exempted_at FROM projects").fetchone() == before
+
+    catalog.sync_file(write(raw, [record("github_1", "2024-03-01T00:00:00Z")]))
+    first_seen, exempted_at = catalog.connection.execute("SELECT first_seen, exempted_at FROM projects").fetchone()
+    assert first_seen == before[0] and exempted_at is None
+
+  def test_exports(self, tmp_path):
+    catalog = CatalogStore(tmp_path / "catalog.sqlite3")
+    records = [record("github_2", "2024-01-01T00:00:00Z", "b", usage_type="exemptByLaw"), record("github_1", "2024-01-01T00:00:00Z", "a")]
+    catalog.sync_file(write(tmp_path / "repo-CDCgov.json", records))
+
+    assert catalog.export_code_json(tmp_path / "code.json") == 2
+    expected = {"version": "2.0", "agency": "CDC", "measurementType": {"method": "projects"}, "projects": records[::-1]}
+    assert (tmp_path / "code.json").read_text() == json.dumps(expected, indent=2)
+
+    catalog.export_mapping_csv(tmp_path / "mapping.csv")
+    with open(tmp_path / "mapping.csv", newline="") as f:
+      rows = list(csv.DictReader(f))
+    assert {row["PrivateID"]: (row["RepositoryName"], row["Organization"]) for row in rows} == {"github_1": ("a", "CDCgov"), "github_2": ("b", "CDCgov")}
+
+    assert catalog.export_exemption_log(tmp_path / "exempted_log.csv") == 1
+    with open(tmp_path / "exempted_log.csv", newline="") as f:
+      (row,) = csv.DictReader(f)
+    assert (row["privateID"], row["usageType"], row["exemptionText"]) == ("github_2", "exemptByLaw", "Internal only")
+
+  def test_exports_keep_existing_dates(self, tmp_path):
+    catalog = CatalogStore(tmp_path / "catalog.sqlite3")
+    catalog.sync_file(write(tmp_path / "repo-CDCgov.json", [
+      record("github_1", "2024-01-01T00:00:00Z", "a", usage_type="exemptByLaw"), record("github_2", "2024-01-01T00:00:00Z", "b"),
+    ]))
+    mapping = tmp_path / "privateid_mapping.csv"
+    mapping.write_text("PrivateID,RepositoryName,RepositoryURL,Organization,ContactEmails,DateAdded\r\n"
+                       "github_1,a,https://github.com/CDCgov/a,CDCgov,team@cdc.gov,2025-07-03T19:50:06.799748\r\n", newline="")
+    log = tmp_path / "exempted_log.csv"
+    log.write_text("privateID,repositoryName,usageType,exemptionText,timestamp\n"
+                   "github_1,a,exemptByLaw,Internal only,2025-06-07T20:35:35.647087+00:00\n")
+
+    assert catalog.export_mapping_csv(mapping) == 1
+    assert catalog.export_exemption_log(log) == 0
+
+    with open(mapping, newline="") as f:
+      dates = {row["PrivateID"]: row["DateAdded"] for row in csv.DictReader(f)}
+    assert dates["github_1"] == "2025-07-03T19:50:06.799748" and dates["github_2"] != dates["github_1"]
+    assert log.read_text().endswith("github_1,a,exemptByLaw,Internal only,2025-06-07T20:35:35.647087+00:00\n")
@@ -0,0 +1,68 @@
+import json
+from src.checkpoint import Checkpoint
+from src.content_hash import content_hash
+
+RECORDS = [
+  {"name": "tool", "tags": ["ocio"], "contact": {"email": "a@cdc.gov"}, "description": "line\nbreak"},
+  {"name": "other", "tags": [], "permissions": {"licenses": [{"name": "MIT"}]}},
+]
+
+def hashed(records):
+  return [dict(record, contentHash=content_hash(record)) for record in records]
+
+def scan(tmp_path, records):
+  checkpoint = Checkpoint(tmp_path / "repo-org.ndjson")
+  for repo_id, record in enumerate(records):
+    checkpoint.append(repo_id, record)
+  checkpoint.write_json(tmp_path / "repo-org.json")
+  return json.loads((tmp_path / "repo-org.json").read_text())
+
+def keyed(private_id, updated, description="tool"):
+  return {"name": private_id, "privateID": private_id, "description": description, "date": {"metadataLastUpdated": updated}}
+
+class TestCheckpoint:
+  def test_conversion_matches_json_dump(self, tmp_path):
+    checkpoint = Checkpoint(tmp_path / "repo-org.ndjson")
+    for repo_id, record in enumerate(RECORDS):
+      checkpoint.append(repo_id, record)
+    output_file = tmp_path / "repo-org.json"
+
+    assert checkpoint.write_json(output_file) == 2
+    assert output_file.read_text() == json.dumps(hashed(RECORDS), indent=2)
+    assert not checkpoint.path.exists()
+
+  def test_empty_scan_writes_empty_array(self, tmp_path):
+    checkpoint = Checkpoint(tmp_path / "repo-org.ndjson")
+    output_file = tmp_path / "repo-org.json"
+    assert checkpoint.write_json(output_file) == 0
+    assert output_file.read_text() == "[]"
+
+  def test_resume_skips_done_ids_and_truncated_line(self, tmp_path):
+    path = tmp_path / "repo-org.ndjson"
+    checkpoint = Checkpoint(path)
+    checkpoint.append(1, RECORDS[0])
+    checkpoint.close()
+    with open(path, "a") as f:
+      f.write('{"id": 2, "rec')
+
+    resumed = Checkpoint(path, resume=True)
+    assert 1 in resumed and 2 not in resumed
+    resumed.append(2, RECORDS[1])
+    output_file = tmp_path / "repo-org.json"
+    assert resumed.write_json(output_file) == 2
+    assert json.loads(output_file.read_text()) == hashed(RECORDS)
+
+  def test_without_resume_starts_over(self, tmp_path):
+    path = tmp_path / "repo-org.ndjson"
+    Checkpoint(path).append(1, RECORDS[0])
+    assert len(Checkpoint(path)) == 0
+
+  def test_records_are_ordered_by_key(self, tmp_path):
+    records = scan(tmp_path, [RECORDS[0], keyed("github_2", "t1"), keyed("github_1", "t1"), RECORDS[1]])
+    assert [record["name"] for record in records] == ["github_1", "github_2", "tool", "other"]
+
+  def test_metadata_date_only_advances_on_change(self, tmp_path):
+    scan(tmp_path, [keyed("github_1", "t1"), keyed("github_2", "t1")])
+    records = scan(tmp_path, [keyed("github_1", "t2"), keyed("github_2", "t2", description="changed")])
+    assert [record["date"]["metadataLastUpdated"] for record in records] == ["t1", "t2"]
+    assert records[0]["contentHash"] == content_hash(keyed("github_1", "t9"))
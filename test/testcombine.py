@@ -0,0 +1,83 @@
+import json
+from src.combine import Combine
+from src.jsonio import iter_json_array
+
+def record(private_id, updated, name="tool"):
+  return {"name": name, "privateID": private_id, "date": {"metadataLastUpdated": updated}}
+
+class TestIterJsonArray:
+  def test_items_split_across_chunks(self, tmp_path):
+    records = [{"id": i, "text": "x" * (i * 37 % 300), "nested": [None, {"a": i}]} for i in range(50)]
+    path = tmp_path / "repo-a.json"
+    path.write_text(json.dumps(records, indent=2))
+    assert list(iter_json_array(path, chunk_size=16)) == records
+
+class TestCombine:
+  def test_newest_duplicate_wins(self, tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "repo-a.json").write_text(json.dumps([record("github_1", "2024-01-01T00:00:00+00:00", "old"), record("github_2", "2024-01-01T00:00:00Z")]))
+    (raw / "repo-b.json").write_text(json.dumps([record("github_1", "2024-06-01T00:00:00Z", "new"), {"name": "no key"}]))
+
+    Combine().combine_json_files(raw, tmp_path)
+
+    projects = json.loads((tmp_path / "code.json").read_text())["projects"]
+    assert [project["name"] for project in projects] == ["tool", "new", "no key"]
+
+  def test_output_matches_json_dump_layout(self, tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    records = [record("github_1", "2024-01-01T00:00:00Z"), record("github_2", "2024-01-01T00:00:00Z")]
+    (raw / "repo-a.json").write_text(json.dumps(records, indent=2))
+
+    Combine().combine_json_files(raw, tmp_path)
+
+    expected = json.dumps({"version": "2.0", "agency": "CDC", "measurementType": {"method": "projects"}, "projects": records}, indent=2)
+    assert (tmp_path / "code.json").read_text() == expected
+
+  def test_batches_match_json_dump_layout(self, tmp_path, monkeypatch):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    records = [record(f"github_{number}", "2024-01-01T00:00:00Z", f"tool {number}") for number in range(7)]
+    (raw / "repo-a.json").write_text(json.dumps(records[:4]))
+    (raw / "repo-b.json").write_text(json.dumps(records[4:] + [record("github_0", "2023-01-01T00:00:00Z", "older")]))
+    monkeypatch.setattr(Combine, "RENDER_BATCH", 3)
+
+    Combine().combine_json_files(raw, tmp_path / "indented")
+    Combine().combine_json_files(raw, tmp_path / "compact", indent=False)
+
+    expected = {"version": "2.0", "agency": "CDC", "measurementType": {"method": "projects"}, "projects": records}
+    assert (tmp_path / "indented" / "code.json").read_text() == json.dumps(expected, indent=2)
+    assert (tmp_path / "compact" / "code.json").read_text() == json.dumps(expected, separators=(",", ":"))
+
+  def test_unpublished_fields_are_dropped(self, tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    private = dict(record("github_1", "2024-01-01T00:00:00Z"), privateRepositoryURL="https://github.com/CDCgov/secret", platformDescription="")
+    (raw / "repo-a.json").write_text(json.dumps([private]))
+
+    Combine().combine_json_files(raw, tmp_path)
+
+    (project,) = json.loads((tmp_path / "code.json").read_text())["projects"]
+    assert "privateRepositoryURL" not in project and "platformDescription" not in project
+
+  def test_pooled_index_matches_single_process(self, tmp_path, monkeypatch):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "repo-a.json").write_text(json.dumps([record("github_1", "2024-01-01T00:00:00Z", "old"), record("github_2", "2024-01-01T00:00:00Z")]))
+    (raw / "repo-b.json").write_text(json.dumps([record("github_1", "2024-06-01T00:00:00Z", "new"), {"name": "no key"}]))
+    (raw / "repo-c.json").write_text(json.dumps([record("github_2", "2023-01-01T00:00:00Z", "older")]))
+
+    Combine().combine_json_files(raw, tmp_path / "single")
+    monkeypatch.setattr("src.combine.os.cpu_count", lambda: 4)
+    assert Combine.index_processes(10, 3) == 3
+    Combine().combine_json_files(raw, tmp_path / "pooled", workers=10)
+
+    assert (tmp_path / "pooled" / "code.json").read_text() == (tmp_path / "single" / "code.json").read_text()
+
+  def test_no_pool_on_one_cpu_or_file(self, monkeypatch):
+    monkeypatch.setattr("src.combine.os.cpu_count", lambda: 1)
+    assert Combine.index_processes(10, 20) == 1
+    monkeypatch.setattr("src.combine.os.cpu_count", lambda: 8)
+    assert Combine.index_processes(10, 1) == 1
+    assert Combine.index_processes(1, 20) == 1
@@ -0,0 +1,44 @@
+import json
+from diff_code_json import diff_code_json, to_markdown
+
+def project(private_id, name, tags=(), updated="2024-01-01T00:00:00Z"):
+  return {"name": name, "privateID": private_id, "tags": list(tags), "date": {"created": "2020", "metadataLastUpdated": updated}}
+
+def write_catalog(path, projects):
+  path.write_text(json.dumps({"version": "2.0", "agency": "CDC", "measurementType": {"method": "projects"}, "projects": projects}, indent=2))
+  return path
+
+class TestDiffCodeJson:
+  def test_added_removed_and_field_deltas(self, tmp_path):
+    old = write_catalog(tmp_path / "old.json", [project("github_1", "same"), project("github_2", "gone"), project("github_3", "tool", ["a"])])
+    new = write_catalog(tmp_path / "new.json", [
+      project("github_1", "same", updated="2024-06-01T00:00:00Z"),
+      project("github_3", "tool-renamed", ["a", "b"]),
+      project("github_4", "fresh"),
+    ])
+
+    diff = diff_code_json(old, new)
+
+    assert diff["summary"] == {"old_total": 3, "new_total": 3, "old_duplicates": 0, "new_duplicates": 0, "added": 1, "removed": 1, "modified": 1, "unchanged": 1}
+    assert [item["key"] for item in diff["added"]] == ["github_4"]
+    assert [item["name"] for item in diff["removed"]] == ["gone"]
+    (modified,) = diff["modified"]
+    assert modified["changes"] == [
+      {"field": "name", "old": "tool", "new": "tool-renamed"},
+      {"field": "tags", "old": ["a"], "new": ["a", "b"], "added": ["b"], "removed": []},
+    ]
+    report = to_markdown(diff)
+    assert "## Modified (1)" in report and "| name | tool | tool-renamed |" in report
+
+  def test_duplicate_keys_are_counted_and_reported(self, tmp_path):
+    old = write_catalog(tmp_path / "old.json", [project("github_1", "a"), project("github_1", "a again"), project("github_2", "b")])
+    new = write_catalog(tmp_path / "new.json", [project("github_1", "a"), project("github_3", "c"), project("github_3", "c again")])
+
+    diff = diff_code_json(old, new)
+
+    summary = diff["summary"]
+    assert summary == {"old_total": 3, "new_total": 3, "old_duplicates": 1, "new_duplicates": 1, "added": 1, "removed": 1, "modified": 0, "unchanged": 1}
+    assert summary["new_total"] - summary["new_duplicates"] == summary["added"] + summary["modified"] + summary["unchanged"]
+    assert summary["old_total"] - summary["old_duplicates"] == summary["removed"] + summary["modified"] + summary["unchanged"]
+    assert diff["duplicates"] == {"old": ["github_1"], "new": ["github_3"]}
+    assert "| old | github_1 |" in to_markdown(diff)
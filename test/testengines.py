@@ -0,0 +1,135 @@
+import asyncio
+from unittest.mock import MagicMock
+from aiohttp import web
+from src.async_engine import AsyncScanner
+from src.graphql import GraphqlFetcher
+from src.incremental import PreviousScan
+from src.repo_files import README_PATHS, GITHUB_CODEOWNERS_PATHS
+from src.sanitize import Sanitizer
+from src.version import VersionResolver
+
+# One repository whose README and CODEOWNERS are outside the root and whose highest
+# version is past the first page of tags.
+REPO = {
+  "id": 7, "name": "ocio-tool", "full_name": "CDCgov/ocio-tool",
+  "html_url": "https://github.com/CDCgov/ocio-tool", "description": None, "homepage": None,
+  "private": False, "archived": False, "fork": False, "size": 10,
+  "created_at": "2020-01-01T00:00:00Z", "pushed_at": "2099-01-01T00:00:00Z",
+  "license": {"name": "MIT License"}, "topics": ["surveillance"],
+}
+FILES = {
+  ".github/README.md": "Tool\n====\n\nOrg: ocio\nStatus: Production\n",
+  "docs/CODEOWNERS": "* owner@cdc.gov\n",
+}
+LANGUAGES = {"Python": 100, "Shell": 5}
+TAG_PAGES = [["v1.2.0", "v1.1.0"], ["v3.0.0", "v0.1.0"]]
+
+def file_blobs():
+  node = {}
+  for prefix, paths in (("readme", README_PATHS), ("codeowners", GITHUB_CODEOWNERS_PATHS)):
+    for index, path in enumerate(paths):
+      node[f"{prefix}{index}"] = {"text": FILES[path]} if path in FILES else None
+  return node
+
+def refs(page_number):
+  more = page_number + 1 < len(TAG_PAGES)
+  return {
+    "pageInfo": {"hasNextPage": more, "endCursor": f"c{page_number}"},
+    "nodes": [{"name": name, "target": {"oid": "abc"}} for name in TAG_PAGES[page_number]],
+  }
+
+def rest_scan():
+  snapshot = AsyncScanner.snapshot_from_rest(REPO)
+  repo = MagicMock(created_at=snapshot.created_at, pushed_at=snapshot.pushed_at, license=snapshot.license)
+  for field in snapshot.FIELDS:
+    setattr(repo, field, getattr(snapshot, field))
+  repo.requester.per_page = 2
+  repo.requester.graphql_query.return_value = ({}, {"data": {"repository": file_blobs()}})
+  repo.get_languages.return_value = LANGUAGES
+  repo.get_topics.return_value = REPO["topics"]
+  pages = [[MagicMock(commit=MagicMock(sha="abc")) for _ in page] for page in TAG_PAGES]
+  for page, names in zip(pages, TAG_PAGES):
+    for tag, name in zip(page, names):
+      tag.name = name
+  repo.get_tags.return_value.get_page.side_effect = lambda n: pages[n] if n < len(pages) else []
+  recorder = MagicMock()
+  record = Sanitizer(version_resolver=VersionResolver(), snapshot_recorder=recorder).get_repository_metadata(repo)
+  return record, recorder.add.call_args[0][0]
+
+def graphql_scan():
+  node = dict(
+    file_blobs(),
+    databaseId=REPO["id"], name=REPO["name"], nameWithOwner=REPO["full_name"], url=REPO["html_url"],
+    description=REPO["description"], homepageUrl=REPO["homepage"], isPrivate=False, isArchived=False,
+    isFork=False, isEmpty=False, diskUsage=REPO["size"], createdAt=REPO["created_at"], pushedAt=REPO["pushed_at"],
+    licenseInfo=REPO["license"], refs=refs(0),
+    languages={"nodes": [{"name": name} for name in LANGUAGES]},
+    repositoryTopics={"nodes": [{"topic": {"name": name}} for name in REPO["topics"]]},
+  )
+  client = MagicMock()
+  client.requester.graphql_query.side_effect = lambda query, variables: ({}, {"data": {"repository": {"refs": refs(int(variables["after"][1:]) + 1)}}})
+  fetcher = GraphqlFetcher(client, version_resolver=VersionResolver())
+  snapshot = fetcher.snapshot_from_node(node)
+  return Sanitizer().get_snapshot_metadata(snapshot), snapshot
+
+async def async_scan():
+  async def repos(request):
+    return web.json_response([REPO])
+
+  async def graphql(request):
+    return web.json_response({"data": {"repository": file_blobs()}})
+
+  async def languages(request):
+    return web.json_response(LANGUAGES)
+
+  async def tags(request):
+    page_number = int(request.query.get("page", "1")) - 1
+    page = [{"name": name, "commit": {"sha": "abc"}} for name in TAG_PAGES[page_number]]
+    if page_number + 1 < len(TAG_PAGES):
+      next_url = f"{request.url.with_query({'per_page': 100, 'page': page_number + 2})}"
+      return web.json_response(page, headers={"Link": f'<{next_url}>; rel="next"'})
+    return web.json_response(page)
+
+  app = web.Application()
+  app.router.add_get("/orgs/CDCgov/repos", repos)
+  app.router.add_post("/graphql", graphql)
+  app.router.add_get("/repos/CDCgov/{name}/languages", languages)
+  app.router.add_get("/repos/CDCgov/{name}/tags", tags)
+  runner = web.AppRunner(app)
+  await runner.setup()
+  site = web.TCPSite(runner, "127.0.0.1", 0)
+  await site.start()
+  port = site._server.sockets[0].getsockname()[1]
+  try:
+    scanner = AsyncScanner("ghp_test", max_in_flight=4, api_url=f"http://127.0.0.1:{port}", version_resolver=VersionResolver())
+    scanner.sanitizer.snapshot_recorder = recorder = MagicMock()
+    (record,) = await scanner.scan("CDCgov")
+    return record, recorder.add.call_args[0][0]
+  finally:
+    await runner.cleanup()
+
+def comparable(record):
+  record = dict(record, date=dict(record["date"]))
+  record["date"].pop("metadataLastUpdated", None)
+  return record
+
+class TestEngineEquivalence:
+  def test_rest_async_and_graphql_build_the_same_record(self):
+    rest, rest_snapshot = rest_scan()
+    async_record, async_snapshot = asyncio.run(async_scan())
+    graphql_record, graphql_snapshot = graphql_scan()
+
+    assert rest["version"] == "3.0.0"
+    assert rest["organization"] == "ocio"
+    assert rest["contact"]["email"] == "owner@cdc.gov"
+    assert comparable(async_record) == comparable(rest)
+    assert comparable(graphql_record) == comparable(rest)
+    # The description comes from the README, so --incremental matches on the platform's.
+    assert rest["platformDescription"] == ""
+    assert PreviousScan([rest]).match_github(rest_snapshot) is rest
+
+    # Every engine keeps every tag it read, so the rules can be re-run offline.
+    all_tags = [name for page in TAG_PAGES for name in page]
+    for snapshot in (rest_snapshot, async_snapshot, graphql_snapshot):
+      assert snapshot.tag_names == all_tags
+      assert comparable(Sanitizer().get_snapshot_metadata(snapshot)) == comparable(rest)
@@ -0,0 +1,17 @@
+import pytest
+from argparse import Namespace
+from src.gitlab.main import parse_targets
+
+class TestParseTargets:
+  def test_single_url_falls_back_to_env_group(self, monkeypatch):
+    monkeypatch.setenv("GL_GROUP_ID", "12")
+    assert parse_targets(Namespace(url=["https://git.cdc.gov"], group_id=None)) == [("https://git.cdc.gov", "12")]
+
+  def test_urls_pair_with_group_ids_in_order(self):
+    args = Namespace(url=["https://git.cdc.gov", "https://gitlab.com"], group_id=["", "34"])
+    assert parse_targets(args) == [("https://git.cdc.gov", None), ("https://gitlab.com", "34")]
+
+  def test_mismatched_group_ids_exit(self):
+    args = Namespace(url=["https://git.cdc.gov", "https://gitlab.com"], group_id=["34"])
+    with pytest.raises(SystemExit):
+      parse_targets(args)
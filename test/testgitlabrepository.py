@@ -0,0 +1,26 @@
+from unittest.mock import MagicMock
+from gitlab.exceptions import GitlabListError
+from src.gitlab.repository import GitlabRepository
+
+def listing(items, total=None):
+  projects = MagicMock(total=total)
+  projects.__iter__.return_value = iter(items)
+  return projects
+
+class TestIterProjects:
+  def test_uses_keyset_pagination_lazily(self):
+    manager = MagicMock()
+    manager.list.return_value = listing([1, 2, 3])
+
+    projects = GitlabRepository().iter_projects(manager, membership=True)
+    manager.list.assert_not_called()
+
+    assert list(projects) == [1, 2, 3]
+    manager.list.assert_called_once_with(iterator=True, per_page=100, pagination="keyset", order_by="id", sort="asc", membership=True)
+
+  def test_falls_back_to_offset_when_keyset_is_refused(self):
+    manager = MagicMock()
+    manager.list.side_effect = [GitlabListError("Keyset pagination is not yet available", response_code=405), listing([4], total=1)]
+
+    assert list(GitlabRepository().iter_projects(manager, include_subgroups=True)) == [4]
+    assert "pagination" not in manager.list.call_args.kwargs
@@ -0,0 +1,72 @@
+import gitlab
+from unittest.mock import MagicMock, patch
+from gitlab.v4.objects import GroupProject, Project
+from src.gitlab.sanitize import GitlabSanitizer
+
+ATTRIBUTES = {
+  "id": 42, "name": "pipeline", "path_with_namespace": "cdc/pipeline", "web_url": "https://gitlab.com/cdc/pipeline",
+  "visibility": "public", "archived": False, "description": "Data pipeline", "topics": ["ncezid"],
+  "created_at": "2020-01-01T00:00:00Z", "last_activity_at": "2099-01-01T00:00:00Z",
+  "license": {"key": "mit", "name": "MIT License"}, "empty_repo": False,
+}
+
+def group_listing_entry(**overrides):
+  gl = gitlab.Gitlab("https://gitlab.com")
+  group = gl.groups.get(7, lazy=True)
+  return GroupProject(group.projects, {**ATTRIBUTES, **overrides})
+
+class TestGitlabSanitizer:
+  def test_listing_entry_is_used_without_refetch(self):
+    recorder = MagicMock()
+    sanitizer = GitlabSanitizer(version_resolver=MagicMock(resolve_gitlab=MagicMock(return_value=("1.0.0", ["v1.0.0", "nightly"]))),
+                                snapshot_recorder=recorder)
+    entry = group_listing_entry()
+    with patch.object(gitlab.v4.objects.ProjectManager, "get") as get, \
+         patch.object(Project, "repository_tree", return_value=[]), \
+         patch.object(GitlabSanitizer, "_get_file_content", return_value=None), \
+         patch.object(Project, "languages", return_value={"Python": 90.0}):
+      record = sanitizer.get_repository_metadata(entry)
+
+    get.assert_not_called()
+    assert record["permissions"]["licenses"] == [{"name": "MIT License"}]
+    assert record["permissions"]["usageType"] == "openSource"
+    assert record["languages"] == ["Python"]
+    assert record["version"] == "1.0.0"
+    assert recorder.add.call_args[0][0].tag_names == ["v1.0.0", "nightly"]
+
+  def test_public_project_without_listed_license_is_fetched(self):
+    sanitizer = GitlabSanitizer()
+    entry = group_listing_entry()
+    entry._attrs.pop("license")
+    with patch.object(gitlab.v4.objects.ProjectManager, "get") as get:
+      sanitizer._project_from_listing(entry)
+    get.assert_called_once_with(42, license=True)
+
+  def test_empty_repository_skips_content_calls(self):
+    sanitizer = GitlabSanitizer()
+    entry = group_listing_entry(empty_repo=True)
+    with patch.object(GitlabSanitizer, "_get_file_content") as get_file:
+      record = sanitizer.get_repository_metadata(entry)
+    get_file.assert_not_called()
+    assert record["version"] == "N/A"
+
+  def test_files_are_fetched_only_where_the_tree_lists_them(self):
+    sanitizer = GitlabSanitizer()
+    trees = {
+      "": [{"path": "README.rst"}, {"path": ".gitlab"}, {"path": "src"}],
+      ".gitlab": [{"path": ".gitlab/CODEOWNERS"}],
+    }
+    project = MagicMock(path_with_namespace="cdc/pipeline", default_branch="main")
+    project.repository_tree.side_effect = lambda path, **kwargs: trees[path]
+    fetched = []
+    def get_file(project, path):
+      fetched.append(path)
+      return f"contents of {path}"
+
+    with patch.object(GitlabSanitizer, "_get_file_content", side_effect=get_file):
+      listings = {}
+      assert sanitizer._first_file_content(project, ("README.md", "README.rst"), listings) == "contents of README.rst"
+      assert sanitizer._first_file_content(project, ("CODEOWNERS", ".gitlab/CODEOWNERS", "docs/CODEOWNERS"), listings) == "contents of .gitlab/CODEOWNERS"
+
+    assert fetched == ["README.rst", ".gitlab/CODEOWNERS"]
+    assert [call.kwargs["path"] for call in project.repository_tree.call_args_list] == ["", ".gitlab"]
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from src.graphql import GraphqlFetcher
+from src.sanitize import Sanitizer
+
+NODE = {
+  "databaseId": 42,
+  "name": "ocio-tool",
+  "nameWithOwner": "CDCgov/ocio-tool",
+  "url": "https://github.com/CDCgov/ocio-tool",
+  "description": None,
+  "homepageUrl": "",
+  "isPrivate": False,
+  "isArchived": False,
+  "isFork": False,
+  "isEmpty": False,
+  "diskUsage": 120,
+  "createdAt": "2020-01-02T03:04:05Z",
+  "pushedAt": "2099-01-02T03:04:05Z",
+  "licenseInfo": {"name": "Apache License 2.0"},
+  "readme0": None,
+  "readme1": {"text": "# Tool\n\nStatus: Production\n"},
+  "readme2": None,
+  "readme3": None,
+  "codeowners0": {"text": "* owner@cdc.gov\n"},
+  "codeowners1": {"text": "* other@cdc.gov\n"},
+  "codeowners2": None,
+  "languages": {"nodes": [{"name": "Python"}, {"name": "Shell"}]},
+  "repositoryTopics": {"nodes": [{"topic": {"name": "surveillance"}}]},
+  "refs": {
+    "pageInfo": {"hasNextPage": False, "endCursor": "c0"},
+    "nodes": [{"name": "v1.2.0", "target": {"oid": "a"}}, {"name": "v1.10.0", "target": {"oid": "b"}}, {"name": "v2.0.0rc1", "target": {"oid": "c"}}],
+  },
+}
+
+class TestGraphqlFetcher:
+  def test_snapshot_matches_rest_fields(self):
+    snapshot = GraphqlFetcher(MagicMock()).snapshot_from_node(NODE)
+
+    assert snapshot.id == 42
+    assert snapshot.full_name == "CDCgov/ocio-tool"
+    assert snapshot.created_at == datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert snapshot.created_at.isoformat() == "2020-01-02T03:04:05+00:00"
+    assert snapshot.license.name == "Apache License 2.0"
+    assert snapshot.languages == ["Python", "Shell"]
+    assert snapshot.topics == ["surveillance"]
+
+  def test_snapshot_feeds_inference_rules(self):
+    metadata = Sanitizer().get_snapshot_metadata(GraphqlFetcher(MagicMock()).snapshot_from_node(NODE))
+
+    assert metadata["organization"] == "ocio"
+    assert metadata["version"] == "1.10.0"
+    assert metadata["description"] == "Tool"
+    assert metadata["status"] == "production"
+    assert metadata["contact"]["email"] == "owner@cdc.gov"
+    assert metadata["permissions"]["usageType"] == "openSource"
+    assert "privateID" not in metadata
+
+  def test_empty_repository_is_skipped(self):
+    node = dict(NODE, isEmpty=True)
+    assert Sanitizer().get_snapshot_metadata(GraphqlFetcher(MagicMock()).snapshot_from_node(node)) is None
+
+  def test_pages_until_exhausted(self):
+    client = MagicMock()
+    page = {"totalCount": 2, "nodes": [NODE], "pageInfo": {"hasNextPage": True, "endCursor": "c1"}}
+    last = {"totalCount": 2, "nodes": [NODE], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+    client.requester.graphql_query.side_effect = [
+      ({}, {"data": {"organization": {"repositories": page}}}),
+      ({}, {"data": {"organization": {"repositories": last}}}),
+    ]
+
+    snapshots = list(GraphqlFetcher(client).iter_snapshots("CDCgov"))
+
+    assert len(snapshots) == 2
+    assert client.requester.graphql_query.call_args_list[1][0][1]["after"] == "c1"
@@ -0,0 +1,104 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+import requests
+from github import Github
+from requests.adapters import HTTPAdapter
+from src.http_cache import HttpCache
+from src.transport import ApiAdapter, mount_github_adapter
+
+URL = "https://api.github.com/repos/CDCgov/tool/readme"
+
+def make_response(status, body=b"", headers=None):
+  response = requests.Response()
+  response.status_code = status
+  response._content = body
+  response.raw = io.BytesIO(body)
+  response.headers.update(headers or {})
+  return response
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+
+  def do_GET(self):
+    self.send_response(200)
+    self.send_header("Content-Length", "2")
+    self.end_headers()
+    self.wfile.write(b"{}")
+
+  def log_message(self, *args):
+    pass
+
+class TestHttpCache:
+  def test_put_and_get_round_trip(self, tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.put(URL, "application/json", {"ETag": '"abc"', "Content-Encoding": "gzip"}, b'{"a": 1}')
+
+    entry = HttpCache(tmp_path).get(URL, "application/json")
+
+    assert entry["etag"] == '"abc"'
+    assert entry["body"] == b'{"a": 1}'
+    assert "Content-Encoding" not in entry["headers"]
+
+  def test_responses_without_validators_are_not_stored(self, tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.put(URL, "", {}, b"body")
+    assert cache.get(URL, "") is None
+
+  def test_least_recently_used_entry_is_evicted(self, tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=2500)
+    cache.put(URL + "/1", "", {"ETag": "1"}, b"x" * 1000)
+    cache.put(URL + "/2", "", {"ETag": "2"}, b"x" * 1000)
+    cache.get(URL + "/1", "")
+    cache.put(URL + "/3", "", {"ETag": "3"}, b"x" * 1000)
+
+    assert cache.get(URL + "/1", "") is not None
+    assert cache.get(URL + "/2", "") is None
+    assert cache.get(URL + "/3", "") is not None
+
+class TestApiAdapter:
+  def test_not_modified_is_served_from_cache(self, tmp_path):
+    adapter = ApiAdapter(cache=HttpCache(tmp_path))
+    request = requests.Request("GET", URL, headers={"Accept": "application/json"}).prepare()
+    first = make_response(200, b'{"name": "README.md"}', {"ETag": '"v1"', "X-RateLimit-Remaining": "10"})
+    second = make_response(304, headers={"X-RateLimit-Remaining": "9"})
+
+    with patch.object(HTTPAdapter, "send", side_effect=[first, second]) as send:
+      adapter.send(request)
+      response = adapter.send(request.copy())
+
+    assert send.call_args_list[1][0][0].headers["If-None-Match"] == '"v1"'
+    assert response.status_code == 200
+    assert response.json() == {"name": "README.md"}
+    assert response.headers["X-RateLimit-Remaining"] == "9"
+    assert adapter.cache.hits == 1
+
+  def test_connections_are_kept_alive_and_reused(self):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    adapter = ApiAdapter.shared("test-keep-alive", pool_size=4)
+    session = adapter.session()
+    try:
+      for _ in range(3):
+        assert session.get(f"http://127.0.0.1:{server.server_port}/").json() == {}
+    finally:
+      server.shutdown()
+      server.server_close()
+
+    assert adapter.connection_stats() == (1, 3)
+    assert "reused: 67%" in adapter.summary()
+    assert ApiAdapter.shared("test-keep-alive") is adapter
+
+  def test_github_client_sends_through_the_adapter(self):
+    adapter = ApiAdapter()
+    client = mount_github_adapter(Github(), adapter)
+    connection = client.requester._Requester__connectionClass("api.github.com", 443)
+    assert connection.session.get_adapter("https://api.github.com/") is adapter
+
+  def test_unknown_pygithub_internals_fail_loudly(self):
+    client = SimpleNamespace(requester=SimpleNamespace())
+    with pytest.raises(RuntimeError):
+      mount_github_adapter(client, ApiAdapter())
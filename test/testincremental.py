@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from src.incremental import PreviousScan
+from src.snapshot import License, RepoSnapshot
+
+PUSHED_AT = datetime(2099, 1, 1, tzinfo=timezone.utc)
+
+def make_repo(**overrides):
+  fields = dict(
+    id=7, name="tool", full_name="CDCgov/tool", html_url="https://github.com/CDCgov/tool",
+    description="A tool", homepage=None, private=False, archived=False, size=10,
+    pushed_at=PUSHED_AT, license=License("MIT License"), topics=["ocio"],
+  )
+  fields.update(overrides)
+  return RepoSnapshot(**fields)
+
+def make_record(**overrides):
+  record = {
+    "name": "tool",
+    "description": "A tool",
+    "status": "development",
+    "homepageURL": "",
+    "repositoryURL": "https://github.com/CDCgov/tool",
+    "repositoryVisibility": "public",
+    "tags": ["ocio"],
+    "date": {"lastModified": PUSHED_AT.isoformat()},
+    "permissions": {"usageType": "openSource", "licenses": [{"name": "MIT License"}]},
+  }
+  record.update(overrides)
+  return record
+
+class TestPreviousScan:
+  def test_unchanged_repository_is_carried_forward(self):
+    record = make_record()
+    assert PreviousScan([record]).match_github(make_repo()) is record
+
+  def test_new_push_is_reprocessed(self):
+    previous = PreviousScan([make_record()])
+    assert previous.match_github(make_repo(pushed_at=datetime(2099, 2, 1, tzinfo=timezone.utc))) is None
+
+  def test_listing_field_change_is_reprocessed(self):
+    previous = PreviousScan([make_record()])
+    assert previous.match_github(make_repo(topics=["ncezid"])) is None
+    assert previous.match_github(make_repo(archived=True)) is None
+    assert previous.match_github(make_repo(license=None)) is None
+
+  def test_cleared_description_is_reprocessed(self):
+    previous = PreviousScan([make_record()])
+    assert previous.match_github(make_repo(description=None)) is None
+    assert previous.match_github(make_repo(description="")) is None
+    assert previous.match_github(make_repo(description="  A tool \n")) is not None
+
+  def test_missing_description_matches_empty_record(self):
+    record = make_record(description="")
+    assert PreviousScan([record]).match_github(make_repo(description=None)) is record
+
+  def test_readme_description_matches_on_platform_description(self):
+    record = make_record(description="Tool from the README", platformDescription="")
+    previous = PreviousScan([record])
+    assert previous.match_github(make_repo(description=None)) is record
+    assert previous.match_github(make_repo(description="Tool from the README")) is None
+
+  def test_gitlab_cleared_description_is_reprocessed(self):
+    record = make_record(homepageURL="https://gitlab.com/cdc/tool", repositoryURL="https://gitlab.com/cdc/tool")
+    project = SimpleNamespace(id=7, name="tool", web_url="https://gitlab.com/cdc/tool", visibility="public", archived=False,
+                              topics=["ocio"], description="A tool", attributes={}, last_activity_at=PUSHED_AT.isoformat())
+    previous = PreviousScan([record])
+    assert previous.match_gitlab(project, "gitlab") is record
+    project.description = None
+    assert previous.match_gitlab(project, "gitlab") is None
+
+  def test_private_repositories_match_on_private_id(self):
+    record = make_record(privateID="github_7", repositoryVisibility="private",
+                         repositoryURL="https://cdcgov.github.io/ShareIT-Act/assets/files/instructions.pdf")
+    assert PreviousScan([record]).match_github(make_repo(private=True)) is record
+
+  def test_repository_crossing_inactive_threshold_is_reprocessed(self):
+    old = datetime(2001, 1, 1, tzinfo=timezone.utc)
+    previous = PreviousScan([make_record(date={"lastModified": old.isoformat()})])
+    assert previous.match_github(make_repo(pushed_at=old)) is None
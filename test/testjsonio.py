@@ -0,0 +1,41 @@
+import json
+import pytest
+from src import jsonio
+
+RECORD = {"name": "Office of Women’s Health", "tags": ["a", "b"], "date": {"created": None}, "size": 1.5, "empty": [], "nested": {}}
+
+class TestJsonio:
+  def test_indented_output_matches_stdlib_layout(self):
+    assert jsonio.dumps(RECORD, indent=True) == json.dumps(RECORD, indent=2, ensure_ascii=False)
+
+  def test_compact_output_has_no_spaces(self):
+    assert jsonio.dumps({"a": [1, 2]}) == '{"a":[1,2]}'
+
+  def test_backends_agree(self, monkeypatch):
+    if jsonio.orjson is None:
+      pytest.skip("orjson is not installed")
+    fast = (jsonio.dumps(RECORD, indent=True), jsonio.dumps(RECORD))
+    monkeypatch.setattr(jsonio, "orjson", None)
+    assert (jsonio.dumps(RECORD, indent=True), jsonio.dumps(RECORD)) == fast
+
+  def test_dump_and_load_round_trip(self, tmp_path):
+    jsonio.dump([RECORD], tmp_path / "repo.json")
+    assert jsonio.load(tmp_path / "repo.json") == [RECORD]
+    assert list(jsonio.iter_array(tmp_path / "repo.json")) == [RECORD]
+
+  def test_iter_projects_streams_code_json(self, tmp_path):
+    projects = [dict(RECORD, number=i, text="x" * (i * 53 % 400)) for i in range(40)]
+    catalog = {"version": "2.0", "measurementType": {"method": "projects"}, "projects": projects, "after": [1]}
+    (tmp_path / "code.json").write_text(json.dumps(catalog, indent=2))
+    (tmp_path / "repo.json").write_text(json.dumps(projects))
+
+    assert list(jsonio.iter_json_array(tmp_path / "code.json", chunk_size=16, key="projects")) == projects
+    assert list(jsonio.iter_projects(tmp_path / "repo.json")) == projects
+    assert list(jsonio.iter_json_array(tmp_path / "code.json", key="missing")) == []
+
+  def test_iter_array_streams_with_either_backend(self, tmp_path, monkeypatch):
+    records = [dict(RECORD, number=i) for i in range(20)]
+    (tmp_path / "repo.json").write_text(json.dumps(records, indent=2))
+    # A whole-file parse would go through load(); records must be decoded one at a time.
+    monkeypatch.setattr(jsonio, "load", None)
+    assert list(jsonio.iter_array(tmp_path / "repo.json")) == records
@@ -0,0 +1,20 @@
+from argparse import Namespace
+from main import parse_orgs
+from src.repository import Repository
+
+class TestParseOrgs:
+  def test_orgs_flag_wins_and_dedupes(self, monkeypatch):
+    monkeypatch.setenv("GH_ORGS", "cdcent")
+    assert parse_orgs(Namespace(orgs="cdcgov, cdcai,cdcgov", org="cdcent")) == ["cdcgov", "cdcai"]
+
+  def test_falls_back_to_env_list(self, monkeypatch):
+    monkeypatch.setenv("GH_ORGS", "cdcgov,cdcent")
+    assert parse_orgs(Namespace(orgs=None, org=None)) == ["cdcgov", "cdcent"]
+
+class TestQuotaName:
+  def test_installations_have_separate_quotas(self):
+    first = Repository.quota_name({"github_app_installation_id": 1})
+    second = Repository.quota_name({"github_app_installation_id": 2})
+    token = Repository.quota_name({"github_token": "ghp_x", "github_app_installation_id": 1})
+    assert len({first, second, token}) == 3
+    assert "ghp_x" not in token
@@ -0,0 +1,62 @@
+import csv
+import json
+from datetime import datetime, timezone
+from src.mapping import PrivateIdMapping, mapping_row
+from src.sanitize import Sanitizer
+from src.snapshot import RepoSnapshot
+
+INSTRUCTIONS_PDF_URL = "https://cdcgov.github.io/ShareIT-Act/assets/files/instructions.pdf"
+
+def record(private_id, name):
+  # Shaped like a sanitized private record: repositoryURL is the instructions notice.
+  return {"name": name, "privateID": private_id, "repositoryURL": INSTRUCTIONS_PDF_URL,
+          "privateRepositoryURL": f"https://github.com/CDCgov/{name}", "contact": {"email": "team@cdc.gov"}}
+
+def read_rows(path):
+  with open(path, newline="") as f:
+    return list(csv.reader(f))
+
+class TestPrivateIdMapping:
+  def test_appends_only_new_ids_and_keeps_date_added(self, tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "repo-a.json").write_text(json.dumps([record("github_1", "renamed"), record("github_2", "b"), {"name": "public"}]))
+    (raw / "repo-b.json").write_text(json.dumps([record("github_2", "b"), record("github_3", "c")]))
+    csv_path = tmp_path / "privateid_mapping.csv"
+    csv_path.write_bytes(
+      b"PrivateID,RepositoryName,RepositoryURL,Organization,ContactEmails,DateAdded\r\n"
+      b"github_1,a,https://github.com/CDCgov/a,CDCgov,team@cdc.gov,2025-07-03T19:50:06.799748"
+    )
+
+    assert PrivateIdMapping(csv_path).update(raw) == 2
+
+    rows = read_rows(csv_path)
+    assert rows[1] == ["github_1", "a", "https://github.com/CDCgov/a", "CDCgov", "team@cdc.gov", "2025-07-03T19:50:06.799748"]
+    assert [row[:4] for row in rows[2:]] == [["github_2", "b", "https://github.com/CDCgov/b", "CDCgov"], ["github_3", "c", "https://github.com/CDCgov/c", "CDCgov"]]
+    assert PrivateIdMapping(csv_path).update(raw) == 0
+
+  def test_creates_the_file(self, tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "repo-a.json").write_text(json.dumps([record("github_1", "a")]))
+    csv_path = tmp_path / "data" / "privateid_mapping.csv"
+
+    assert PrivateIdMapping(csv_path).update(raw) == 1
+    assert read_rows(csv_path)[0] == ["PrivateID", "RepositoryName", "RepositoryURL", "Organization", "ContactEmails", "DateAdded"]
+
+  def test_private_repository_row_from_sanitizer_output(self):
+    snapshot = RepoSnapshot(
+      id=5, name="template", full_name="CDCgov/template", html_url="https://github.com/CDCgov/template", private=True, size=10,
+      created_at=datetime(2020, 1, 1, tzinfo=timezone.utc), pushed_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+      readme="# Template\n", codeowners="* team@cdc.gov\n", languages=["Python"],
+    )
+    record = Sanitizer().get_snapshot_metadata(snapshot)
+    assert record["repositoryURL"].endswith(".pdf")
+
+    row = mapping_row(record["privateID"], record, "2025-01-01T00:00:00")
+
+    assert row[:5] == ["github_5", "template", "https://github.com/CDCgov/template", "CDCgov", record["contact"]["email"]]
+
+  def test_pdf_url_is_never_mapped(self):
+    row = mapping_row("github_6", {"name": "old", "organization": "OCIO", "repositoryURL": INSTRUCTIONS_PDF_URL}, "")
+    assert row[1:4] == ["old", "", "OCIO"]
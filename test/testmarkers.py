@@ -0,0 +1,26 @@
+import re
+from src.markers import MARKER_KEYS, parse_markers
+
+def per_key_search(content, key):
+  """The pattern each sanitizer used to compile for every marker lookup."""
+  match = re.compile(r'(?i)^\s*(?:{}):\s*(.*)$'.format(key), re.MULTILINE).search(content)
+  return match.group(1).strip() if match else None
+
+READMES = [
+  "# Tool\n\nOrganization: OCIO\nContact email: a@cdc.gov; b@cdc.gov\nStatus: Production\nVersion: 2.1\n",
+  "org: NCEZID\n  ORGANIZATION: ignored\nexemption justification: too sensitive\nExemption: exemptByLaw\n",
+  "Status:\nVersion: 1.0\n",
+  "Intro text mentioning Status: inline only\n\n   Version:   3.4.5  \r\nExemption:",
+  "No markers here at all.",
+]
+
+class TestParseMarkers:
+  def test_matches_per_key_search(self):
+    for readme in READMES:
+      markers = parse_markers(readme)
+      for key in MARKER_KEYS:
+        assert markers.get(key) == per_key_search(readme, key), (readme, key)
+
+  def test_empty_content(self):
+    assert parse_markers("") == {}
+    assert parse_markers(None) == {}
@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock, patch
+from src.ratelimit import RateLimitScheduler
+from src.transport import ApiAdapter
+
+class FakeClock:
+  def __init__(self, now=1000.0):
+    self.now = now
+
+  def __call__(self):
+    return self.now
+
+def make_scheduler(max_concurrency=8):
+  clock = FakeClock()
+  scheduler = RateLimitScheduler('test', 'X-RateLimit-Remaining', 'X-RateLimit-Reset', 'X-RateLimit-Limit',
+                                 max_concurrency=max_concurrency, clock=clock)
+  return scheduler, clock
+
+class TestRateLimitScheduler:
+  def test_exhausted_quota_pauses_until_reset(self):
+    scheduler, clock = make_scheduler()
+    assert scheduler.try_acquire() == 0
+    headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1600', 'X-RateLimit-Limit': '5000'}
+    assert scheduler.release(403, headers) is True
+    assert scheduler.try_acquire() == 601
+    clock.now = 1601
+    assert scheduler.try_acquire() == 0
+
+  def test_secondary_limit_halves_concurrency_once(self):
+    scheduler, clock = make_scheduler(max_concurrency=8)
+    for _ in range(3):
+      assert scheduler.try_acquire() == 0
+    assert scheduler.release(403, {'Retry-After': '30'}) is True
+    assert scheduler.release(403, {'Retry-After': '30'}) is True
+    assert scheduler.concurrency == 4
+    assert scheduler.try_acquire() == 30
+
+  def test_plain_forbidden_is_not_a_rate_limit(self):
+    scheduler, _ = make_scheduler()
+    scheduler.try_acquire()
+    headers = {'X-RateLimit-Remaining': '4000', 'X-RateLimit-Reset': '1600', 'X-RateLimit-Limit': '5000'}
+    assert scheduler.release(403, headers, 'Resource not accessible by integration') is False
+    assert scheduler.try_acquire() == 0
+
+  def test_low_quota_spaces_requests(self):
+    scheduler, _ = make_scheduler()
+    scheduler.try_acquire()
+    headers = {'X-RateLimit-Remaining': '120', 'X-RateLimit-Reset': '2000', 'X-RateLimit-Limit': '5000'}
+    scheduler.release(200, headers)
+    assert scheduler.try_acquire() == 0
+    assert scheduler.try_acquire() == 10
+
+class TestApiAdapterRateLimit:
+  def test_rate_limited_request_is_resent(self):
+    scheduler, clock = make_scheduler()
+    limited = MagicMock(status_code=429, headers={'Retry-After': '1'}, text='')
+    ok = MagicMock(status_code=200, headers={}, text='{}')
+    adapter = ApiAdapter(scheduler=scheduler)
+
+    def advance(seconds):
+      clock.now += seconds
+
+    with patch.object(ApiAdapter, '_send_cached', side_effect=[limited, ok]) as send, \
+         patch('src.ratelimit.time.sleep', side_effect=advance):
+      response = adapter.send(MagicMock(method='GET'))
+
+    assert response is ok
+    assert send.call_count == 2
+
+  def test_requests_are_routed_to_their_token_scheduler(self):
+    default, _ = make_scheduler()
+    installation, _ = make_scheduler()
+    adapter = ApiAdapter(scheduler=default)
+    adapter.route_token('ghs_installation', installation)
+    ok = MagicMock(status_code=200, headers={'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': '2000', 'X-RateLimit-Limit': '5000'}, text='{}')
+
+    with patch.object(ApiAdapter, '_send_cached', return_value=ok):
+      adapter.send(MagicMock(method='GET', headers={'Authorization': 'token ghs_installation'}))
+
+    assert installation._quotas and not default._quotas
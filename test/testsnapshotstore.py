@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timezone
+from src.checkpoint import Checkpoint
+from src.gitlab.snapshot import ProjectSnapshot
+from src.offline import rebuild_from_snapshot
+from src.snapshot import License, RepoSnapshot, SnapshotStore
+
+README = "# Tool\n\nOrganization: OCIO\nStatus: Production\n"
+
+def make_snapshot(id, name, readme=README):
+  return RepoSnapshot(
+    id=id, name=name, full_name=f"CDCgov/{name}", html_url=f"https://github.com/CDCgov/{name}",
+    description="A tool", size=10, created_at=datetime(2020, 1, 1, tzinfo=timezone.utc),
+    pushed_at=datetime(2099, 1, 1, tzinfo=timezone.utc), license=License("MIT License"),
+    readme=readme, codeowners="* owner@cdc.gov\n", languages=["Python"], topics=["ocio"], tag_names=["v1.2.0"],
+  )
+
+PROJECT = {
+  "id": 42, "name": "pipeline", "path_with_namespace": "cdc/pipeline", "web_url": "https://gitlab.com/cdc/pipeline",
+  "visibility": "public", "archived": False, "description": "Data pipeline", "topics": ["ncezid"],
+  "created_at": "2020-01-01T00:00:00Z", "last_activity_at": "2099-01-01T00:00:00Z", "license": None,
+}
+
+class TestSnapshotStore:
+  def test_round_trip_and_blob_dedup(self, tmp_path):
+    store = SnapshotStore(tmp_path)
+    writer = store.writer("repo-CDCgov")
+    writer.add(make_snapshot(1, "one"))
+    writer.add(make_snapshot(2, "two"))
+    writer.commit()
+
+    entries = list(store.iter_entries("repo-CDCgov"))
+    assert [entry["id"] for entry in entries] == [1, 2]
+    assert entries[0]["readme"] == entries[1]["readme"]
+    blobs = [path for path in (tmp_path / "blobs").rglob("*") if path.is_file()]
+    assert len(blobs) == 2  # README and CODEOWNERS, each stored once
+
+    snapshot = RepoSnapshot.from_entry(entries[0], store)
+    assert snapshot.readme == README
+    assert snapshot.license.name == "MIT License"
+    assert snapshot.pushed_at == datetime(2099, 1, 1, tzinfo=timezone.utc)
+
+  def test_carry_forward_copies_previous_entry(self, tmp_path):
+    store = SnapshotStore(tmp_path)
+    writer = store.writer("repo-CDCgov")
+    writer.add(make_snapshot(1, "one"))
+    writer.commit()
+
+    writer = store.writer("repo-CDCgov")
+    writer.carry_forward(1)
+    writer.add(make_snapshot(2, "two"))
+    writer.commit()
+    assert [entry["id"] for entry in store.iter_entries("repo-CDCgov")] == [1, 2]
+
+  def test_rebuild_runs_rules_offline(self, tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots")
+    writer = store.writer("repo-CDCgov")
+    writer.add(make_snapshot(1, "one"))
+    writer.add(ProjectSnapshot(PROJECT, readme="Status: Production\n", languages=["Python"], tag_names=["2.0.0"]))
+    writer.commit()
+
+    checkpoint = Checkpoint(tmp_path / "repo-CDCgov.ndjson")
+    assert rebuild_from_snapshot(store, "repo-CDCgov", checkpoint, workers=2) == 2
+    output_file = tmp_path / "repo-CDCgov.json"
+    checkpoint.write_json(output_file)
+    records = {record["name"]: record for record in json.loads(output_file.read_text())}
+
+    assert records["one"]["organization"] == "OCIO"
+    assert records["one"]["version"] == "1.2.0"
+    assert records["one"]["contact"]["email"] == "owner@cdc.gov"
+    assert records["pipeline"]["organization"] == "ncezid"
+    assert records["pipeline"]["version"] == "2.0.0"
+    assert records["pipeline"]["status"] == "production"
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from src.version import VersionResolver, latest_version
+
+def make_tag(name, sha="abc"):
+  tag = MagicMock()
+  tag.name = name
+  tag.commit.sha = sha
+  tag.commit.__getitem__.side_effect = lambda key: sha
+  return tag
+
+def make_repo(pages, per_page=2):
+  repo = MagicMock(html_url="https://github.com/CDCgov/tool", pushed_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+  repo.requester.per_page = per_page
+  repo.get_tags.return_value.get_page.side_effect = lambda n: pages[n] if n < len(pages) else []
+  return repo
+
+class TestLatestVersion:
+  def test_ignores_prereleases_and_invalid_tags(self):
+    assert str(latest_version(["v1.2.0", "v1.10.0", "2.0.0rc1", "nightly"])) == "1.10.0"
+    assert latest_version(["nightly"]) is None
+
+class TestVersionResolver:
+  def test_single_page_is_read_directly(self):
+    resolver = VersionResolver()
+    repo = make_repo([[make_tag("v1.2.0")]])
+    assert resolver.resolve_github(repo) == ("1.2.0", ["v1.2.0"])
+    assert resolver.strategies == {"tag-page": 1}
+
+  def test_backport_release_does_not_hide_higher_tags(self):
+    resolver = VersionResolver()
+    # v1.2.5 was tagged after v2.0.0, and the first page holds only older tags.
+    repo = make_repo([[make_tag("v1.2.4"), make_tag("v1.2.3")], [make_tag("v2.0.0"), make_tag("v1.2.5")], []])
+    assert resolver.resolve_github(repo) == ("2.0.0", ["v1.2.4", "v1.2.3", "v2.0.0", "v1.2.5"])
+    assert resolver.strategies == {"full-scan": 1}
+
+  def test_cache_hit_when_tags_unchanged(self, tmp_path):
+    pages = [[make_tag("v1.2.0"), make_tag("v1.1.0")], [make_tag("v3.0.0")]]
+    resolver = VersionResolver(tmp_path / "versions.json")
+    resolver.resolve_github(make_repo(pages))
+    resolver.save()
+
+    cached = VersionResolver(tmp_path / "versions.json")
+    repo = make_repo(pages)
+    assert cached.resolve_github(repo) == ("3.0.0", ["v1.2.0", "v1.1.0", "v3.0.0"])
+    assert cached.strategies == {"cache": 1}
+    repo.get_tags.return_value.get_page.assert_called_once_with(0)
+
+  def test_cache_entry_without_tag_names_is_rescanned(self, tmp_path):
+    pages = [[make_tag("v1.2.0"), make_tag("v1.1.0")], [make_tag("v3.0.0")]]
+    resolver = VersionResolver(tmp_path / "versions.json")
+    resolver.resolve_github(make_repo(pages))
+    for entry in resolver.entries.values():
+      del entry["tag_names"]
+    resolver.save()
+
+    cached = VersionResolver(tmp_path / "versions.json")
+    assert cached.resolve_github(make_repo(pages)) == ("3.0.0", ["v1.2.0", "v1.1.0", "v3.0.0"])
+    assert cached.strategies == {"full-scan": 1}
+
+  def test_gitlab_reads_version_ordered_first_page(self):
+    resolver = VersionResolver()
+    resolver.PER_PAGE = 2
+    project = MagicMock(web_url="https://gitlab.com/cdc/tool")
+    project.tags.list.return_value = [make_tag("v2.1.0"), make_tag("v2.0.0")]
+    assert resolver.resolve_gitlab(project) == ("2.1.0", ["v2.1.0", "v2.0.0"])
+    assert resolver.strategies == {"ordered-tags": 1}
+    project.tags.list.assert_called_once_with(order_by="version", sort="desc", per_page=2, page=1, get_all=False)
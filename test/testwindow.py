@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.window import SubmissionWindow
+
+class TestSubmissionWindow:
+  def test_items_are_pulled_as_results_complete(self):
+    pulled = []
+
+    def items():
+      for i in range(20):
+        pulled.append(i)
+        yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+      results = SubmissionWindow(executor, max_pending=4).map(lambda i: i * 2, items())
+      first_item, first_future = next(results)
+      # Only the first window's worth of items has been drawn from the iterable.
+      assert len(pulled) == 4
+      rest = list(results)
+
+    assert first_future.result() == first_item * 2
+    assert sorted([first_item] + [item for item, _ in rest]) == list(range(20))
+
+  def test_empty_iterable(self):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+      assert list(SubmissionWindow(executor, max_pending=4).map(str, [])) == []